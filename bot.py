@@ -5,12 +5,18 @@ from discord.ext import commands, tasks
 from datetime import datetime, timedelta
 import logging
 import json
+import config
 from main import db, create_app
 from models import *
+from services.database import DatabaseService
 from services.discord_service import DiscordService
 from services.moderation import ModerationService
 from services.economy import EconomyService
 from services.tickets import TicketService
+from services.leveling import LevelingService
+from services.chat_xp import ChatXPEngine
+from services.social_media import SocialMediaService
+from services.social_monitor import SocialMonitorService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +46,13 @@ class RosethornBot(commands.Bot):
         self.moderation = ModerationService(self)
         self.economy = EconomyService(self)
         self.tickets = TicketService(self)
+        self.leveling = LevelingService()
+        self.chat_xp = ChatXPEngine(self)
+        self.db_service = DatabaseService()
+        
+        # Social polling, push and announcements; the commands go through social_monitor
+        self.social_media = SocialMediaService(self)
+        self.social_monitor = SocialMonitorService(self.db_service, self.social_media)
         
         # Create Flask app context for database operations
         self.app = create_app()
@@ -61,13 +74,51 @@ class RosethornBot(commands.Bot):
         # Start the app context
         self.app_context.push()
         
+        # Re-level members in the background if the level curve changed since the last run
+        asyncio.create_task(self.ensure_level_curve())
+        
+        # Map open ticket channels so message handlers can skip the database
+        self.tickets.channels.load()
+        
+        # Arm idle ticket deadlines from the open tickets
+        self.tickets.idle.start()
+        
+        # Rebuild the ticket assignment queues and staff loads
+        self.tickets.dispatcher.start()
+        
         # Start background tasks
         self.update_member_activity.start()
         self.check_afk_members.start()
         self.process_temporary_punishments.start()
+        self.release_stale_reservations.start()
+        self.reconcile_economy_aggregates.start()
+        self.flush_chat_xp.start()
+        self.flush_ticket_activity.start()
+        
+        # Open the fetchers' session now so manual checks work; polling waits for the cache
+        await self.social_media.initialize()
+        if config.ENABLE_SOCIAL_MONITORING:
+            asyncio.create_task(self.run_social_monitoring())
         
         logger.info("🌹 RosethornBot setup complete!")
     
+    async def ensure_level_curve(self):
+        """Apply a changed level curve on a worker thread so a large re-level never blocks the gateway."""
+        def relevel():
+            # A fresh app context gives the thread its own database session
+            with self.app.app_context():
+                return self.leveling.ensure_curve()
+        
+        try:
+            await asyncio.to_thread(relevel)
+        except Exception as e:
+            logger.error(f"Error applying level curve: {e}")
+    
+    async def run_social_monitoring(self):
+        """Poll and announce social posts once announcement channels are cached."""
+        await self.wait_until_ready()
+        await self.social_media.monitor_social_media()
+    
     async def on_ready(self):
         """Bot ready event."""
         logger.info(f"🌹 RosethornBot is online as {self.user}")
@@ -82,6 +133,9 @@ class RosethornBot(commands.Bot):
         
         # Initialize guild configurations
         await self.initialize_guilds()
+        
+        # Hand out tickets that queued while the bot was offline
+        self.tickets.dispatcher.dispatch_all()
     
     async def initialize_guilds(self):
         """Initialize configurations for all guilds."""
@@ -136,6 +190,13 @@ class RosethornBot(commands.Bot):
         """Handle member leaving guild."""
         await self.discord_service.handle_member_leave(member)
     
+    async def on_presence_update(self, before, after):
+        """Give queued tickets to staff as they come online."""
+        if after.bot or before.status != discord.Status.offline or after.status == discord.Status.offline:
+            return
+        if self.tickets.dispatcher.queues.get(str(after.guild.id)):
+            self.tickets.dispatcher.dispatch(after.guild)
+    
     async def on_message(self, message):
         """Handle message events."""
         if message.author.bot:
@@ -147,6 +208,12 @@ class RosethornBot(commands.Bot):
         # Check for AFK mentions
         await self.discord_service.check_afk_mentions(message)
         
+        # Chat XP; persisted by the flush_chat_xp loop
+        await self.chat_xp.handle_message(message)
+        
+        # Ticket activity and first-response times
+        self.tickets.track_message(message)
+        
         # Auto-moderation
         await self.moderation.auto_moderate_message(message)
         
@@ -178,6 +245,34 @@ class RosethornBot(commands.Bot):
     async def process_temporary_punishments(self):
         """Process temporary mutes and bans."""
         await self.moderation.process_temporary_punishments()
+    
+    @tasks.loop(minutes=5)
+    async def release_stale_reservations(self):
+        """Refund shop reservations abandoned mid-purchase."""
+        await self.economy.purchases.release_stale_reservations()
+    
+    @tasks.loop(hours=1)
+    async def reconcile_economy_aggregates(self):
+        """Refresh economy percentiles and correct counter drift."""
+        with self.app_context:
+            self.economy.aggregates.reconcile()
+    
+    @tasks.loop(seconds=5)
+    async def flush_chat_xp(self):
+        """Persist accumulated chat XP in one batch."""
+        self.chat_xp.flush()
+    
+    @tasks.loop(minutes=1)
+    async def flush_ticket_activity(self):
+        """Persist ticket channel last-activity times in one batch."""
+        self.tickets.idle.flush()
+    
+    async def close(self):
+        """Flush pending chat XP and ticket activity and close social sessions before shutting down."""
+        self.chat_xp.flush()
+        self.tickets.idle.flush()
+        await self.social_media.close()
+        await super().close()
 
 # Commands
 @bot.command(name='help')
@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
 import config
-from utils import format_currency, format_datetime
+from utils import format_currency
 
 class CheckInCommands(commands.Cog):
     def __init__(self, bot):
@@ -111,10 +111,10 @@ class CheckInCommands(commands.Cog):
         """Check check-in streak"""
         target = member or ctx.author
         
-        # Get latest check-in
-        latest_checkin = await self.bot.db_service.get_latest_checkin(target.id, ctx.guild.id)
+        # Counters are rolled up at check-in time
+        stats = await self.bot.db_service.get_checkin_stats(target.id, ctx.guild.id)
         
-        if not latest_checkin:
+        if not stats:
             embed = await self.bot.create_embed(
                 f"Check-In Status for {target.display_name}",
                 "This noble soul has not yet begun their Gothic journey. Use `r!checkin` to start!"
@@ -124,15 +124,14 @@ class CheckInCommands(commands.Cog):
         
         # Check if streak is still active
         today = datetime.utcnow().date()
-        last_checkin_date = latest_checkin.date.date()
-        days_since = (today - last_checkin_date).days
+        days_since = (today - stats.last_check_in).days
         
         if days_since == 0:
             status = "✅ Checked in today"
-            current_streak = latest_checkin.streak
+            current_streak = stats.current_streak
         elif days_since == 1:
             status = "⚠️ Haven't checked in today"
-            current_streak = latest_checkin.streak
+            current_streak = stats.current_streak
         else:
             status = "❌ Streak broken"
             current_streak = 0
@@ -153,11 +152,12 @@ class CheckInCommands(commands.Cog):
         )
         embed.add_field(
             name="Last Check-In",
-            value=format_datetime(latest_checkin.date),
+            value=stats.last_check_in.strftime("%Y-%m-%d"),
             inline=True
         )
         
-        if latest_checkin.mood:
+        latest_checkin = await self.bot.db_service.get_latest_checkin(target.id, ctx.guild.id)
+        if latest_checkin and latest_checkin.mood:
             embed.add_field(
                 name="Last Mood",
                 value=latest_checkin.mood,
@@ -165,10 +165,14 @@ class CheckInCommands(commands.Cog):
             )
         
         # Streak statistics
-        total_checkins = await self.bot.db_service.get_total_checkins(target.id, ctx.guild.id)
         embed.add_field(
             name="Total Check-Ins",
-            value=f"{total_checkins} times",
+            value=f"{stats.total_checkins} times",
+            inline=True
+        )
+        embed.add_field(
+            name="Longest Streak",
+            value=f"{stats.longest_streak} days",
             inline=True
         )
         
@@ -280,9 +284,9 @@ class CheckInCommands(commands.Cog):
         elif days < 1:
             days = 30
         
-        history = await self.bot.db_service.get_checkin_history(target.id, ctx.guild.id, days)
+        calendar = await self.bot.db_service.get_checkin_calendar(target.id, ctx.guild.id)
         
-        if not history:
+        if not calendar or not calendar['total_days']:
             embed = await self.bot.create_embed(
                 f"Check-In History for {target.display_name}",
                 "No check-in history found for this time period."
@@ -295,26 +299,22 @@ class CheckInCommands(commands.Cog):
             f"Last {days} days of Gothic dedication"
         )
         
-        # Group by week
-        weeks = {}
-        for checkin in history:
-            week_start = checkin.date.date() - timedelta(days=checkin.date.weekday())
-            if week_start not in weeks:
-                weeks[week_start] = []
-            weeks[week_start].append(checkin)
-        
-        for week_start, checkins in sorted(weeks.items(), reverse=True)[:4]:  # Show last 4 weeks
+        # Last 4 weeks, read from the member's bitset calendar
+        today = datetime.utcnow().date()
+        this_week = today - timedelta(days=today.weekday())
+        for weeks_back in range(min((days + 6) // 7, 4)):
+            week_start = this_week - timedelta(weeks=weeks_back)
             week_text = ""
             for i in range(7):
                 day = week_start + timedelta(days=i)
-                checkin = next((c for c in checkins if c.date.date() == day), None)
-                
-                if checkin:
-                    emoji = "✅" if checkin.streak > 0 else "❌"
-                    mood_emoji = self.get_mood_emoji(checkin.mood) if checkin.mood else ""
-                    week_text += f"{emoji}{mood_emoji} "
-                else:
+                if day > today:
                     week_text += "⭕ "
+                elif day in calendar['recent_days']:
+                    mood = calendar['moods'].get(day)
+                    mood_emoji = self.get_mood_emoji(mood) if mood else ""
+                    week_text += f"✅{mood_emoji} "
+                else:
+                    week_text += "❌ "
             
             embed.add_field(
                 name=f"Week of {week_start.strftime('%Y-%m-%d')}",
@@ -322,9 +322,34 @@ class CheckInCommands(commands.Cog):
                 inline=False
             )
         
+        # Monthly heatmap for the year
+        shades = ["⬛", "🟫", "🟥", "🟧", "🟩"]
+        heatmap = ""
+        for month, count in enumerate(calendar['monthly'], start=1):
+            if month > today.month:
+                break
+            shade = shades[min(count * (len(shades) - 1) // 28, len(shades) - 1)] if count else shades[0]
+            heatmap += f"{shade} {datetime(today.year, month, 1).strftime('%b')}: {count}\n"
+        
+        embed.add_field(
+            name=f"🗓️ {calendar['year']} Heatmap",
+            value=heatmap,
+            inline=True
+        )
+        embed.add_field(
+            name="📊 Totals",
+            value=(
+                f"**Days This Year:** {calendar['year_days']}\n"
+                f"**All-Time Days:** {calendar['total_days']}\n"
+                f"**Current Streak:** {calendar['current_streak']} days\n"
+                f"**Longest Streak:** {calendar['longest_streak']} days"
+            ),
+            inline=True
+        )
+        
         embed.add_field(
             name="Legend",
-            value="✅ Checked in | ❌ Missed | ⭕ No data",
+            value="✅ Checked in | ❌ Missed | ⭕ Upcoming",
             inline=False
         )
         
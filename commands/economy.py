@@ -186,7 +186,7 @@ class EconomyCommands(commands.Cog):
     async def view_inventory(self, ctx, member: discord.Member = None):
         """View user's inventory"""
         target = member or ctx.author
-        inventory = await self.bot.economy_service.get_user_inventory(target.id)
+        inventory = await self.bot.economy_service.get_user_inventory(target.id, ctx.guild.id)
         
         if not inventory:
             embed = await self.bot.create_embed(
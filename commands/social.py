@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from datetime import datetime
 import config
+from services.social_fetchers import PLATFORMS
 
 class SocialCommands(commands.Cog):
     def __init__(self, bot):
@@ -18,7 +19,7 @@ class SocialCommands(commands.Cog):
             )
             embed.add_field(
                 name="📋 Supported Platforms",
-                value="• `twitter` - Twitter/X monitoring\n• `youtube` - YouTube channel monitoring\n• `instagram` - Instagram monitoring\n• `tiktok` - TikTok monitoring",
+                value="\n".join(f"• `{name}` - {fetcher.label} monitoring" for name, fetcher in PLATFORMS.items()),
                 inline=False
             )
             embed.add_field(
@@ -35,7 +36,7 @@ class SocialCommands(commands.Cog):
             return
         
         platform = platform.lower()
-        valid_platforms = ['twitter', 'youtube', 'instagram', 'tiktok', 'twitch']
+        valid_platforms = list(PLATFORMS)
         
         if platform not in valid_platforms:
             embed = await self.bot.create_embed(
@@ -359,7 +360,7 @@ class SocialCommands(commands.Cog):
             )
             embed.add_field(
                 name="Platforms",
-                value="twitter, youtube, instagram, tiktok, twitch",
+                value=", ".join(PLATFORMS),
                 inline=False
             )
             await ctx.send(embed=embed)
@@ -382,11 +383,12 @@ class SocialCommands(commands.Cog):
                 'url': 'https://youtube.com/watch?v=testVideo123',
                 'timestamp': datetime.utcnow()
             },
-            'instagram': {
-                'username': 'test_gothic',
-                'caption': 'Captured this beautiful Gothic rose in moonlight 🌹🌙 #Gothic #Photography',
-                'url': 'https://instagram.com/p/testPost123',
-                'timestamp': datetime.utcnow()
+            'twitch': {
+                'username': 'TestStreamer',
+                'content': 'Midnight restoration of the manor chapel 🌹',
+                'url': 'https://www.twitch.tv/teststreamer',
+                'timestamp': datetime.utcnow(),
+                'fields': [("🎮 Playing", "Just Chatting", True), ("👀 Viewers", "1,234", True)]
             }
         }
         
@@ -398,7 +400,7 @@ class SocialCommands(commands.Cog):
             await ctx.send(embed=embed, delete_after=10)
             return
         
-        # Format test post
+        # Format test post through the same pipeline as real announcements
         post_embed = await self.bot.social_monitor.format_post(platform, test_data[platform])
         post_embed.title = f"🧪 TEST POST - {post_embed.title}"
         post_embed.add_field(
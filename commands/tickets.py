@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
+import re
 import config
 
 class TicketCommands(commands.Cog):
@@ -97,7 +98,7 @@ class TicketCommands(commands.Cog):
     @commands.has_permissions(manage_messages=True)
     async def close_ticket(self, ctx, *, reason="No reason provided"):
         """Close a ticket"""
-        if not ctx.channel.name.startswith('ticket-'):
+        if not self.bot.ticket_service.is_ticket_channel(ctx.channel.id):
             embed = await self.bot.create_embed(
                 "Invalid Channel",
                 "This command can only be used in ticket channels."
@@ -187,11 +188,57 @@ class TicketCommands(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name='ticketsearch', aliases=['tsearch'])
+    @commands.has_permissions(manage_messages=True)
+    async def search_tickets(self, ctx, *, query):
+        """Search tickets, notes and transcripts by keyword; add page:N for later pages"""
+        # Only an explicit page:N token selects a page, so queries like "2fa reset" stay whole
+        page = 1
+        match = re.search(r'(?:^|\s)page:(\d+)(?=\s|$)', query, re.IGNORECASE)
+        if match:
+            page = max(int(match.group(1)), 1)
+            query = (query[:match.start()] + query[match.end():]).strip()
+        if not query:
+            embed = await self.bot.create_embed(
+                "Nothing to Search",
+                f"Tell me what to seek, e.g. `{ctx.prefix}ticketsearch refund page:2`."
+            )
+            await ctx.send(embed=embed, delete_after=15)
+            return
+        
+        found = await self.bot.ticket_service.search_tickets(ctx.guild.id, query, page)
+        
+        if not found['results']:
+            embed = await self.bot.create_embed(
+                "No Tickets Found",
+                f"Nothing in our Gothic archives matches **{query}**."
+            )
+            await ctx.send(embed=embed, delete_after=15)
+            return
+        
+        embed = await self.bot.create_embed(
+            f"🔎 Tickets matching \"{query}\"",
+            f"Page {found['page']} • searched in {found['elapsed_ms']}ms"
+        )
+        
+        for result in found['results']:
+            ticket = result['ticket']
+            embed.add_field(
+                name=f"Ticket #{ticket.id} • {ticket.status.title()}",
+                value=f"**{ticket.subject or 'No subject'}**\n{result['snippet'][:200]}\n{ticket.created_at.strftime('%Y-%m-%d')}",
+                inline=False
+            )
+        
+        if found['has_more']:
+            embed.set_footer(text=f"Use {ctx.prefix}ticketsearch {query} page:{found['page'] + 1} for more 🌹")
+        
+        await ctx.send(embed=embed)
+    
     @commands.command(name='adduser')
     @commands.has_permissions(manage_messages=True)
     async def add_user_to_ticket(self, ctx, member: discord.Member):
         """Add user to current ticket"""
-        if not ctx.channel.name.startswith('ticket-'):
+        if not self.bot.ticket_service.is_ticket_channel(ctx.channel.id):
             embed = await self.bot.create_embed(
                 "Invalid Channel",
                 "This command can only be used in ticket channels."
@@ -215,7 +262,7 @@ class TicketCommands(commands.Cog):
     @commands.has_permissions(manage_messages=True)
     async def remove_user_from_ticket(self, ctx, member: discord.Member):
         """Remove user from current ticket"""
-        if not ctx.channel.name.startswith('ticket-'):
+        if not self.bot.ticket_service.is_ticket_channel(ctx.channel.id):
             embed = await self.bot.create_embed(
                 "Invalid Channel",
                 "This command can only be used in ticket channels."
@@ -20,13 +20,62 @@ TWITTER_BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN", "")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
 INSTAGRAM_ACCESS_TOKEN = os.getenv("INSTAGRAM_ACCESS_TOKEN", "")
 
+# Social polling: per-platform API budgets as (units, per seconds); YouTube counts quota units
+SOCIAL_RATE_LIMITS = {
+    "twitter": (1500, 900),  # User timeline, app auth
+    "youtube": (10000, 86400),  # Daily Data API quota
+    "twitch": (800, 60)  # Helix points per minute
+}
+SOCIAL_POLL_INTERVAL = int(os.getenv("SOCIAL_POLL_INTERVAL", "300"))  # Seconds between polls of one account
+SOCIAL_POLL_CONCURRENCY = int(os.getenv("SOCIAL_POLL_CONCURRENCY", "20"))
+# Learned per-account intervals stay within these bounds (seconds)
+SOCIAL_POLL_MIN_INTERVAL = int(os.getenv("SOCIAL_POLL_MIN_INTERVAL", "300"))
+SOCIAL_POLL_MAX_INTERVAL = int(os.getenv("SOCIAL_POLL_MAX_INTERVAL", "3600"))
+SOCIAL_LIVE_POLL_INTERVAL = int(os.getenv("SOCIAL_LIVE_POLL_INTERVAL", "60"))  # Near a streamer's usual start
+# Announcements to one channel arriving within this window share a message
+SOCIAL_COALESCE_SECONDS = float(os.getenv("SOCIAL_COALESCE_SECONDS", "2"))
+SOCIAL_DELIVERY_WORKERS = int(os.getenv("SOCIAL_DELIVERY_WORKERS", "4"))
+
+# API roots, overridable to point the fetchers at a local stand-in
+TWITTER_API_BASE = os.getenv("TWITTER_API_BASE", "https://api.twitter.com/2")
+YOUTUBE_API_BASE = os.getenv("YOUTUBE_API_BASE", "https://www.googleapis.com/youtube/v3")
+TWITCH_API_BASE = os.getenv("TWITCH_API_BASE", "https://api.twitch.tv/helix")
+
+# YouTube WebSub push; an empty callback URL leaves YouTube on polling alone
+WEBSUB_HUB_URL = os.getenv("WEBSUB_HUB_URL", "https://pubsubhubbub.appspot.com/subscribe")
+WEBSUB_CALLBACK_URL = os.getenv("WEBSUB_CALLBACK_URL", "")  # Public URL of the dashboard's /websub/youtube
+WEBSUB_LEASE_SECONDS = int(os.getenv("WEBSUB_LEASE_SECONDS", "432000"))
+WEBSUB_FALLBACK_INTERVAL = int(os.getenv("WEBSUB_FALLBACK_INTERVAL", "21600"))  # Polling while push is live
+WEBSUB_MAX_AGE_HOURS = int(os.getenv("WEBSUB_MAX_AGE_HOURS", "24"))  # Older entries are edits, not uploads
+
 # AI Services
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")  # Overridable for a local stand-in
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+# Completion cache; an empty path keeps it in memory only
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "3600"))
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "")
+AI_STREAM_EDIT_INTERVAL = float(os.getenv("AI_STREAM_EDIT_INTERVAL", "1.2"))  # Seconds between message edits
+# Request scheduling: OpenAI calls in flight at once, and per-guild limits
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_GUILD_DAILY_TOKENS = int(os.getenv("AI_GUILD_DAILY_TOKENS", "50000"))
+AI_MAX_QUEUED_PER_GUILD = int(os.getenv("AI_MAX_QUEUED_PER_GUILD", "20"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "30"))  # Seconds a request may wait before it is rejected
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///rosethorn.db")
 
+# Ticket transcripts
+TRANSCRIPT_DIR = os.getenv("TRANSCRIPT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts"))
+
+# Idle ticket auto-close: warn after this many hours without messages, close after this many
+TICKET_IDLE_WARN_HOURS = float(os.getenv("TICKET_IDLE_WARN_HOURS", "48"))
+TICKET_IDLE_CLOSE_HOURS = float(os.getenv("TICKET_IDLE_CLOSE_HOURS", "72"))
+
+# Ticket dispatch: open tickets auto-assigned to one online staff member at a time
+TICKET_STAFF_CAPACITY = int(os.getenv("TICKET_STAFF_CAPACITY", "3"))
+
 # Feature Toggles
 ENABLE_AI_FEATURES = os.getenv("ENABLE_AI_FEATURES", "true").lower() == "true"
 ENABLE_VOICE_FEATURES = os.getenv("ENABLE_VOICE_FEATURES", "true").lower() == "true"
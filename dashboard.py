@@ -1,15 +1,23 @@
 import os
 import json
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session, send_file, abort
 from flask_login import login_required, login_user, logout_user, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 import requests
 from main import db, login_manager
 from models import *
 from utils.helpers import create_embed_dict, parse_duration
+from services.economy_aggregates import EconomyAggregates
+from services.checkin_calendar import CheckInCalendarService
+from services.ticket_search import TicketSearchIndex
+from services.ticket_analytics import TicketAnalytics
 
 dashboard_bp = Blueprint('dashboard', __name__)
+economy_aggregates = EconomyAggregates()
+checkin_calendar = CheckInCalendarService()
+ticket_search = TicketSearchIndex()
+ticket_analytics = TicketAnalytics()
 
 # Discord OAuth2 configuration
 DISCORD_CLIENT_ID = os.getenv('DISCORD_CLIENT_ID', 'your_discord_client_id')
@@ -232,6 +240,17 @@ def tickets():
     """Ticket management page."""
     guild_id = request.args.get('guild_id')
     status_filter = request.args.get('status', 'all')
+    search_query = request.args.get('q', '').strip()
+    
+    if search_query and guild_id:
+        found = ticket_search.search(guild_id, search_query, request.args.get('page', 1, type=int), per_page=25)
+        return render_template('tickets.html',
+                             tickets=[result['ticket'] for result in found['results']],
+                             search=found,
+                             search_query=search_query,
+                             guilds=Guild.query.all(),
+                             selected_guild_id=guild_id,
+                             status_filter=status_filter)
     
     query = Ticket.query
     
@@ -250,6 +269,25 @@ def tickets():
                          selected_guild_id=guild_id,
                          status_filter=status_filter)
 
+@dashboard_bp.route('/tickets/<int:ticket_id>/transcript')
+@login_required
+def ticket_transcript(ticket_id):
+    """Serve a closed ticket's transcript with range request support."""
+    ticket = Ticket.query.get_or_404(ticket_id)
+    
+    if request.args.get('format') == 'jsonl':
+        path, mimetype = ticket.transcript_path, 'application/gzip'
+    else:
+        path, mimetype = ticket.transcript_html_path, 'text/html'
+    
+    if not path or not os.path.exists(path):
+        abort(404)
+    
+    # conditional=True honours Range and If-Modified-Since so large transcripts load incrementally
+    return send_file(path, mimetype=mimetype, conditional=True,
+                     as_attachment=mimetype != 'text/html',
+                     download_name=os.path.basename(path))
+
 @dashboard_bp.route('/economy')
 @login_required
 def economy():
@@ -269,6 +307,7 @@ def economy():
     top_earners = (Member.query.filter_by(guild_id=guild_id)
                    .order_by(Member.balance.desc())
                    .limit(10).all())
+    stats = economy_aggregates.get_stats(guild_id)
     
     guilds = Guild.query.all()
     
@@ -276,7 +315,8 @@ def economy():
                          guilds=guilds,
                          guild=guild,
                          shop_items=shop_items,
-                         top_earners=top_earners)
+                         top_earners=top_earners,
+                         stats=stats)
 
 @dashboard_bp.route('/api/guild/<guild_id>/config', methods=['GET', 'POST'])
 @login_required
@@ -314,6 +354,23 @@ def guild_config_api(guild_id):
         
         return jsonify({'success': True, 'message': 'Configuration updated successfully!'})
 
+@dashboard_bp.route('/api/guild/<guild_id>/member/<user_id>/checkins')
+@login_required
+def member_checkins_api(guild_id, user_id):
+    """API endpoint for a member's check-in calendar."""
+    year = request.args.get('year', type=int)
+    return jsonify(checkin_calendar.summary(guild_id, user_id, year))
+
+@dashboard_bp.route('/api/guild/<guild_id>/tickets/stats')
+@login_required
+def ticket_stats_api(guild_id):
+    """API endpoint for ticket SLA metrics and daily trend."""
+    days = min(request.args.get('days', 30, type=int), 365)
+    return jsonify({
+        'stats': ticket_analytics.get_stats(guild_id),
+        'trend': ticket_analytics.trend(guild_id, days)
+    })
+
 @dashboard_bp.route('/api/commands/preview', methods=['POST'])
 @login_required
 def preview_command():
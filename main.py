@@ -46,10 +46,28 @@ def create_app():
     
     # Register blueprints
     from dashboard import dashboard_bp
+    from services.websub import websub_bp
     app.register_blueprint(dashboard_bp)
+    app.register_blueprint(websub_bp)
     
     return app
 
+def create_db_app(database_url):
+    """Create a bare Flask app with only the database, for offline load tests and benchmarks."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if database_url.startswith("sqlite"):
+        # Simulated workers write from many threads; wait on SQLite's file lock instead of failing
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30, "check_same_thread": False}}
+
+    db.init_app(app)
+    with app.app_context():
+        import models
+        db.create_all()
+
+    return app
+
 def run_bot():
     """Run the Discord bot in a separate thread."""
     try:
@@ -48,7 +48,10 @@ class Member(db.Model):
     afk_since = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'guild_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'guild_id'),
+        db.Index('ix_member_guild_balance', 'guild_id', 'balance'),
+    )
 
 class CustomCommand(db.Model):
     """Custom commands created through dashboard."""
@@ -85,6 +88,38 @@ class Ticket(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     closed_at = db.Column(db.DateTime, nullable=True)
     closed_by = db.Column(db.String(20), nullable=True)
+    transcript_path = db.Column(db.String(255), nullable=True)  # gzip JSONL archive
+    transcript_html_path = db.Column(db.String(255), nullable=True)
+    transcript_messages = db.Column(db.Integer, nullable=True)
+    first_response_at = db.Column(db.DateTime, nullable=True)  # First staff message in the channel
+    first_response_seconds = db.Column(db.Integer, nullable=True)
+    resolution_seconds = db.Column(db.Integer, nullable=True)
+    last_activity_at = db.Column(db.DateTime, nullable=True)  # Persisted lazily from memory
+    idle_warned_at = db.Column(db.DateTime, nullable=True)
+    assigned_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (db.Index('ix_ticket_guild_status', 'guild_id', 'status'),)
+
+class TicketDailyStat(db.Model):
+    """Per-guild ticket flow for one day."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    opened = db.Column(db.Integer, default=0)
+    closed = db.Column(db.Integer, default=0)
+    resolution_seconds = db.Column(db.BigInteger, default=0)  # Sum over tickets closed that day
+    responded = db.Column(db.Integer, default=0)
+    first_response_seconds = db.Column(db.BigInteger, default=0)  # Sum over first responses that day
+    
+    __table_args__ = (db.UniqueConstraint('guild_id', 'date'),)
+
+class TicketNote(db.Model):
+    """Internal staff notes on a ticket."""
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    author_id = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Warning(db.Model):
     """Member warning system."""
@@ -111,6 +146,7 @@ class ShopItem(db.Model):
     purchasable = db.Column(db.Boolean, default=True)
     role_reward = db.Column(db.String(20), nullable=True)  # Role ID to give on purchase
     emoji = db.Column(db.String(50), nullable=True)
+    holder_count = db.Column(db.Integer, default=0)  # Members currently holding this item
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Purchase(db.Model):
@@ -122,6 +158,79 @@ class Purchase(db.Model):
     quantity = db.Column(db.Integer, default=1)
     total_cost = db.Column(db.Integer, nullable=False)
     purchased_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_purchase_guild_user', 'guild_id', 'user_id'),)
+
+class InventoryItem(db.Model):
+    """Materialized per-member item holdings."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('shop_item.id'), nullable=False)
+    quantity = db.Column(db.Integer, default=0)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    item = db.relationship('ShopItem')
+    
+    # Also serves (guild_id, user_id) inventory lookups as an index prefix
+    __table_args__ = (db.UniqueConstraint('guild_id', 'user_id', 'item_id'),)
+
+class StockReservation(db.Model):
+    """Shop stock held for a buyer while slow rewards are granted."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('shop_item.id'), nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    total_cost = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, confirmed, released
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (db.Index('ix_stock_reservation_status_created', 'status', 'created_at'),)
+
+class LedgerEntry(db.Model):
+    """Currency movements feeding the per-guild economy aggregates."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)  # Positive inflow, negative outflow
+    source = db.Column(db.String(50), nullable=False)  # checkin, milestone, level_up, shop, refund, admin
+    balance_after = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_ledger_entry_guild_created', 'guild_id', 'created_at'),)
+
+class EconomyAggregate(db.Model):
+    """Precomputed per-guild economy figures."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), unique=True, nullable=False)
+    total_supply = db.Column(db.BigInteger, default=0)
+    holders = db.Column(db.Integer, default=0)  # Members with a positive balance
+    ledger_entries = db.Column(db.Integer, default=0)
+    median_balance = db.Column(db.Integer, default=0)
+    p90_balance = db.Column(db.Integer, default=0)
+    p99_balance = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reconciled_at = db.Column(db.DateTime, nullable=True)
+
+class EconomyDailyFlow(db.Model):
+    """Per-guild daily currency inflow and outflow by source."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    source = db.Column(db.String(50), nullable=False)
+    inflow = db.Column(db.BigInteger, default=0)
+    outflow = db.Column(db.BigInteger, default=0)
+    entries = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('guild_id', 'date', 'source'),)
+
+class LevelThreshold(db.Model):
+    """Stored copy of the level curve used for set-wise re-levelling."""
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    min_xp = db.Column(db.BigInteger, nullable=False, index=True)
 
 class Application(db.Model):
     """Application system."""
@@ -146,6 +255,49 @@ class SocialMediaConfig(db.Model):
     enabled = db.Column(db.Boolean, default=True)
     last_post_id = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    channel_id = db.synonym('announcement_channel')
+
+# The monitor commands and dashboard name monitoring rows SocialMonitor
+SocialMonitor = SocialMediaConfig
+
+class SocialSourceCadence(db.Model):
+    """Learned posting cadence of one monitored account."""
+    id = db.Column(db.Integer, primary_key=True)
+    platform = db.Column(db.String(20), nullable=False)
+    username = db.Column(db.String(100), nullable=False)  # Lowercased
+    tracked_since = db.Column(db.DateTime, default=datetime.utcnow)
+    mean_interval = db.Column(db.Float, nullable=True)  # Weighted mean seconds between posts
+    last_post_at = db.Column(db.DateTime, nullable=True)
+    posts = db.Column(db.Integer, default=0)
+    profile = db.Column(db.Text, nullable=True)  # JSON time-of-day weights
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('platform', 'username'),)
+
+class WebSubSubscription(db.Model):
+    """A YouTube channel feed subscription at the WebSub hub."""
+    id = db.Column(db.Integer, primary_key=True)
+    channel_id = db.Column(db.String(30), unique=True, nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    secret = db.Column(db.String(64), nullable=False)  # Signs pushed notifications
+    status = db.Column(db.String(20), default='pending')  # pending, verified, denied, unsubscribed
+    lease_seconds = db.Column(db.Integer, nullable=True)
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    last_notified_at = db.Column(db.DateTime, nullable=True)
+
+class WebSubNotification(db.Model):
+    """A pushed upload waiting for the bot to announce it."""
+    id = db.Column(db.Integer, primary_key=True)
+    channel_id = db.Column(db.String(30), nullable=False)
+    video_id = db.Column(db.String(20), unique=True, nullable=False)
+    title = db.Column(db.String(300), nullable=True)
+    author = db.Column(db.String(100), nullable=True)
+    published_at = db.Column(db.DateTime, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True, index=True)
 
 class BotLog(db.Model):
     """Bot activity and error logging."""
@@ -177,11 +329,51 @@ class CheckIn(db.Model):
     date = db.Column(db.Date, nullable=False)
     streak = db.Column(db.Integer, default=1)
     reward_amount = db.Column(db.Integer, default=0)
+    mood = db.Column(db.String(50), nullable=True)
     message = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     __table_args__ = (db.UniqueConstraint('guild_id', 'user_id', 'date'),)
 
+class CheckInCalendar(db.Model):
+    """One year of a member's check-ins as a bitset, bit i for day-of-year i + 1."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.String(20), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    days = db.Column(db.LargeBinary(46), nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('guild_id', 'user_id', 'year'),)
+
+class CheckInDailyStat(db.Model):
+    """Per-guild check-in counts for one day."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    checkins = db.Column(db.Integer, default=0)
+    streaks_continued = db.Column(db.Integer, default=0)  # Check-ins that extended yesterday's streak
+    rewards = db.Column(db.BigInteger, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('guild_id', 'date'),)
+
+class CheckInMemberStat(db.Model):
+    """Per-member check-in streak and total counters."""
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.String(20), nullable=False)
+    current_streak = db.Column(db.Integer, default=0)
+    longest_streak = db.Column(db.Integer, default=0)
+    total_checkins = db.Column(db.Integer, default=0)
+    total_rewards = db.Column(db.BigInteger, default=0)
+    first_check_in = db.Column(db.Date, nullable=True)
+    last_check_in = db.Column(db.Date, nullable=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('guild_id', 'user_id'),
+        db.Index('ix_checkin_member_stat_streak', 'guild_id', 'current_streak'),
+        db.Index('ix_checkin_member_stat_total', 'guild_id', 'total_checkins'),
+    )
+
 class TodoItem(db.Model):
     """Todo list system."""
     id = db.Column(db.Integer, primary_key=True)
@@ -8,12 +8,16 @@ from datetime import datetime, timedelta
 import config
 from models import User, GuildConfig, Command, Ticket, Application, CheckIn, ShopItem, SocialMonitor
 from utils import get_discord_user_info, verify_guild_access, create_embed_preview
+from services.economy_aggregates import EconomyAggregates
+from services.ticket_analytics import TicketAnalytics
 import logging
 
 logger = logging.getLogger(__name__)
 
 def setup_routes(app, db):
     """Setup all Flask routes"""
+    economy_aggregates = EconomyAggregates()
+    ticket_analytics = TicketAnalytics()
     
     @app.route('/')
     def index():
@@ -198,9 +202,11 @@ def setup_routes(app, db):
         if not ticket:
             return jsonify({'error': 'Ticket not found', 'success': False}), 404
         
+        was_closed = ticket.status == 'closed'
         ticket.status = data['status']
-        if data['status'] == 'closed':
+        if data['status'] == 'closed' and not was_closed:
             ticket.closed_at = datetime.utcnow()
+            ticket_analytics.record_closed(ticket)
         
         db.session.commit()
         
@@ -221,16 +227,9 @@ def setup_routes(app, db):
         guild = GuildConfig.query.filter_by(guild_id=guild_id).first()
         shop_items = ShopItem.query.filter_by(guild_id=guild_id).all()
         
-        # Get economy stats
-        total_currency = db.session.query(db.func.sum(User.currency)).scalar() or 0
-        total_transactions = db.session.query(db.func.count(CheckIn.id)).scalar() or 0
-        
-        stats = {
-            'total_currency': total_currency,
-            'total_transactions': total_transactions,
-            'total_items': len(shop_items),
-            'active_items': len([item for item in shop_items if item.enabled])
-        }
+        # Precomputed economy stats
+        stats = economy_aggregates.get_stats(guild_id)
+        stats['active_items'] = len([item for item in shop_items if item.enabled])
         
         return render_template('economy.html', 
                              guild=guild, 
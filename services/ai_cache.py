@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+def normalize(text):
+    """Collapse runs of whitespace so reindented or re-wrapped prompts share a key."""
+    return ' '.join(str(text).split()) if text else ''
+
+def cache_key(system, context, prompt, params):
+    """Stable key for one completion request."""
+    payload = json.dumps({
+        'system': normalize(system),
+        'context': normalize(context),
+        'prompt': normalize(prompt),
+        'params': params
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResponseCache:
+    """LRU cache of AI completions with a TTL and in-flight request coalescing.
+
+    Entries expire ``ttl`` seconds after they were fetched; the least recently
+    used one is evicted once ``max_entries`` is reached. Expiry is wall-clock
+    time, so entries written to ``path`` survive a restart. A request that
+    arrives while an identical one from the same scope is still upstream
+    waits for that call instead of making its own. Failed calls are never
+    cached.
+
+    Every lookup is counted against the helper that made it. A hit saves the
+    original call's latency, and a coalesced wait saves whatever part of it
+    had already elapsed.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, path=''):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> (expires_at, response, latency)
+        self.inflight = {}  # (key, scope) -> Future of (response, latency)
+        self.helpers = {}
+        self.evictions = 0
+
+    def _stats(self, helper):
+        if helper not in self.helpers:
+            self.helpers[helper] = {'calls': 0, 'hits': 0, 'coalesced': 0, 'misses': 0,
+                                    'upstream_seconds': 0.0, 'saved_seconds': 0.0}
+        return self.helpers[helper]
+
+    def get(self, key):
+        """The cached (response, latency) for a key, or None if missing or expired."""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        if entry[0] <= time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, key, response, latency):
+        self.entries[key] = (time.time() + self.ttl, response, latency)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def fetch(self, key, helper, call, scope=None):
+        """Return the response for ``key``, awaiting ``call()`` only if nobody else has or is.
+
+        Only requests with the same ``scope`` share an in-flight call, so each
+        guild's request is admitted and charged under its own budget. Finished
+        responses are shared by every scope.
+        """
+        stats = self._stats(helper)
+        stats['calls'] += 1
+
+        cached = self.get(key)
+        if cached:
+            stats['hits'] += 1
+            stats['saved_seconds'] += cached[1]
+            return cached[0]
+
+        flight = (key, scope)
+        if flight in self.inflight:
+            stats['coalesced'] += 1
+            waited_from = time.monotonic()
+            response, latency = await asyncio.shield(self.inflight[flight])
+            stats['saved_seconds'] += max(0.0, latency - (time.monotonic() - waited_from))
+            return response
+
+        stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[flight] = future
+        started = time.monotonic()
+        response = None
+        try:
+            response = await call()
+        finally:
+            latency = time.monotonic() - started
+            stats['upstream_seconds'] += latency
+            del self.inflight[flight]
+            if response is not None:
+                self.put(key, response, latency)
+            future.set_result((response, latency))
+        return response
+
+    def load(self):
+        """Read unexpired entries back from ``path``; a missing or corrupt file starts empty."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable AI cache {self.path}: {e}")
+            return 0
+
+        now = time.time()
+        for row in rows[-self.max_entries:]:
+            if row['expires_at'] > now:
+                self.entries[row['key']] = (row['expires_at'], row['response'], row['latency'])
+        logger.info(f"🌹 Loaded {len(self.entries)} cached AI responses")
+        return len(self.entries)
+
+    def save(self):
+        """Write unexpired entries to ``path``, least recently used first."""
+        if not self.path:
+            return
+        now = time.time()
+        rows = [
+            {'key': key, 'expires_at': expires_at, 'response': response, 'latency': latency}
+            for key, (expires_at, response, latency) in self.entries.items()
+            if expires_at > now
+        ]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        partial = self.path + '.tmp'
+        try:
+            with open(partial, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            os.replace(partial, self.path)
+        except OSError as e:
+            logger.error(f"Error saving AI cache to {self.path}: {e}")
+
+    def stats(self):
+        """Hit rate and saved latency per helper, plus cache occupancy."""
+        helpers = {}
+        for helper, counts in self.helpers.items():
+            served = counts['hits'] + counts['coalesced']
+            helpers[helper] = {
+                'calls': counts['calls'],
+                'hits': counts['hits'],
+                'coalesced': counts['coalesced'],
+                'misses': counts['misses'],
+                'hit_rate': round(served / counts['calls'], 3) if counts['calls'] else 0,
+                'avg_upstream_seconds': round(counts['upstream_seconds'] / counts['misses'], 3) if counts['misses'] else 0,
+                'saved_seconds': round(counts['saved_seconds'], 2)
+            }
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'inflight': len(self.inflight),
+            'evictions': self.evictions,
+            'helpers': helpers
+        }
+
+async def simulate(requests=400, prompts=40, concurrency=50, latency=0.2, seed=1):
+    """Replay a bursty mix of repeated prompts against a fake upstream."""
+    rng = random.Random(seed)
+    cache = ResponseCache(max_entries=prompts // 2, ttl=3600)
+    upstream = {'calls': 0}
+
+    async def complete(prompt):
+        upstream['calls'] += 1
+        await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+        return f"Response to {prompt}"
+
+    # A few prompts, like the welcome template for a busy guild, dominate
+    weights = [1 / (rank + 1) for rank in range(prompts)]
+    workload = rng.choices(range(prompts), weights=weights, k=requests)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        prompt = f"prompt {index}"
+        helper = 'generate_welcome_message' if index % 2 else 'generate_embed_content'
+        async with limit:
+            await cache.fetch(cache_key('system', None, prompt, {'max_tokens': 100}), helper,
+                              lambda: complete(prompt))
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(index) for index in workload))
+    return {
+        'requests': requests,
+        'upstream_calls': upstream['calls'],
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+        **cache.stats()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the AI response cache against a fake upstream")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--prompts', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(simulate(args.requests, args.prompts, args.concurrency,
+                                          args.latency, args.seed)), indent=2))
+
+if __name__ == "__main__":
+    main()
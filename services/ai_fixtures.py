@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import time
+from aiohttp import web
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPLY = ("Good evening, honoured guest 🌹 The candles of the manor burn low, yet thy question "
+         "is most welcome. Pray tell me more, and I shall guide thee through these halls.")
+
+class CompletionServer:
+    """Local stand-in for the OpenAI chat completions endpoint.
+
+    ``POST /chat/completions`` answers with ``REPLY``. With ``"stream": true``
+    the reply is sent as server-sent events, one word per chunk with
+    ``delay`` seconds between them after ``first_token_delay``. Otherwise a
+    single JSON body is sent after the same total time. Point the bot at it with
+    ``OPENAI_API_BASE=http://127.0.0.1:8767``.
+    """
+
+    def __init__(self, reply=REPLY, first_token_delay=0.4, delay=0.05):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.delay = delay
+        self.requests = 0
+        self.app = web.Application()
+        self.app.router.add_post('/chat/completions', self.completions)
+
+    def _chunk(self, delta, finish_reason=None):
+        return {
+            'id': 'chatcmpl-local',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': 'gpt-3.5-turbo',
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+
+    async def completions(self, request):
+        self.requests += 1
+        body = await request.json()
+        await asyncio.sleep(self.first_token_delay)
+
+        words = self.reply.split(' ')
+        if not body.get('stream'):
+            # A blocking reply still takes the whole generation time, it just arrives at once
+            await asyncio.sleep(self.delay * (len(words) - 1))
+            return web.json_response({
+                'id': 'chatcmpl-local',
+                'object': 'chat.completion',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': self.reply},
+                             'finish_reason': 'stop'}]
+            })
+
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        await response.write(f"data: {json.dumps(self._chunk({'role': 'assistant'}))}\n\n".encode())
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.delay)
+            text = word if not index else ' ' + word
+            await response.write(f"data: {json.dumps(self._chunk({'content': text}))}\n\n".encode())
+        await response.write(f"data: {json.dumps(self._chunk({}, 'stop'))}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def start(self, host='127.0.0.1', port=8767):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+class RecordingChannel:
+    """Just enough of a Discord channel to watch a renderer's edits."""
+
+    def __init__(self):
+        self.sent_at = None
+        self.edits = []  # (seconds after send, content)
+
+    async def send(self, content):
+        self.sent_at = time.monotonic()
+        return RecordingMessage(self, content)
+
+class RecordingMessage:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content):
+        self.content = content
+        self.channel.edits.append((round(time.monotonic() - self.channel.sent_at, 2), content))
+
+    async def delete(self):
+        self.content = None
+
+async def check(port=8767):
+    """Stream one reply into a recording channel and report latency and edit cadence."""
+    from services.ai_service import AIService
+
+    server = CompletionServer()
+    config.OPENAI_API_BASE = await server.start(port=port)
+    config.OPENAI_API_KEY = config.OPENAI_API_KEY or 'local'
+    config.AI_CACHE_PATH = ''
+    service = AIService()
+    channel = RecordingChannel()
+    try:
+        message = await service.stream_to_channel(channel, "Greet a guest arriving at midnight")
+        blocking_started = time.monotonic()
+        await service.generate_response("Greet a guest arriving at midnight (blocking)")
+        blocking = time.monotonic() - blocking_started
+    finally:
+        await service.cleanup()
+        await server.stop()
+
+    return {
+        'streamed': service.get_stream_stats(),
+        'blocking_seconds': round(blocking, 3),
+        'edit_times': [at for at, _ in channel.edits],
+        'complete': message.content == server.reply
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve streamed chat completions locally")
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--check', action='store_true', help="Stream a reply through the renderer and print timings")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(json.dumps(asyncio.run(check(args.port)), indent=2))
+        return
+
+    server = CompletionServer()
+    print(f"🌹 Serving chat completions on http://127.0.0.1:{args.port}")
+    web.run_app(server.app, host='127.0.0.1', port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lower goes first: moderation must never wait behind welcome messages
+PRIORITIES = {'moderation': 0, 'analysis': 1, 'support': 2, 'content': 3, 'fun': 4}
+
+# Classes that skip token budgets; only the free moderation endpoint belongs here
+BUDGET_EXEMPT = {'moderation'}
+
+# Priority class of each AIService helper; anything else counts as 'fun'
+HELPER_PRIORITY = {
+    'moderate_content': 'moderation',
+    # Quick classification, but through paid chat completions, so it stays on the budget
+    'analyze_sentiment': 'analysis',
+    'detect_language': 'analysis',
+    'generate_ticket_response': 'support',
+    'analyze_application': 'support',
+    'validate_api_key': 'support',
+    'generate_welcome_message': 'content',
+    'generate_embed_content': 'content',
+    'generate_social_post_summary': 'content',
+    'generate_server_insights': 'content',
+    'improve_message': 'content',
+    'suggest_custom_commands': 'content',
+}
+
+GLOBAL = 'global'  # Budget and queue for calls made outside any guild
+
+def estimate_tokens(data):
+    """Rough token cost of a chat request: about four characters a token plus the reply limit."""
+    chars = sum(len(message.get('content', '')) for message in data.get('messages', ()))
+    return chars // 4 + data.get('max_tokens', 0)
+
+class Ticket:
+    """One admitted request; hand it back to ``release`` when the call is done."""
+
+    __slots__ = ('guild', 'priority', 'reserved', 'day', 'future', 'enqueued_at')
+
+    def __init__(self, guild, priority, reserved, day):
+        self.guild = guild
+        self.priority = priority
+        self.reserved = reserved
+        self.day = day
+        self.future = None
+        self.enqueued_at = time.monotonic()
+
+class AIRequestScheduler:
+    """Admission control for OpenAI calls: a global concurrency cap with fair, prioritized queues.
+
+    At most ``concurrency`` calls are upstream at once. Callers beyond that wait
+    in a queue per priority class. Within a class each guild has its own FIFO,
+    and guilds take turns, so one busy guild delays only its own requests.
+    Moderation is served first, then quick analysis such as sentiment and
+    language checks, then support, content and fun.
+
+    Each guild has a daily token budget, reset at midnight UTC. The estimated
+    cost is reserved on admission and corrected to the reported usage on
+    release. A request is rejected, and ``acquire`` returns None, when its
+    guild's budget is spent, when the guild already has ``max_queued``
+    requests waiting or when it waits longer than ``queue_timeout``.
+    Only the moderation class is exempt from budgets. The moderation endpoint
+    is free, and safety checks must not stop mid-day. Every chat completion is
+    budgeted, whatever its class.
+    """
+
+    def __init__(self, concurrency=8, daily_tokens=50000, max_queued=20, queue_timeout=30):
+        self.concurrency = concurrency
+        self.daily_tokens = daily_tokens
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+
+        self.active = 0
+        self.queues = {priority: OrderedDict() for priority in PRIORITIES.values()}  # guild -> deque of Tickets
+        self.queued = {}  # guild -> waiting count
+        self.usage = {}  # guild -> tokens used on self.day
+        self.exhausted = set()  # Guilds already warned about today
+        self.day = self._today()
+
+        self.admitted = {name: 0 for name in PRIORITIES}
+        self.rejected = {'budget': 0, 'queue_full': 0, 'timeout': 0}
+        self.delays = {name: deque(maxlen=1000) for name in PRIORITIES}  # Seconds queued before admission
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).date()
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.usage = {}
+            self.exhausted = set()
+
+    def remaining(self, guild):
+        self._roll_day()
+        return max(0, self.daily_tokens - self.usage.get(guild, 0))
+
+    async def acquire(self, guild_id, priority='fun', tokens=0):
+        """Wait for a slot; returns a Ticket, or None if the request is rejected."""
+        guild = str(guild_id) if guild_id else GLOBAL
+        level = PRIORITIES.get(priority, PRIORITIES['fun'])
+        name = next(key for key, value in PRIORITIES.items() if value == level)
+        self._roll_day()
+
+        exempt = name in BUDGET_EXEMPT
+        if not exempt and self.usage.get(guild, 0) + tokens > self.daily_tokens:
+            self.rejected['budget'] += 1
+            if guild not in self.exhausted:
+                self.exhausted.add(guild)
+                logger.warning(f"🌹 Daily AI token budget spent for guild {guild}")
+            return None
+
+        ticket = Ticket(guild, name, 0 if exempt else tokens, self.day)
+        self.usage[guild] = self.usage.get(guild, 0) + ticket.reserved
+
+        if self.active < self.concurrency and not any(self.queues.values()):
+            self.active += 1
+            self.admitted[name] += 1
+            self.delays[name].append(0.0)
+            return ticket
+
+        if self.queued.get(guild, 0) >= self.max_queued:
+            self._refund(ticket)
+            self.rejected['queue_full'] += 1
+            return None
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self.queues[level].setdefault(guild, deque()).append(ticket)
+        self.queued[guild] = self.queued.get(guild, 0) + 1
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not ticket.future.done():
+                self._withdraw(level, ticket)
+                self._refund(ticket)
+                self.rejected['timeout'] += 1
+                return None
+        except asyncio.CancelledError:
+            if ticket.future.done():
+                self.release(ticket)  # Admitted just as the caller gave up
+            else:
+                self._withdraw(level, ticket)
+                self._refund(ticket)
+            raise
+        return ticket
+
+    def _withdraw(self, level, ticket):
+        waiting = self.queues[level].get(ticket.guild)
+        if waiting and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del self.queues[level][ticket.guild]
+            self.queued[ticket.guild] -= 1
+
+    def _refund(self, ticket):
+        if ticket.day == self.day:
+            self.usage[ticket.guild] = max(0, self.usage.get(ticket.guild, 0) - ticket.reserved)
+
+    def release(self, ticket, used=None):
+        """Free the ticket's slot and settle its reservation against the reported usage."""
+        if used is not None and ticket.reserved and ticket.day == self.day:
+            self.usage[ticket.guild] = max(0, self.usage.get(ticket.guild, 0) + used - ticket.reserved)
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to the highest priority class, one guild at a time."""
+        for level in sorted(self.queues):
+            queue = self.queues[level]
+            while queue and self.active < self.concurrency:
+                guild, waiting = queue.popitem(last=False)
+                ticket = waiting.popleft()
+                self.queued[guild] -= 1
+                if waiting:
+                    queue[guild] = waiting  # Back of the rotation
+                if ticket.future.done():
+                    continue
+                self.active += 1
+                self.admitted[ticket.priority] += 1
+                self.delays[ticket.priority].append(time.monotonic() - ticket.enqueued_at)
+                ticket.future.set_result(True)
+            if self.active >= self.concurrency:
+                return
+
+    def stats(self):
+        """Concurrency, queueing delay per priority, rejections and the heaviest budgets."""
+        def percentiles(samples):
+            samples = sorted(samples)
+            if not samples:
+                return {}
+            return {
+                'p50': round(samples[len(samples) // 2], 3),
+                'p90': round(samples[min(int(len(samples) * 0.9), len(samples) - 1)], 3),
+                'max': round(samples[-1], 3)
+            }
+
+        self._roll_day()
+        heaviest = sorted(self.usage.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            'active': self.active,
+            'concurrency': self.concurrency,
+            'queued': sum(self.queued.values()),
+            'admitted': dict(self.admitted),
+            'rejected': dict(self.rejected),
+            'queue_delay_seconds': {name: percentiles(samples) for name, samples in self.delays.items()},
+            'daily_tokens': self.daily_tokens,
+            'tokens_used': {guild: used for guild, used in heaviest}
+        }
+
+async def simulate(seconds=20, concurrency=4, latency=0.5, seed=1):
+    """One noisy guild floods fun requests while quieter guilds moderate and ask for help."""
+    rng = random.Random(seed)
+    scheduler = AIRequestScheduler(concurrency=concurrency, daily_tokens=20000, max_queued=20, queue_timeout=10)
+    scale = 0.1  # Run the simulated clock ten times faster
+    outcomes = {}
+
+    async def request(guild, priority):
+        ticket = await scheduler.acquire(guild, priority, tokens=300)
+        outcome = outcomes.setdefault(f"{guild}/{priority}", {'served': 0, 'rejected': 0})
+        if not ticket:
+            outcome['rejected'] += 1
+            return
+        try:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5) * scale)
+        finally:
+            scheduler.release(ticket, used=rng.randint(150, 300))
+        outcome['served'] += 1
+
+    # Requests per simulated second: the busy guild alone exceeds what the cap can serve
+    traffic = [('busy', 'fun', 12), ('quiet', 'support', 1), ('quiet', 'moderation', 2), ('small', 'content', 1)]
+    tasks = []
+    for _ in range(seconds):
+        for guild, priority, rate in traffic:
+            for _ in range(rate):
+                tasks.append(asyncio.create_task(request(guild, priority)))
+        await asyncio.sleep(scale)
+    await asyncio.gather(*tasks)
+    return {'outcomes': outcomes, **scheduler.stats()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate AI request scheduling under a noisy guild")
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(simulate(args.seconds, args.concurrency, args.latency, args.seed)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import asyncio
 import aiohttp
 import json
+import time
 from datetime import datetime
 import config
+from services.ai_cache import ResponseCache, cache_key
+from services.ai_stream import StreamRenderer, StreamStats, iter_sse, completion_deltas
+from services.ai_scheduler import AIRequestScheduler, HELPER_PRIORITY, estimate_tokens
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,60 +22,181 @@ class AIService:
             'vocabulary': 'sophisticated',
             'theme': 'romantic_gothic'
         }
+        
+        # Helpers repeat near-identical prompts; identical requests share one upstream call
+        self.cache = ResponseCache(config.AI_CACHE_SIZE, config.AI_CACHE_TTL, config.AI_CACHE_PATH)
+        self.cache.load()
+        
+        # Streamed replies edit one Discord message as the text arrives
+        self.renderer = StreamRenderer(config.AI_STREAM_EDIT_INTERVAL)
+        self.stream_stats = StreamStats()
+        
+        # Caps concurrent OpenAI calls, queues them fairly per guild and enforces daily budgets
+        self.scheduler = AIRequestScheduler(
+            config.AI_MAX_CONCURRENCY,
+            config.AI_GUILD_DAILY_TOKENS,
+            config.AI_MAX_QUEUED_PER_GUILD,
+            config.AI_QUEUE_TIMEOUT
+        )
     
     async def get_session(self):
         """Get or create aiohttp session"""
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            # Never more connections than the scheduler lets calls run at once
+            connector = aiohttp.TCPConnector(limit=config.AI_MAX_CONCURRENCY, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60))
         return self.session
     
-    async def generate_response(self, prompt, context=None, max_tokens=150):
-        """Generate AI response using OpenAI API"""
+    def _build_request(self, prompt, context, max_tokens):
+        """Chat completion payload and its cache key"""
+        # Build system message with Gothic Victorian personality
+        system_message = self._build_system_message()
+        
+        messages = [
+            {"role": "system", "content": system_message}
+        ]
+        
+        if context:
+            messages.append({"role": "user", "content": f"Context: {context}"})
+        
+        messages.append({"role": "user", "content": prompt})
+        
+        data = {
+            'model': 'gpt-3.5-turbo',
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': 0.8,
+            'presence_penalty': 0.1,
+            'frequency_penalty': 0.1
+        }
+        
+        params = {key: value for key, value in data.items() if key != 'messages'}
+        return data, cache_key(system_message, context, prompt, params)
+    
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {config.OPENAI_API_KEY}',
+            'Content-Type': 'application/json'
+        }
+    
+    async def generate_response(self, prompt, context=None, max_tokens=150, helper='generate_response', cache=True,
+                                guild_id=None):
+        """Generate AI response using OpenAI API, served from the cache when possible"""
         if not config.OPENAI_API_KEY:
             return None
         
         try:
-            session = await self.get_session()
-            
-            # Build system message with Gothic Victorian personality
-            system_message = self._build_system_message()
-            
-            messages = [
-                {"role": "system", "content": system_message}
-            ]
-            
-            if context:
-                messages.append({"role": "user", "content": f"Context: {context}"})
+            data, key = self._build_request(prompt, context, max_tokens)
+            priority = HELPER_PRIORITY.get(helper, 'fun')
             
-            messages.append({"role": "user", "content": prompt})
+            if not cache:
+                return await self._complete(data, guild_id, priority)
             
-            url = "https://api.openai.com/v1/chat/completions"
-            headers = {
-                'Authorization': f'Bearer {config.OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            }
+            # Coalesce per guild so each caller is admitted and charged against its own budget
+            return await self.cache.fetch(
+                key, helper, lambda: self._complete(data, guild_id, priority), scope=guild_id
+            )
+                    
+        except Exception as e:
+            logger.error(f"Error generating AI response: {e}")
+            return None
+    
+    async def _complete(self, data, guild_id=None, priority='fun'):
+        """Send one chat completion request once the scheduler admits it; returns the text or None"""
+        ticket = await self.scheduler.acquire(guild_id, priority, estimate_tokens(data))
+        if not ticket:
+            return None
+        
+        used = None
+        try:
+            session = await self.get_session()
             
-            data = {
-                'model': 'gpt-3.5-turbo',
-                'messages': messages,
-                'max_tokens': max_tokens,
-                'temperature': 0.8,
-                'presence_penalty': 0.1,
-                'frequency_penalty': 0.1
-            }
+            url = f"{config.OPENAI_API_BASE}/chat/completions"
             
-            async with session.post(url, headers=headers, json=data) as response:
+            async with session.post(url, headers=self._headers(), json=data) as response:
                 if response.status == 200:
                     result = await response.json()
+                    used = result.get('usage', {}).get('total_tokens')
                     return result['choices'][0]['message']['content'].strip()
                 else:
                     error_text = await response.text()
                     logger.error(f"OpenAI API error {response.status}: {error_text}")
+                    used = 0
                     return None
+        finally:
+            self.scheduler.release(ticket, used)
+    
+    async def stream_response(self, prompt, context=None, max_tokens=150, guild_id=None, priority='fun'):
+        """Yield the response text piece by piece as the API streams it"""
+        if not config.OPENAI_API_KEY:
+            return
+        
+        data, key = self._build_request(prompt, context, max_tokens)
+        cached = self.cache.get(key)
+        if cached:
+            yield cached[0]
+            return
+        
+        ticket = await self.scheduler.acquire(guild_id, priority, estimate_tokens(data))
+        if not ticket:
+            return
+        
+        started = time.monotonic()
+        first_token = None
+        parts = []
+        try:
+            session = await self.get_session()
+            url = f"{config.OPENAI_API_BASE}/chat/completions"
+            
+            async with session.post(url, headers=self._headers(), json={**data, 'stream': True}) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"OpenAI API error {response.status}: {error_text}")
+                    self.stream_stats.failures += 1
+                    return
+                
+                async for payload in iter_sse(response.content):
+                    text = completion_deltas(payload)
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    parts.append(text)
+                    yield text
                     
         except Exception as e:
-            logger.error(f"Error generating AI response: {e}")
-            return None
+            logger.error(f"Error streaming AI response: {e}")
+            self.stream_stats.failures += 1
+            return
+        finally:
+            # Streams report no usage, so settle on the prompt estimate plus the text received
+            self.scheduler.release(ticket, estimate_tokens({'messages': data['messages']}) + len(''.join(parts)) // 4)
+        
+        total = time.monotonic() - started
+        self.stream_stats.record(first_token, total)
+        response_text = ''.join(parts).strip()
+        if response_text:
+            self.cache.put(key, response_text, total)
+    
+    async def stream_to_channel(self, channel, prompt, context=None, max_tokens=150, fallback=None):
+        """Answer in ``channel`` with a message that fills in as the response streams; returns the message"""
+        guild = getattr(channel, 'guild', None)
+        message, _ = await self.renderer.render(
+            channel, self.stream_response(prompt, context, max_tokens, guild.id if guild else None), fallback=fallback
+        )
+        return message
+    
+    def get_stream_stats(self):
+        """Time-to-first-token and total latency of streamed responses"""
+        return {**self.stream_stats.stats(), 'edits': self.renderer.edits}
+    
+    def get_cache_stats(self):
+        """Per-helper hit rates and saved latency of the response cache"""
+        return self.cache.stats()
+    
+    def get_scheduler_stats(self):
+        """Concurrency, queueing delay and rejected requests of the AI request scheduler"""
+        return self.scheduler.stats()
     
     def _build_system_message(self):
         """Build system message for AI personality"""
@@ -87,23 +212,23 @@ class AIService:
         
         Always respond as if you are the guardian spirit of a beautiful Gothic manor, welcoming guests with Victorian grace."""
     
-    async def moderate_content(self, text):
+    async def moderate_content(self, text, guild_id=None):
         """AI-powered content moderation"""
         if not config.OPENAI_API_KEY:
             return {'safe': True, 'categories': [], 'confidence': 0}
         
+        ticket = await self.scheduler.acquire(guild_id, 'moderation')
+        if not ticket:
+            return {'safe': True, 'categories': [], 'confidence': 0}
+        
         try:
             session = await self.get_session()
             
-            url = "https://api.openai.com/v1/moderations"
-            headers = {
-                'Authorization': f'Bearer {config.OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            }
+            url = f"{config.OPENAI_API_BASE}/moderations"
             
             data = {'input': text}
             
-            async with session.post(url, headers=headers, json=data) as response:
+            async with session.post(url, headers=self._headers(), json=data) as response:
                 if response.status == 200:
                     result = await response.json()
                     moderation = result['results'][0]
@@ -125,12 +250,14 @@ class AIService:
         except Exception as e:
             logger.error(f"Error in content moderation: {e}")
             return {'safe': True, 'categories': [], 'confidence': 0}
+        finally:
+            self.scheduler.release(ticket)
     
-    async def analyze_sentiment(self, text):
+    async def analyze_sentiment(self, text, guild_id=None):
         """Analyze sentiment of text"""
         prompt = f"Analyze the sentiment of this message and respond with just one word: positive, negative, or neutral.\n\nMessage: {text}"
         
-        response = await self.generate_response(prompt, max_tokens=10)
+        response = await self.generate_response(prompt, max_tokens=10, helper='analyze_sentiment', guild_id=guild_id)
         
         if response:
             sentiment = response.lower().strip()
@@ -139,11 +266,11 @@ class AIService:
         
         return 'neutral'
     
-    async def generate_welcome_message(self, username, guild_name):
+    async def generate_welcome_message(self, username, guild_name, guild_id=None):
         """Generate personalized welcome message"""
         prompt = f"Generate a Gothic Victorian welcome message for a new member named {username} joining the Discord server '{guild_name}'. Keep it elegant and welcoming."
         
-        response = await self.generate_response(prompt, max_tokens=100)
+        response = await self.generate_response(prompt, max_tokens=100, helper='generate_welcome_message', guild_id=guild_id)
         
         if response:
             return response
@@ -151,7 +278,7 @@ class AIService:
         # Fallback message
         return f"Welcome to our Gothic manor, {username}! May thy journey here be filled with Victorian elegance and Gothic wonder. 🌹"
     
-    async def generate_embed_content(self, topic, style='informative'):
+    async def generate_embed_content(self, topic, style='informative', guild_id=None):
         """Generate content for Discord embeds"""
         style_prompts = {
             'informative': f"Create informative content about {topic} in Gothic Victorian style",
@@ -162,38 +289,38 @@ class AIService:
         
         prompt = style_prompts.get(style, style_prompts['informative'])
         
-        response = await self.generate_response(prompt, max_tokens=200)
+        response = await self.generate_response(prompt, max_tokens=200, helper='generate_embed_content', guild_id=guild_id)
         
         return response or f"Content about {topic} - generated with Gothic elegance."
     
-    async def suggest_custom_commands(self, guild_activity):
+    async def suggest_custom_commands(self, guild_activity, guild_id=None):
         """Suggest custom commands based on guild activity"""
         prompt = f"Based on this Discord server activity: {guild_activity}, suggest 3 useful custom commands for a Gothic Victorian themed bot. Be creative and helpful."
         
-        response = await self.generate_response(prompt, max_tokens=150)
+        response = await self.generate_response(prompt, max_tokens=150, helper='suggest_custom_commands', guild_id=guild_id)
         
         if response:
             return response
         
         return "Consider adding commands for Gothic quotes, manor rules, or elegant announcements."
     
-    async def generate_ticket_response(self, ticket_content):
+    async def generate_ticket_response(self, ticket_content, guild_id=None):
         """Generate helpful response for ticket content"""
         prompt = f"A user has created a support ticket with this content: '{ticket_content}'. Generate a helpful, empathetic first response from a Gothic Victorian bot."
         
-        response = await self.generate_response(prompt, max_tokens=120)
+        response = await self.generate_response(prompt, max_tokens=120, helper='generate_ticket_response', guild_id=guild_id)
         
         return response or "Thank thee for thy request. Our Gothic staff shall assist thee shortly with Victorian grace."
     
-    async def analyze_application(self, application_data):
+    async def analyze_application(self, application_data, guild_id=None):
         """Analyze application responses and provide insights"""
         prompt = f"Analyze this job application data and provide a brief assessment: {application_data}. Focus on helpfulness and professionalism."
         
-        response = await self.generate_response(prompt, max_tokens=100)
+        response = await self.generate_response(prompt, max_tokens=100, helper='analyze_application', guild_id=guild_id)
         
         return response or "Application shows potential and dedication to our Gothic community."
     
-    async def generate_social_post_summary(self, posts):
+    async def generate_social_post_summary(self, posts, guild_id=None):
         """Generate summary of social media posts"""
         if not posts:
             return "No recent social media activity to summarize."
@@ -201,11 +328,11 @@ class AIService:
         post_text = " | ".join([post.get('content', post.get('title', ''))[:50] for post in posts])
         prompt = f"Summarize these recent social media posts in Gothic Victorian style: {post_text}"
         
-        response = await self.generate_response(prompt, max_tokens=80)
+        response = await self.generate_response(prompt, max_tokens=80, helper='generate_social_post_summary', guild_id=guild_id)
         
         return response or "Recent social media activity has graced our digital presence."
     
-    async def improve_message(self, original_message, improvement_type='clarity'):
+    async def improve_message(self, original_message, improvement_type='clarity', guild_id=None):
         """Improve a message for clarity, style, or tone"""
         improvement_prompts = {
             'clarity': f"Improve this message for clarity while maintaining Gothic Victorian style: {original_message}",
@@ -216,34 +343,34 @@ class AIService:
         
         prompt = improvement_prompts.get(improvement_type, improvement_prompts['clarity'])
         
-        response = await self.generate_response(prompt, max_tokens=150)
+        response = await self.generate_response(prompt, max_tokens=150, helper='improve_message', guild_id=guild_id)
         
         return response or original_message
     
-    async def detect_language(self, text):
+    async def detect_language(self, text, guild_id=None):
         """Detect language of text"""
         prompt = f"What language is this text written in? Respond with just the language name.\n\nText: {text[:100]}"
         
-        response = await self.generate_response(prompt, max_tokens=10)
+        response = await self.generate_response(prompt, max_tokens=10, helper='detect_language', guild_id=guild_id)
         
         if response:
             return response.strip().lower()
         
         return 'english'
     
-    async def generate_server_insights(self, server_stats):
+    async def generate_server_insights(self, server_stats, guild_id=None):
         """Generate insights about server activity"""
         prompt = f"Analyze these Discord server statistics and provide helpful insights: {server_stats}. Focus on community growth and engagement."
         
-        response = await self.generate_response(prompt, max_tokens=120)
+        response = await self.generate_response(prompt, max_tokens=120, helper='generate_server_insights', guild_id=guild_id)
         
         return response or "Thy Gothic community shows signs of healthy growth and engagement."
     
-    async def create_personalized_content(self, user_preferences, content_type):
+    async def create_personalized_content(self, user_preferences, content_type, guild_id=None):
         """Create personalized content based on user preferences"""
         prompt = f"Create {content_type} content for a user with these preferences: {user_preferences}. Use Gothic Victorian style."
         
-        response = await self.generate_response(prompt, max_tokens=100)
+        response = await self.generate_response(prompt, max_tokens=100, helper='create_personalized_content', guild_id=guild_id)
         
         return response or f"Personalized {content_type} created with Gothic elegance."
     
@@ -254,7 +381,7 @@ class AIService:
         
         try:
             # Test with a simple request
-            test_response = await self.generate_response("Hello", max_tokens=5)
+            test_response = await self.generate_response("Hello", max_tokens=5, helper='validate_api_key', cache=False)
             return test_response is not None
         except Exception as e:
             logger.error(f"Error validating OpenAI API key: {e}")
@@ -262,5 +389,6 @@ class AIService:
     
     async def cleanup(self):
         """Cleanup resources"""
+        self.cache.save()
         if self.session:
             await self.session.close()
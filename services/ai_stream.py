@@ -0,0 +1,120 @@
+import json
+import time
+from collections import deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+DISCORD_LIMIT = 2000  # Characters per message
+PLACEHOLDER = "🕯️ *The manor spirit gathers its thoughts...*"
+
+async def iter_sse(content):
+    """Data payloads of a server-sent-event stream, ending at ``[DONE]``.
+
+    ``content`` is an aiohttp ``StreamReader``; multi-line ``data:`` fields
+    are joined, and comments and other fields are skipped.
+    """
+    data = []
+    async for raw in content:
+        line = raw.decode('utf-8').rstrip('\r\n')
+        if not line:
+            if data:
+                payload = '\n'.join(data)
+                data = []
+                if payload == '[DONE]':
+                    return
+                yield payload
+            continue
+        if line.startswith('data:'):
+            data.append(line[5:].lstrip(' '))
+    if data and '\n'.join(data) != '[DONE]':
+        yield '\n'.join(data)
+
+def completion_deltas(payload):
+    """The text carried by one streamed chat completion chunk."""
+    try:
+        chunk = json.loads(payload)
+    except ValueError:
+        return ''
+    choices = chunk.get('choices') or []
+    if not choices:
+        return ''
+    return choices[0].get('delta', {}).get('content') or ''
+
+class StreamStats:
+    """Time-to-first-token and total latency of recent streamed completions."""
+
+    def __init__(self, window=500):
+        self.first_token = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self.streams = 0
+        self.failures = 0
+
+    def record(self, first_token, total):
+        self.streams += 1
+        if first_token is not None:
+            self.first_token.append(first_token)
+        self.total.append(total)
+
+    @staticmethod
+    def _percentiles(samples):
+        samples = sorted(samples)
+        if not samples:
+            return {}
+        return {
+            'p50': round(samples[len(samples) // 2], 3),
+            'p90': round(samples[min(int(len(samples) * 0.9), len(samples) - 1)], 3),
+            'max': round(samples[-1], 3)
+        }
+
+    def stats(self):
+        return {
+            'streams': self.streams,
+            'failures': self.failures,
+            'first_token_seconds': self._percentiles(self.first_token),
+            'total_seconds': self._percentiles(self.total)
+        }
+
+class StreamRenderer:
+    """Shows a streamed response in Discord by editing one message as text arrives.
+
+    A placeholder goes out straight away. Discord allows about five edits to
+    a message per five seconds, so the text is flushed at most once every
+    ``interval`` seconds. Whatever is left is flushed once the stream ends.
+    Text beyond the 2000-character limit is cut off with an ellipsis.
+    """
+
+    def __init__(self, interval=1.2, placeholder=PLACEHOLDER):
+        self.interval = interval
+        self.placeholder = placeholder
+        self.edits = 0
+
+    @staticmethod
+    def _fit(text):
+        if len(text) <= DISCORD_LIMIT:
+            return text
+        return text[:DISCORD_LIMIT - 1] + '…'
+
+    async def render(self, channel, tokens, fallback=None):
+        """Post to ``channel`` and fill it from the ``tokens`` async generator; returns (message, text)."""
+        message = await channel.send(self.placeholder)
+        text = ''
+        shown = ''
+        last_edit = time.monotonic()
+
+        async for token in tokens:
+            text += token
+            if text.strip() and time.monotonic() - last_edit >= self.interval:
+                shown = self._fit(text)
+                await message.edit(content=shown)
+                self.edits += 1
+                last_edit = time.monotonic()
+
+        final = self._fit(text) if text.strip() else fallback
+        if final and final != shown:
+            await message.edit(content=final)
+            self.edits += 1
+        elif not final:
+            await message.delete()
+            message = None
+        return message, text
@@ -0,0 +1,160 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime
+import discord
+from sqlalchemy import select, update, insert, bindparam, func, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from main import db
+from models import Member, LevelThreshold
+from services import economy_rules as rules
+from services import level_curve
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ChatXPEngine:
+    """Per-message XP with in-memory cooldowns and batched database flushes.
+
+    ``handle_message`` never touches the database on the hot path once a
+    member's XP is cached: cooldowns, XP deltas and level-up detection all run
+    against in-memory state, and announcements are sent immediately. ``flush``
+    drains the pending deltas into one executemany UPDATE (inserting any
+    members that have no row yet) and refreshes the cache from the stored XP so
+    check-in rewards and other writers are picked up.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.cooldown = rules.CHAT_XP_COOLDOWN_SECONDS
+        self.xp_range = rules.CHAT_XP_RANGE
+
+        self.last_award = {}  # (guild_id, user_id) -> monotonic time of last award
+        self.cached_xp = OrderedDict()  # (guild_id, user_id) -> best known total XP, least recent first
+        self.max_cached = 50000
+        self.pending = {}  # (guild_id, user_id) -> {'xp': delta, 'username': name}
+
+    def _load_xp(self, key):
+        """Read a member's stored XP the first time they are seen."""
+        with self.bot.app_context:
+            xp = db.session.query(Member.xp).filter_by(guild_id=key[0], user_id=key[1]).scalar()
+        return xp or 0
+
+    async def handle_message(self, message):
+        """Award XP for a message if the member is off cooldown."""
+        if not message.guild or message.author.bot:
+            return
+
+        key = (str(message.guild.id), str(message.author.id))
+        now = time.monotonic()
+        if now - self.last_award.get(key, float('-inf')) < self.cooldown:
+            return
+        self.last_award[key] = now
+
+        gain = random.randint(*self.xp_range)
+        if key in self.cached_xp:
+            old_xp = self.cached_xp[key]
+        else:
+            # Evicted members may still have unflushed XP on top of what is stored
+            old_xp = self._load_xp(key) + self.pending.get(key, {}).get('xp', 0)
+        new_xp = old_xp + gain
+        self._remember(key, new_xp)
+
+        entry = self.pending.setdefault(key, {'xp': 0, 'username': message.author.display_name or message.author.name})
+        entry['xp'] += gain
+
+        old_level, new_level = level_curve.curve.advance(old_xp, new_xp)
+        if new_level > old_level:
+            # Announce straight away; the flush persists the level later
+            asyncio.create_task(self.announce_level_up(message, new_level))
+
+    def _remember(self, key, xp):
+        """Cache a member's XP, evicting the least recently active members past ``max_cached``."""
+        self.cached_xp[key] = xp
+        self.cached_xp.move_to_end(key)
+        while len(self.cached_xp) > self.max_cached:
+            # An evicted member is simply reloaded from the database next time they chat
+            self.cached_xp.popitem(last=False)
+
+    async def announce_level_up(self, message, level):
+        """Congratulate a member in the channel they levelled up in."""
+        embed = discord.Embed(
+            title="🌟 Level Up!",
+            description=f"{message.author.mention} has reached **level {level}**!",
+            color=0x711417
+        )
+        embed.set_footer(text="The manor takes note of thy voice 🌹")
+
+        try:
+            await message.channel.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException) as e:
+            logger.warning(f"Could not announce level up in {message.channel.id}: {e}")
+
+    def flush(self):
+        """Write all pending XP deltas in one batch; returns the members flushed."""
+        if not self.pending:
+            return 0
+
+        batch, self.pending = self.pending, {}
+        # Core table, not the entity: an ORM update() with parameter sets is a bulk update by primary key
+        members = Member.__table__
+        level = func.coalesce(
+            select(func.max(LevelThreshold.level))
+            .where(LevelThreshold.min_xp <= func.coalesce(members.c.xp, 0) + bindparam('delta'))
+            .scalar_subquery(),
+            1
+        )
+
+        with self.bot.app_context:
+            try:
+                now = datetime.utcnow()
+                db.session.execute(
+                    update(members)
+                    .where(members.c.guild_id == bindparam('g'), members.c.user_id == bindparam('u'))
+                    .values(xp=func.coalesce(members.c.xp, 0) + bindparam('delta'), level=level, last_active=now),
+                    [{'g': key[0], 'u': key[1], 'delta': entry['xp']} for key, entry in batch.items()]
+                )
+
+                stored = {
+                    (guild_id, user_id): xp or 0
+                    for guild_id, user_id, xp in db.session.query(Member.guild_id, Member.user_id, Member.xp)
+                    .filter(tuple_(Member.guild_id, Member.user_id).in_(list(batch)))
+                }
+
+                missing = [key for key in batch if key not in stored]
+                if missing:
+                    db.session.execute(insert(Member), [{
+                        'guild_id': key[0],
+                        'user_id': key[1],
+                        'username': batch[key]['username'],
+                        'xp': batch[key]['xp'],
+                        'level': level_curve.level_for_xp(batch[key]['xp']),
+                        'last_active': now
+                    } for key in missing])
+                    stored.update({key: batch[key]['xp'] for key in missing})
+
+                db.session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error flushing chat XP: {e}")
+                db.session.rollback()
+                # Put the deltas back so the next flush retries them
+                for key, entry in batch.items():
+                    merged = self.pending.setdefault(key, {'xp': 0, 'username': entry['username']})
+                    merged['xp'] += entry['xp']
+                return 0
+
+        # Resync with the database, keeping XP earned since the batch was taken
+        for key, xp in stored.items():
+            if key in self.cached_xp:
+                self.cached_xp[key] = xp + self.pending.get(key, {}).get('xp', 0)
+
+        self._prune_cooldowns()
+        return len(batch)
+
+    def _prune_cooldowns(self):
+        """Forget cooldowns that have already expired."""
+        cutoff = time.monotonic() - self.cooldown
+        expired = [key for key, awarded in self.last_award.items() if awarded < cutoff]
+        for key in expired:
+            del self.last_award[key]
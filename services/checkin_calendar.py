@@ -0,0 +1,154 @@
+import calendar
+from datetime import date, timedelta
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from main import db
+from models import CheckIn, CheckInCalendar
+import logging
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_BYTES = 46  # 366 bits, one per day of a leap year
+
+def day_index(day):
+    """Bit position of a date within its year's calendar."""
+    return day.timetuple().tm_yday - 1
+
+def to_bits(data):
+    """Decode a stored calendar into an int with bit ``i`` set for day ``i``."""
+    return int.from_bytes(data or b'', 'little')
+
+def to_bytes(bits):
+    """Encode a calendar int for storage."""
+    return bits.to_bytes(CALENDAR_BYTES, 'little')
+
+def days_in_year(year):
+    return 366 if calendar.isleap(year) else 365
+
+def longest_run(bits):
+    """Length of the longest run of set bits, in O(longest run) big-int steps."""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+def current_run(bits, end):
+    """Length of the run of set bits ending at bit ``end``."""
+    # The highest unset bit at or below ``end`` is the last missed day
+    window = bits & ((1 << (end + 1)) - 1)
+    gaps = ~window & ((1 << (end + 1)) - 1)
+    if not gaps:
+        return end + 1
+    return end - (gaps.bit_length() - 1)
+
+def month_bits(bits, year, month):
+    """The slice of a year's calendar covering one month, day 1 at bit 0."""
+    start = day_index(date(year, month, 1))
+    return (bits >> start) & ((1 << calendar.monthrange(year, month)[1]) - 1)
+
+class CheckInCalendarService:
+    """Per-member check-in calendars stored as one bitset per year.
+
+    A year of history is a single 46-byte row, so totals, longest streaks and
+    monthly heatmaps are popcounts and shifts on a Python int rather than
+    reads over hundreds of ``CheckIn`` rows. ``mark`` runs inside the check-in
+    transaction; the unique ``CheckIn`` row per day means no two writers ever
+    flip bits on the same calendar at once.
+    """
+
+    def mark(self, guild_id, user_id, day):
+        """Set a day's bit; runs inside the caller's transaction."""
+        keys = {'guild_id': str(guild_id), 'user_id': str(user_id), 'year': day.year}
+        row = CheckInCalendar.query.filter_by(**keys).first()
+
+        if row:
+            row.days = to_bytes(to_bits(row.days) | (1 << day_index(day)))
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(CheckInCalendar(days=to_bytes(1 << day_index(day)), **keys))
+        except IntegrityError:
+            row = CheckInCalendar.query.filter_by(**keys).first()
+            row.days = to_bytes(to_bits(row.days) | (1 << day_index(day)))
+
+    def get_years(self, guild_id, user_id):
+        """Map each year with check-ins to its calendar bits."""
+        rows = CheckInCalendar.query.filter_by(guild_id=str(guild_id), user_id=str(user_id)).all()
+        return {row.year: to_bits(row.days) for row in rows}
+
+    def summary(self, guild_id, user_id, year=None, today=None):
+        """Totals, streaks and a monthly heatmap for one member."""
+        today = today or date.today()
+        year = year or today.year
+        years = self.get_years(guild_id, user_id)
+
+        # Lay every year end to end so runs spanning New Year are counted once
+        history = 0
+        offset = 0
+        for y in range(min(years, default=today.year), today.year + 1):
+            history |= years.get(y, 0) << offset
+            offset += days_in_year(y)
+
+        bits = years.get(year, 0)
+        today_offset = offset - days_in_year(today.year) + day_index(today)
+        streak = current_run(history, today_offset)
+        if not streak:
+            # Not checked in yet today; yesterday's run is still alive
+            streak = current_run(history, today_offset - 1) if today_offset else 0
+
+        return {
+            'year': year,
+            'total_days': sum(b.bit_count() for b in years.values()),
+            'year_days': bits.bit_count(),
+            'longest_streak': longest_run(history),
+            'current_streak': streak,
+            'monthly': [month_bits(bits, year, month).bit_count() for month in range(1, 13)],
+            'days': [day for day in range(days_in_year(year)) if bits >> day & 1]  # Zero-based day of year
+        }
+
+    def days_between(self, guild_id, user_id, start, end):
+        """Set of dates checked in between two dates inclusive."""
+        years = self.get_years(guild_id, user_id)
+        checked = set()
+        day = start
+        while day <= end:
+            if years.get(day.year, 0) >> day_index(day) & 1:
+                checked.add(day)
+            day += timedelta(days=1)
+        return checked
+
+    def migrate(self, batch_size=10_000):
+        """Build calendars from existing check-in rows and commit."""
+        try:
+            db.session.execute(delete(CheckInCalendar))
+
+            calendars = {}
+            rows = (db.session.query(CheckIn.guild_id, CheckIn.user_id, CheckIn.date)
+                    .execution_options(yield_per=batch_size))
+            for guild_id, user_id, day in rows:
+                key = (guild_id, user_id, day.year)
+                calendars[key] = calendars.get(key, 0) | (1 << day_index(day))
+
+            items = list(calendars.items())
+            for start in range(0, len(items), batch_size):
+                db.session.execute(insert(CheckInCalendar), [
+                    {'guild_id': guild_id, 'user_id': user_id, 'year': year, 'days': to_bytes(bits)}
+                    for (guild_id, user_id, year), bits in items[start:start + batch_size]
+                ])
+
+            db.session.commit()
+            logger.info(f"🌹 Built {len(items)} check-in calendars")
+            return len(items)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error building check-in calendars: {e}")
+            db.session.rollback()
+            return 0
+
+if __name__ == "__main__":
+    import config
+    from main import create_db_app
+
+    with create_db_app(config.DATABASE_URL).app_context():
+        CheckInCalendarService().migrate()
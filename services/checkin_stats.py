@@ -0,0 +1,196 @@
+from datetime import date, timedelta
+from sqlalchemy import select, update, delete, insert, func, case
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import aliased
+from main import db
+from models import CheckIn, CheckInDailyStat, CheckInMemberStat
+from services.checkin_calendar import CheckInCalendarService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CheckInStats:
+    """Check-in rollups maintained at check-in time.
+
+    ``record`` runs inside the check-in transaction and bumps one per-guild
+    daily row and one per-member counter row, so leaderboards, streaks and
+    server stats are indexed reads instead of scans over ``CheckIn``. A member's
+    streak is active if they checked in today or yesterday, which makes the
+    active streak count ``today + yesterday - continued today``. The member's
+    bitset calendar is marked in the same transaction.
+    """
+
+    def __init__(self):
+        self.calendar = CheckInCalendarService()
+
+    def _upsert(self, model, keys, increments, defaults):
+        """Apply increments to a keyed row, creating it if needed."""
+        statement = (
+            update(model)
+            .filter_by(**keys)
+            .values(**increments)
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.session.execute(statement).rowcount:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**keys, **defaults))
+        except IntegrityError:
+            # Another writer created the row first
+            db.session.execute(statement)
+
+    def record(self, guild_id, user_id, day, streak, reward=0):
+        """Roll a new check-in into the counters; runs inside the caller's transaction."""
+        guild_id = str(guild_id)
+        continued = 1 if streak > 1 else 0
+
+        self._upsert(
+            CheckInDailyStat,
+            {'guild_id': guild_id, 'date': day},
+            {
+                'checkins': CheckInDailyStat.checkins + 1,
+                'streaks_continued': CheckInDailyStat.streaks_continued + continued,
+                'rewards': CheckInDailyStat.rewards + reward
+            },
+            {'checkins': 1, 'streaks_continued': continued, 'rewards': reward}
+        )
+
+        self._upsert(
+            CheckInMemberStat,
+            {'guild_id': guild_id, 'user_id': str(user_id)},
+            {
+                'current_streak': streak,
+                'longest_streak': case(
+                    (CheckInMemberStat.longest_streak < streak, streak),
+                    else_=CheckInMemberStat.longest_streak
+                ),
+                'total_checkins': CheckInMemberStat.total_checkins + 1,
+                'total_rewards': CheckInMemberStat.total_rewards + reward,
+                'last_check_in': day
+            },
+            {
+                'current_streak': streak,
+                'longest_streak': streak,
+                'total_checkins': 1,
+                'total_rewards': reward,
+                'first_check_in': day,
+                'last_check_in': day
+            }
+        )
+
+        self.calendar.mark(guild_id, user_id, day)
+
+    def member_stats(self, guild_id, user_id):
+        """Read a member's counters, or None if they never checked in."""
+        return CheckInMemberStat.query.filter_by(guild_id=str(guild_id), user_id=str(user_id)).first()
+
+    def current_streak(self, stats, today=None):
+        """A member's streak, or 0 once a day has been missed."""
+        today = today or date.today()
+        if not stats or not stats.last_check_in or stats.last_check_in < today - timedelta(days=1):
+            return 0
+        return stats.current_streak
+
+    def leaderboard(self, guild_id, metric='streak', limit=10):
+        """Top members as (user_id, value) pairs, read from the counter indexes."""
+        if metric == 'streak':
+            column = CheckInMemberStat.current_streak
+            query = CheckInMemberStat.query.filter(
+                CheckInMemberStat.guild_id == str(guild_id),
+                CheckInMemberStat.last_check_in >= date.today() - timedelta(days=1)
+            )
+        else:
+            column = CheckInMemberStat.total_checkins
+            query = CheckInMemberStat.query.filter(CheckInMemberStat.guild_id == str(guild_id))
+
+        return [
+            (stats.user_id, getattr(stats, column.key))
+            for stats in query.order_by(column.desc()).limit(limit)
+        ]
+
+    def _daily(self, guild_id, day):
+        return CheckInDailyStat.query.filter_by(guild_id=str(guild_id), date=day).first()
+
+    def checkins_today(self, guild_id):
+        """Number of check-ins in the guild today."""
+        today = self._daily(guild_id, date.today())
+        return today.checkins if today else 0
+
+    def active_streaks(self, guild_id):
+        """Members who checked in today or yesterday, from two daily rows."""
+        today = self._daily(guild_id, date.today())
+        yesterday = self._daily(guild_id, date.today() - timedelta(days=1))
+
+        total = (today.checkins if today else 0) + (yesterday.checkins if yesterday else 0)
+        return total - (today.streaks_continued if today else 0)
+
+    def history(self, guild_id, user_id, days=30):
+        """A member's check-ins over the last ``days`` days via the unique index."""
+        since = date.today() - timedelta(days=days - 1)
+        return CheckIn.query.filter(
+            CheckIn.guild_id == str(guild_id),
+            CheckIn.user_id == str(user_id),
+            CheckIn.date >= since
+        ).order_by(CheckIn.date.desc()).all()
+
+    def backfill(self):
+        """Rebuild both rollups from the full check-in history and commit."""
+        try:
+            db.session.execute(delete(CheckInDailyStat))
+            db.session.execute(delete(CheckInMemberStat))
+
+            days = db.session.execute(
+                insert(CheckInDailyStat).from_select(
+                    ['guild_id', 'date', 'checkins', 'streaks_continued', 'rewards'],
+                    select(
+                        CheckIn.guild_id,
+                        CheckIn.date,
+                        func.count(CheckIn.id),
+                        func.sum(case((CheckIn.streak > 1, 1), else_=0)),
+                        func.coalesce(func.sum(CheckIn.reward_amount), 0)
+                    ).group_by(CheckIn.guild_id, CheckIn.date)
+                )
+            ).rowcount
+
+            latest = aliased(CheckIn)
+            current = (
+                select(latest.streak)
+                .where(latest.guild_id == CheckIn.guild_id, latest.user_id == CheckIn.user_id)
+                .order_by(latest.date.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+            members = db.session.execute(
+                insert(CheckInMemberStat).from_select(
+                    ['guild_id', 'user_id', 'current_streak', 'longest_streak', 'total_checkins',
+                     'total_rewards', 'first_check_in', 'last_check_in'],
+                    select(
+                        CheckIn.guild_id,
+                        CheckIn.user_id,
+                        current,
+                        func.max(CheckIn.streak),
+                        func.count(CheckIn.id),
+                        func.coalesce(func.sum(CheckIn.reward_amount), 0),
+                        func.min(CheckIn.date),
+                        func.max(CheckIn.date)
+                    ).group_by(CheckIn.guild_id, CheckIn.user_id)
+                )
+            ).rowcount
+
+            db.session.commit()
+            logger.info(f"🌹 Backfilled {days} daily and {members} member check-in rollups")
+            return days, members
+        except SQLAlchemyError as e:
+            logger.error(f"Database error backfilling check-in rollups: {e}")
+            db.session.rollback()
+            return 0, 0
+
+if __name__ == "__main__":
+    import config
+    from main import create_db_app
+
+    with create_db_app(config.DATABASE_URL).app_context():
+        CheckInStats().backfill()
@@ -3,6 +3,11 @@ from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError
 from models import User, GuildConfig, Command, Warning, Ticket, Application, CheckIn, ShopItem, SocialMonitor, Todo, StickyMessage, AuditLog
 from main import db
+from services.level_curve import level_for_xp
+from services.checkin_stats import CheckInStats
+from services.ticket_search import TicketSearchIndex
+from services.ticket_analytics import TicketAnalytics
+from services.ticket_channels import channels
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +15,11 @@ logger = logging.getLogger(__name__)
 class DatabaseService:
     """Database service for bot operations"""
     
+    def __init__(self):
+        self.checkin_stats = CheckInStats()
+        self.search_index = TicketSearchIndex()
+        self.ticket_analytics = TicketAnalytics()
+    
     async def get_or_create_user(self, discord_id, username=None, discriminator=None):
         """Get or create user record"""
         try:
@@ -98,11 +108,16 @@ class DatabaseService:
                 subject=subject
             )
             db.session.add(ticket)
+            self.ticket_analytics.record_opened(guild_id)
+            db.session.flush()
+            channels.add(ticket)
             db.session.commit()
+            self.search_index.index_ticket(ticket.id)
             return ticket
         except SQLAlchemyError as e:
             logger.error(f"Database error in create_ticket: {e}")
             db.session.rollback()
+            channels.remove(channel_id)
             return None
     
     async def update_ticket_status(self, ticket_id, status, assigned_staff=None):
@@ -110,12 +125,19 @@ class DatabaseService:
         try:
             ticket = Ticket.query.get(ticket_id)
             if ticket:
+                was_closed = ticket.status == 'closed'
                 ticket.status = status
                 if assigned_staff:
                     ticket.assigned_staff = str(assigned_staff)
-                if status == 'closed':
+                if status == 'closed' and not was_closed:
                     ticket.closed_at = datetime.utcnow()
+                    self.ticket_analytics.record_closed(ticket)
                 db.session.commit()
+                
+                if status == 'closed':
+                    channels.remove(ticket_id=ticket_id)
+                else:
+                    channels.update(ticket.channel_id, status=status, assigned_staff=ticket.assigned_staff)
                 return ticket
         except SQLAlchemyError as e:
             logger.error(f"Database error in update_ticket_status: {e}")
@@ -140,39 +162,40 @@ class DatabaseService:
             db.session.rollback()
             return None
     
-    async def record_checkin(self, user_id, guild_id, mood=None, message=None):
-        """Record daily check-in"""
+    async def record_checkin(self, user_id, guild_id, mood=None, message=None, base_reward=100):
+        """Record daily check-in and its reward"""
         try:
-            user = await self.get_or_create_user(user_id)
-            
             # Check if already checked in today
             today = datetime.utcnow().date()
             existing = CheckIn.query.filter_by(
-                user_id=user.id,
-                guild_id=str(guild_id)
-            ).filter(CheckIn.date >= today).first()
+                user_id=str(user_id),
+                guild_id=str(guild_id),
+                date=today
+            ).first()
             
             if existing:
                 return existing, False  # Already checked in
             
-            # Calculate streak
+            # Calculate streak from the member's rollup instead of scanning history
+            stats = self.checkin_stats.member_stats(guild_id, user_id)
             yesterday = today - timedelta(days=1)
-            yesterday_checkin = CheckIn.query.filter_by(
-                user_id=user.id,
-                guild_id=str(guild_id)
-            ).filter(CheckIn.date >= yesterday, CheckIn.date < today).first()
+            streak = (stats.current_streak + 1) if stats and stats.last_check_in == yesterday else 1
             
-            streak = (yesterday_checkin.streak + 1) if yesterday_checkin else 1
+            # Reward grows with the streak, capped at a 500 bonus
+            reward = base_reward + min(streak * 10, 500)
             
             # Create check-in record
             checkin = CheckIn(
-                user_id=user.id,
+                user_id=str(user_id),
                 guild_id=str(guild_id),
+                date=today,
                 streak=streak,
+                reward_amount=reward,
                 mood=mood,
                 message=message
             )
             db.session.add(checkin)
+            self.checkin_stats.record(guild_id, user_id, today, streak, reward)
             db.session.commit()
             
             return checkin, True  # New check-in
@@ -181,6 +204,108 @@ class DatabaseService:
             db.session.rollback()
             return None, False
     
+    async def get_checkin_stats(self, user_id, guild_id):
+        """Get user's check-in counters"""
+        try:
+            return self.checkin_stats.member_stats(guild_id, user_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_checkin_stats: {e}")
+            return None
+    
+    async def get_latest_checkin(self, user_id, guild_id):
+        """Get user's most recent check-in"""
+        try:
+            stats = self.checkin_stats.member_stats(guild_id, user_id)
+            if not stats:
+                return None
+            return CheckIn.query.filter_by(
+                user_id=str(user_id),
+                guild_id=str(guild_id),
+                date=stats.last_check_in
+            ).first()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_latest_checkin: {e}")
+            return None
+    
+    async def get_total_checkins(self, user_id, guild_id):
+        """Get user's total check-in count"""
+        try:
+            stats = self.checkin_stats.member_stats(guild_id, user_id)
+            return stats.total_checkins if stats else 0
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_total_checkins: {e}")
+            return 0
+    
+    async def get_checkin_leaderboard(self, guild_id, metric='streak', limit=10):
+        """Get check-in leaderboard as (user_id, value) pairs"""
+        try:
+            return self.checkin_stats.leaderboard(guild_id, metric, limit)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_checkin_leaderboard: {e}")
+            return []
+    
+    async def get_checkins_today(self, guild_id):
+        """Get number of check-ins today"""
+        try:
+            return self.checkin_stats.checkins_today(guild_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_checkins_today: {e}")
+            return 0
+    
+    async def get_active_streaks(self, guild_id):
+        """Get number of members with an unbroken streak"""
+        try:
+            return self.checkin_stats.active_streaks(guild_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_active_streaks: {e}")
+            return 0
+    
+    async def get_checkin_history(self, user_id, guild_id, days=30):
+        """Get user's check-ins over recent days"""
+        try:
+            return self.checkin_stats.history(guild_id, user_id, days)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_checkin_history: {e}")
+            return []
+    
+    async def get_checkin_calendar(self, user_id, guild_id, year=None):
+        """Get user's check-in calendar summary and recent days"""
+        try:
+            today = datetime.utcnow().date()
+            summary = self.checkin_stats.calendar.summary(guild_id, user_id, year, today)
+            summary['recent_days'] = self.checkin_stats.calendar.days_between(
+                guild_id, user_id, today - timedelta(days=27), today
+            )
+            # Moods live only on the CheckIn rows, and only the recent weeks are shown
+            summary['moods'] = {
+                checkin.date: checkin.mood
+                for checkin in self.checkin_stats.history(guild_id, user_id, 28)
+                if checkin.mood
+            }
+            return summary
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_checkin_calendar: {e}")
+            return None
+    
+    async def update_checkin_mood(self, user_id, guild_id, mood):
+        """Set mood on today's check-in"""
+        try:
+            checkin = CheckIn.query.filter_by(
+                user_id=str(user_id),
+                guild_id=str(guild_id),
+                date=datetime.utcnow().date()
+            ).first()
+            if not checkin:
+                return False
+            
+            checkin.mood = mood
+            db.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in update_checkin_mood: {e}")
+            db.session.rollback()
+            return False
+    
     async def update_user_currency(self, user_id, amount, operation='add'):
         """Update user currency"""
         try:
@@ -205,10 +330,8 @@ class DatabaseService:
             user = await self.get_or_create_user(user_id)
             user.xp += xp_amount
             
-            # Calculate new level
-            import math
-            new_level = int(math.sqrt(user.xp / 100)) + 1
             old_level = user.level
+            new_level = level_for_xp(user.xp)
             user.level = new_level
             
             db.session.commit()
@@ -1,8 +1,12 @@
 import discord
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
 from main import db
-from models import Member, Guild, ShopItem, Purchase, CheckIn
-import random
+from models import Member, Guild, ShopItem, CheckIn
+from services.purchases import PurchasePipeline
+from services.economy_aggregates import EconomyAggregates
+from services.checkin_stats import CheckInStats
+from services import economy_rules as rules
+from services import level_curve
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,9 +18,18 @@ class EconomyService:
         self.bot = bot
         
         # Check-in rewards
-        self.base_checkin_reward = 100
-        self.streak_multiplier = 1.1
-        self.max_streak_bonus = 500
+        self.base_checkin_reward = rules.BASE_CHECKIN_REWARD
+        self.streak_multiplier = rules.STREAK_MULTIPLIER
+        self.max_streak_bonus = rules.MAX_STREAK_BONUS
+        
+        # Contention-safe shop purchases
+        self.purchases = PurchasePipeline()
+        
+        # Precomputed per-guild economy figures
+        self.aggregates = EconomyAggregates()
+        
+        # Check-in rollups for boards and streaks
+        self.checkin_stats = CheckInStats()
     
     async def check_balance(self, ctx, member):
         """Check a user's currency balance."""
@@ -122,40 +135,34 @@ class EconomyService:
                 new_streak = 1
             
             # Calculate reward
-            base_reward = self.base_checkin_reward
-            streak_bonus = min(
-                int(base_reward * (self.streak_multiplier ** min(new_streak, 30)) - base_reward),
+            total_reward = rules.checkin_reward(
+                new_streak,
+                self.base_checkin_reward,
+                self.streak_multiplier,
                 self.max_streak_bonus
             )
-            total_reward = base_reward + streak_bonus
             
             # Add random bonus (5-15% chance for extra reward)
-            bonus_chance = random.randint(1, 100)
-            bonus_reward = 0
-            bonus_message = ""
-            
-            if bonus_chance <= 5:  # 5% chance for large bonus
-                bonus_reward = int(total_reward * random.uniform(0.5, 1.0))
-                bonus_message = "✨ **Lucky day!** Extra bonus reward!"
-            elif bonus_chance <= 15:  # 10% chance for small bonus
-                bonus_reward = int(total_reward * random.uniform(0.1, 0.3))
-                bonus_message = "🍀 Small lucky bonus!"
+            bonus_reward, bonus_message = rules.roll_checkin_bonus(total_reward)
             
             final_reward = total_reward + bonus_reward
             
             # Update member data
             member_data.balance += final_reward
+            self.aggregates.record(ctx.guild.id, ctx.author.id, final_reward, 'checkin', member_data.balance)
             member_data.check_in_streak = new_streak
             member_data.last_check_in = today
-            member_data.xp += 25  # XP for checking in
+            member_data.xp += rules.CHECKIN_XP  # XP for checking in
             
-            # Level up check
+            # Level up check; may pass several levels at once
             level_up_message = ""
-            required_xp = member_data.level * 1000
-            if member_data.xp >= required_xp:
-                member_data.level += 1
-                level_up_reward = member_data.level * 50
+            old_level = member_data.level or 1
+            new_level = level_curve.level_for_xp(member_data.xp)
+            if new_level > old_level:
+                member_data.level = new_level
+                level_up_reward = rules.level_up_rewards(old_level, new_level)
                 member_data.balance += level_up_reward
+                self.aggregates.record(ctx.guild.id, ctx.author.id, level_up_reward, 'level_up', member_data.balance)
                 level_up_message = f"\n🌟 **Level Up!** You are now level {member_data.level}! (+{level_up_reward} bonus)"
             
             # Create check-in record
@@ -167,6 +174,7 @@ class EconomyService:
                 reward_amount=final_reward
             )
             db.session.add(checkin_record)
+            self.checkin_stats.record(ctx.guild.id, ctx.author.id, today, new_streak, final_reward)
             
             db.session.commit()
             
@@ -215,16 +223,16 @@ class EconomyService:
             
             # Streak milestone rewards
             milestone_message = ""
-            if new_streak % 7 == 0:  # Weekly milestone
-                milestone_reward = 500 + (new_streak // 7) * 100
-                member_data.balance += milestone_reward
-                db.session.commit()
-                milestone_message = f"🎉 **Weekly Milestone!** +{milestone_reward} {currency_name} bonus!"
-            elif new_streak % 30 == 0:  # Monthly milestone
-                milestone_reward = 2000 + (new_streak // 30) * 500
+            milestone_reward, milestone_kind = rules.milestone_reward(new_streak)
+            if milestone_kind:
                 member_data.balance += milestone_reward
+                self.aggregates.record(ctx.guild.id, ctx.author.id, milestone_reward, 'milestone', member_data.balance)
                 db.session.commit()
-                milestone_message = f"🏆 **Monthly Milestone!** +{milestone_reward} {currency_name} bonus!"
+                
+                if milestone_kind == 'weekly':
+                    milestone_message = f"🎉 **Weekly Milestone!** +{milestone_reward} {currency_name} bonus!"
+                else:
+                    milestone_message = f"🏆 **Monthly Milestone!** +{milestone_reward} {currency_name} bonus!"
             
             if milestone_message:
                 embed.add_field(
@@ -384,35 +392,32 @@ class EconomyService:
                 await ctx.send(embed=embed)
                 return
             
-            # Process purchase
-            member_data.balance -= item.price
-            
-            # Update stock
-            if item.stock > 0:
-                item.stock -= 1
-            
-            # Create purchase record
-            purchase = Purchase(
-                guild_id=str(ctx.guild.id),
-                user_id=str(ctx.author.id),
-                item_id=item.id,
-                quantity=1,
-                total_cost=item.price
-            )
-            db.session.add(purchase)
+            # Reserve stock and funds, grant the role outside the transaction, then confirm
+            result, error = await self.purchases.purchase(ctx.guild, ctx.author, item.id)
+            
+            if error:
+                if error == "Insufficient stock":
+                    title = "📦 Out of Stock"
+                    description = f"**{item.name}** sold out before your order went through."
+                elif error == "Insufficient funds":
+                    title = "💸 Insufficient Funds"
+                    description = f"You no longer have the {item.price:,} needed for **{item.name}**."
+                else:
+                    title = "❌ Purchase Failed"
+                    description = f"{error}."
+                
+                embed = discord.Embed(
+                    title=title,
+                    description=description,
+                    color=0x711417
+                )
+                embed.set_footer(text="The manor's treasures require dedication 🌹")
+                await ctx.send(embed=embed)
+                return
             
-            # Give role reward if applicable
             role_message = ""
-            if item.role_reward:
-                try:
-                    role = ctx.guild.get_role(int(item.role_reward))
-                    if role and role not in ctx.author.roles:
-                        await ctx.author.add_roles(role, reason=f"Purchased {item.name}")
-                        role_message = f"\n🎭 You have been granted the **{role.name}** role!"
-                except (ValueError, discord.Forbidden):
-                    pass
-            
-            db.session.commit()
+            if result['role']:
+                role_message = f"\n🎭 You have been granted the **{result['role'].name}** role!"
             
             # Get currency info
             guild_config = Guild.query.filter_by(guild_id=str(ctx.guild.id)).first()
@@ -441,7 +446,7 @@ class EconomyService:
             
             embed.add_field(
                 name="💳 New Balance",
-                value=f"{member_data.balance:,} {currency_name}",
+                value=f"{result['new_balance']:,} {currency_name}",
                 inline=True
             )
             
@@ -456,7 +461,7 @@ class EconomyService:
             
             await ctx.send(embed=embed)
     
-    async def add_currency(self, user_id, guild_id, amount, reason="Unknown"):
+    async def add_currency(self, user_id, guild_id, amount, reason="Unknown", source="admin"):
         """Add currency to a user's balance."""
         with self.bot.app_context:
             member_data = Member.query.filter_by(
@@ -469,12 +474,13 @@ class EconomyService:
                 return False
             
             member_data.balance += amount
+            self.aggregates.record(guild_id, user_id, amount, source, member_data.balance)
             db.session.commit()
             
             logger.info(f"Added {amount} currency to user {user_id} in guild {guild_id}. Reason: {reason}")
             return True
     
-    async def remove_currency(self, user_id, guild_id, amount, reason="Unknown"):
+    async def remove_currency(self, user_id, guild_id, amount, reason="Unknown", source="admin"):
         """Remove currency from a user's balance."""
         with self.bot.app_context:
             member_data = Member.query.filter_by(
@@ -486,6 +492,7 @@ class EconomyService:
                 return False
             
             member_data.balance -= amount
+            self.aggregates.record(guild_id, user_id, -amount, source, member_data.balance)
             db.session.commit()
             
             logger.info(f"Removed {amount} currency from user {user_id} in guild {guild_id}. Reason: {reason}")
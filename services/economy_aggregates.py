@@ -0,0 +1,184 @@
+from datetime import datetime, date
+from sqlalchemy import update, case, func
+from sqlalchemy.exc import IntegrityError
+from main import db
+from models import Member, ShopItem, LedgerEntry, EconomyAggregate, EconomyDailyFlow
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EconomyAggregates:
+    """Per-guild economy figures maintained from ledger events.
+
+    Every balance change calls ``record`` inside the transaction that moves the
+    currency, which appends a ledger entry and bumps the guild's supply, holder
+    count and today's flow for that source with atomic increments. Balance
+    percentiles cannot be maintained exactly from deltas, so they (and any drift
+    in the counters) are refreshed by the periodic ``reconcile`` job.
+    """
+
+    percentiles = {'median_balance': 0.5, 'p90_balance': 0.9, 'p99_balance': 0.99}
+
+    def record(self, guild_id, user_id, amount, source, balance_after):
+        """Record a balance change; runs inside the caller's transaction."""
+        if not amount:
+            return
+
+        guild_id = str(guild_id)
+        balance_before = balance_after - amount
+        holder_delta = int(balance_after > 0) - int(balance_before > 0)
+
+        db.session.add(LedgerEntry(
+            guild_id=guild_id,
+            user_id=str(user_id),
+            amount=amount,
+            source=source,
+            balance_after=balance_after
+        ))
+
+        statement = (
+            update(EconomyAggregate)
+            .where(EconomyAggregate.guild_id == guild_id)
+            .values(
+                total_supply=EconomyAggregate.total_supply + amount,
+                holders=EconomyAggregate.holders + holder_delta,
+                ledger_entries=EconomyAggregate.ledger_entries + 1,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        if not db.session.execute(statement).rowcount:
+            # First event for this guild: seed the row from the member table
+            try:
+                with db.session.begin_nested():
+                    self.reconcile_guild(guild_id)
+            except IntegrityError:
+                # Another writer seeded the row first
+                db.session.execute(statement)
+
+        self._bump_daily_flow(
+            guild_id,
+            source,
+            inflow=max(amount, 0),
+            outflow=max(-amount, 0)
+        )
+
+    def _bump_daily_flow(self, guild_id, source, inflow, outflow):
+        """Add to today's flow row for a source, creating it if needed."""
+        keys = {'guild_id': guild_id, 'date': date.today(), 'source': source}
+        statement = (
+            update(EconomyDailyFlow)
+            .filter_by(**keys)
+            .values(
+                inflow=EconomyDailyFlow.inflow + inflow,
+                outflow=EconomyDailyFlow.outflow + outflow,
+                entries=EconomyDailyFlow.entries + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.session.execute(statement).rowcount:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(EconomyDailyFlow(inflow=inflow, outflow=outflow, entries=1, **keys))
+        except IntegrityError:
+            # Another writer created today's row first
+            db.session.execute(statement)
+
+    def _balance_percentile(self, guild_id, holders, fraction):
+        """Read one percentile of positive balances via the (guild_id, balance) index."""
+        if not holders:
+            return 0
+
+        return db.session.query(Member.balance).filter(
+            Member.guild_id == guild_id,
+            Member.balance > 0
+        ).order_by(Member.balance).offset(int(fraction * (holders - 1))).limit(1).scalar() or 0
+
+    def _store(self, guild_id, total_supply, holders):
+        """Overwrite a guild's aggregate row with freshly computed values."""
+        now = datetime.utcnow()
+        values = {
+            'total_supply': total_supply,
+            'holders': holders,
+            'updated_at': now,
+            'reconciled_at': now
+        }
+        for column, fraction in self.percentiles.items():
+            values[column] = self._balance_percentile(guild_id, holders, fraction)
+
+        aggregate = EconomyAggregate.query.filter_by(guild_id=guild_id).first()
+        if not aggregate:
+            aggregate = EconomyAggregate(
+                guild_id=guild_id,
+                ledger_entries=LedgerEntry.query.filter_by(guild_id=guild_id).count()
+            )
+            db.session.add(aggregate)
+
+        for column, value in values.items():
+            setattr(aggregate, column, value)
+
+    def reconcile_guild(self, guild_id):
+        """Recompute one guild's aggregate row; runs inside the caller's transaction."""
+        guild_id = str(guild_id)
+        total_supply, holders = db.session.query(
+            func.coalesce(func.sum(Member.balance), 0),
+            func.coalesce(func.sum(case((Member.balance > 0, 1), else_=0)), 0)
+        ).filter(Member.guild_id == guild_id).one()
+
+        self._store(guild_id, int(total_supply), int(holders))
+
+    def reconcile(self):
+        """Recompute every guild's aggregates in one grouped scan and commit."""
+        try:
+            rows = db.session.query(
+                Member.guild_id,
+                func.coalesce(func.sum(Member.balance), 0),
+                func.coalesce(func.sum(case((Member.balance > 0, 1), else_=0)), 0)
+            ).group_by(Member.guild_id).all()
+
+            for guild_id, total_supply, holders in rows:
+                self._store(guild_id, int(total_supply), int(holders))
+
+            db.session.commit()
+            logger.info(f"🌹 Reconciled economy aggregates for {len(rows)} guilds")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error reconciling economy aggregates: {e}")
+            db.session.rollback()
+            return 0
+
+    def get_stats(self, guild_id):
+        """Read a guild's precomputed economy figures."""
+        guild_id = str(guild_id)
+        aggregate = EconomyAggregate.query.filter_by(guild_id=guild_id).first()
+
+        if not aggregate:
+            self.reconcile_guild(guild_id)
+            db.session.commit()
+            aggregate = EconomyAggregate.query.filter_by(guild_id=guild_id).first()
+
+        flows = EconomyDailyFlow.query.filter_by(guild_id=guild_id, date=date.today()).all()
+        inflow_by_source = {flow.source: flow.inflow for flow in flows if flow.inflow}
+        outflow_by_source = {flow.source: flow.outflow for flow in flows if flow.outflow}
+
+        return {
+            'total_currency': aggregate.total_supply,
+            'total_users': aggregate.holders,
+            'holders': aggregate.holders,
+            'total_items': ShopItem.query.filter_by(guild_id=guild_id).count(),
+            'total_transactions': aggregate.ledger_entries,
+            'daily_checkins': sum(flow.entries for flow in flows if flow.source == 'checkin'),
+            'average_balance': aggregate.total_supply / max(aggregate.holders, 1),
+            'median_balance': aggregate.median_balance,
+            'p90_balance': aggregate.p90_balance,
+            'p99_balance': aggregate.p99_balance,
+            'daily_inflow': sum(inflow_by_source.values()),
+            'daily_outflow': sum(outflow_by_source.values()),
+            'inflow_by_source': inflow_by_source,
+            'outflow_by_source': outflow_by_source,
+            'reconciled_at': aggregate.reconciled_at
+        }
@@ -0,0 +1,79 @@
+import random
+
+# Reward and payout rules shared by the economy services and the offline simulator.
+# Keep this module free of Discord and database imports.
+
+# Daily check-in rewards
+BASE_CHECKIN_REWARD = 100
+STREAK_MULTIPLIER = 1.1
+MAX_STREAK_BONUS = 500
+STREAK_CAP_DAYS = 30
+CHECKIN_XP = 25
+
+# Chat XP: random award per message, at most once per cooldown per member
+CHAT_XP_RANGE = (15, 25)
+CHAT_XP_COOLDOWN_SECONDS = 60
+
+# Random check-in bonus tiers: (roll ceiling out of 100, min fraction, max fraction, message)
+CHECKIN_BONUS_TIERS = (
+    (5, 0.5, 1.0, "✨ **Lucky day!** Extra bonus reward!"),  # 5% chance for large bonus
+    (15, 0.1, 0.3, "🍀 Small lucky bonus!"),  # 10% chance for small bonus
+)
+
+# Gambling payout tables; winnings are the multiplier times the (already deducted) wager
+GAMBLE_GAMES = {
+    'coinflip': {'win_chance': 0.5, 'multipliers': (2,)},
+    'slots': {'win_chance': 0.2, 'multipliers': (2, 3, 5, 10)},
+    'dice': {'win_chance': 0.5, 'multipliers': (1.5,)},  # Roll 1-6, win on 4-6
+}
+
+def checkin_streak_bonus(streak, base_reward=BASE_CHECKIN_REWARD, multiplier=STREAK_MULTIPLIER,
+                         max_bonus=MAX_STREAK_BONUS):
+    """Streak bonus paid on top of the base check-in reward."""
+    return min(
+        int(base_reward * (multiplier ** min(streak, STREAK_CAP_DAYS)) - base_reward),
+        max_bonus
+    )
+
+def checkin_reward(streak, base_reward=BASE_CHECKIN_REWARD, multiplier=STREAK_MULTIPLIER,
+                   max_bonus=MAX_STREAK_BONUS):
+    """Guaranteed check-in reward for a streak, before any lucky bonus."""
+    return base_reward + checkin_streak_bonus(streak, base_reward, multiplier, max_bonus)
+
+def roll_checkin_bonus(total_reward, rng=random):
+    """Roll the random lucky bonus for a check-in, returning (amount, message)."""
+    roll = rng.randint(1, 100)
+    for ceiling, low, high, message in CHECKIN_BONUS_TIERS:
+        if roll <= ceiling:
+            return int(total_reward * rng.uniform(low, high)), message
+    return 0, ""
+
+def milestone_reward(streak):
+    """Streak milestone bonus, returning (amount, kind) with kind None when none applies."""
+    if streak % 7 == 0:  # Weekly milestone
+        return 500 + (streak // 7) * 100, 'weekly'
+    elif streak % 30 == 0:  # Monthly milestone
+        return 2000 + (streak // 30) * 500, 'monthly'
+    return 0, None
+
+def level_up_reward(level):
+    """Currency bonus for reaching a level."""
+    return level * 50
+
+def level_up_rewards(old_level, new_level):
+    """Total bonus for every level passed between two levels."""
+    return sum(level_up_reward(level) for level in range(old_level + 1, new_level + 1))
+
+def gamble_payout(game, amount, rng=random):
+    """Play one round of a game, returning (won, winnings)."""
+    table = GAMBLE_GAMES[game]
+    won = rng.random() < table['win_chance']
+    if not won:
+        return False, 0
+    return True, amount * rng.choice(table['multipliers'])
+
+def house_edge(game):
+    """Expected fraction of each wager the house keeps."""
+    table = GAMBLE_GAMES[game]
+    expected_multiplier = sum(table['multipliers']) / len(table['multipliers'])
+    return 1 - table['win_chance'] * expected_multiplier
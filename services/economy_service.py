@@ -1,7 +1,9 @@
-import asyncio
-from datetime import datetime, timedelta
-from models import User, ShopItem, InventoryItem, CheckIn
+from models import ShopItem
 from main import db
+from services.purchases import PurchasePipeline
+from services.economy_aggregates import EconomyAggregates
+from services.inventory import InventoryService
+from services import economy_rules as rules
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +13,9 @@ class EconomyService:
     
     def __init__(self, db_service):
         self.db_service = db_service
+        self.purchases = PurchasePipeline()
+        self.aggregates = EconomyAggregates()
+        self.inventory = InventoryService()
     
     async def add_currency(self, user_id, amount, reason="Unknown"):
         """Add currency to user"""
@@ -57,22 +62,18 @@ class EconomyService:
         """Give daily reward"""
         try:
             # Check if already claimed today
-            checkin, is_new = await self.db_service.record_checkin(user_id, guild_id)
+            checkin, is_new = await self.db_service.record_checkin(user_id, guild_id, base_reward=base_amount)
             
             if not is_new:
                 return None, "Already claimed today"
             
-            # Calculate reward based on streak
-            streak_bonus = min(checkin.streak * 10, 500)  # Max 500 bonus
-            total_reward = base_amount + streak_bonus
+            # The check-in and its rollups already carry the streak-based reward
+            total_reward = checkin.reward_amount
+            streak_bonus = total_reward - base_amount
             
             # Add currency
             new_balance = await self.add_currency(user_id, total_reward, "Daily check-in")
             
-            # Update check-in record
-            checkin.reward_claimed = total_reward
-            db.session.commit()
-            
             return {
                 'reward': total_reward,
                 'streak': checkin.streak,
@@ -86,61 +87,34 @@ class EconomyService:
     async def purchase_item(self, user_id, item_id, quantity=1):
         """Purchase item from shop"""
         try:
-            user = await self.db_service.get_or_create_user(user_id)
             item = ShopItem.query.get(item_id)
             
-            if not item or not item.enabled:
+            if not item:
                 return None, "Item not found or unavailable"
             
-            total_cost = item.price * quantity
-            
-            if user.currency < total_cost:
-                return None, "Insufficient funds"
-            
-            if item.stock != -1 and item.stock < quantity:
-                return None, "Insufficient stock"
-            
-            # Remove currency
-            new_balance = await self.remove_currency(user_id, total_cost, f"Purchase: {item.name}")
-            
-            # Add to inventory
-            existing_inventory = InventoryItem.query.filter_by(
-                user_id=user.id,
-                item_id=item.id
-            ).first()
+            # Funds and stock are taken with conditional updates, never read-modify-write
+            reservation, error = await self.purchases.reserve(item.guild_id, user_id, item.id, quantity)
+            if error:
+                return None, error
             
-            if existing_inventory:
-                existing_inventory.quantity += quantity
-            else:
-                inventory_item = InventoryItem(
-                    user_id=user.id,
-                    item_id=item.id,
-                    quantity=quantity
-                )
-                db.session.add(inventory_item)
-            
-            # Update stock
-            if item.stock != -1:
-                item.stock -= quantity
-            
-            db.session.commit()
+            if not await self.purchases.confirm(reservation):
+                return None, "Purchase failed"
             
             return {
-                'item_name': item.name,
+                'item_name': reservation['item_name'],
                 'quantity': quantity,
-                'total_cost': total_cost,
-                'new_balance': new_balance
+                'total_cost': reservation['total_cost'],
+                'new_balance': reservation['new_balance']
             }, None
         except Exception as e:
             logger.error(f"Error purchasing item: {e}")
             db.session.rollback()
             return None, "Purchase failed"
     
-    async def get_user_inventory(self, user_id):
+    async def get_user_inventory(self, user_id, guild_id):
         """Get user's inventory"""
         try:
-            user = await self.db_service.get_or_create_user(user_id)
-            inventory = InventoryItem.query.filter_by(user_id=user.id).all()
+            inventory = self.inventory.get_inventory(guild_id, user_id)
             
             result = []
             for inv_item in inventory:
@@ -155,6 +129,34 @@ class EconomyService:
             logger.error(f"Error getting inventory: {e}")
             return []
     
+    async def use_item(self, user_id, guild_id, item_id, quantity=1):
+        """Consume items from user's inventory"""
+        try:
+            if not self.inventory.consume(guild_id, user_id, item_id, quantity):
+                db.session.rollback()
+                return None, "Not enough of that item"
+            
+            db.session.commit()
+            return {'item_id': item_id, 'quantity': quantity}, None
+        except Exception as e:
+            logger.error(f"Error using item: {e}")
+            db.session.rollback()
+            return None, "System error"
+    
+    async def trade_item(self, from_user_id, to_user_id, guild_id, item_id, quantity=1):
+        """Move items between users' inventories"""
+        try:
+            if not self.inventory.transfer(guild_id, from_user_id, to_user_id, item_id, quantity):
+                db.session.rollback()
+                return None, "Not enough of that item"
+            
+            db.session.commit()
+            return {'item_id': item_id, 'quantity': quantity}, None
+        except Exception as e:
+            logger.error(f"Error trading item: {e}")
+            db.session.rollback()
+            return None, "System error"
+    
     async def create_shop_item(self, guild_id, name, description, price, category="misc", rarity="common", stock=-1):
         """Create new shop item"""
         try:
@@ -191,8 +193,6 @@ class EconomyService:
     async def gamble(self, user_id, amount, game_type="coinflip"):
         """Gambling system"""
         try:
-            import random
-            
             user = await self.db_service.get_or_create_user(user_id)
             
             if user.currency < amount:
@@ -204,22 +204,8 @@ class EconomyService:
             won = False
             winnings = 0
             
-            if game_type == "coinflip":
-                won = random.choice([True, False])
-                if won:
-                    winnings = amount * 2
-            elif game_type == "slots":
-                # Simple slots with 20% win rate
-                won = random.random() < 0.2
-                if won:
-                    multiplier = random.choice([2, 3, 5, 10])
-                    winnings = amount * multiplier
-            elif game_type == "dice":
-                # Roll 1-6, win on 4-6
-                roll = random.randint(1, 6)
-                won = roll >= 4
-                if won:
-                    winnings = amount * 1.5
+            if game_type in rules.GAMBLE_GAMES:
+                won, winnings = rules.gamble_payout(game_type, amount)
             
             if won and winnings > 0:
                 new_balance = await self.add_currency(user_id, winnings, f"Gambling win: {game_type}")
@@ -264,20 +250,7 @@ class EconomyService:
     async def get_economy_stats(self, guild_id):
         """Get economy statistics"""
         try:
-            total_currency = db.session.query(db.func.sum(User.currency)).scalar() or 0
-            total_users = User.query.count()
-            total_items = ShopItem.query.filter_by(guild_id=str(guild_id)).count()
-            daily_checkins = CheckIn.query.filter(
-                CheckIn.date >= datetime.utcnow().date()
-            ).count()
-            
-            return {
-                'total_currency': total_currency,
-                'total_users': total_users,
-                'total_items': total_items,
-                'daily_checkins': daily_checkins,
-                'average_balance': total_currency / max(total_users, 1)
-            }
+            return self.aggregates.get_stats(guild_id)
         except Exception as e:
             logger.error(f"Error getting economy stats: {e}")
             return {}
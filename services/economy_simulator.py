@@ -0,0 +1,221 @@
+import argparse
+import json
+import time
+import numpy as np
+from services import economy_rules as rules
+from services import level_curve
+
+class EconomySimulator:
+    """Vectorized Monte Carlo model of check-in, milestone and gambling payouts.
+
+    Scalar reward functions from ``economy_rules`` are evaluated once per streak
+    length into lookup tables, so the simulation pays out exactly what the bot
+    would while advancing every simulated member in a single NumPy step per day.
+    """
+
+    def __init__(self, members=100_000, days=365, seed=None,
+                 activity_alpha=2.0, activity_beta=2.0,
+                 gamble_rate=0.1, bet_fraction=0.1, games=None,
+                 base_reward=rules.BASE_CHECKIN_REWARD,
+                 streak_multiplier=rules.STREAK_MULTIPLIER,
+                 max_streak_bonus=rules.MAX_STREAK_BONUS):
+        self.members = members
+        self.days = days
+        self.rng = np.random.default_rng(seed)
+        self.activity_alpha = activity_alpha
+        self.activity_beta = activity_beta
+        self.gamble_rate = gamble_rate
+        self.bet_fraction = bet_fraction
+        self.games = list(games or rules.GAMBLE_GAMES)
+
+        # Index by streak length; streaks can never exceed the simulated days
+        streaks = range(days + 2)
+        self.checkin_table = np.array([
+            rules.checkin_reward(s, base_reward, streak_multiplier, max_streak_bonus) for s in streaks
+        ], dtype=np.int64)
+        self.milestone_table = np.array([rules.milestone_reward(s)[0] for s in streaks], dtype=np.int64)
+
+        # Shared level curve, plus the running total of level-up rewards per level
+        self.level_thresholds = np.array(level_curve.curve.thresholds, dtype=np.int64)
+        self.level_reward_totals = np.array([
+            rules.level_up_rewards(1, level) for level in range(level_curve.curve.max_level + 1)
+        ], dtype=np.int64)
+
+    def _lucky_bonus(self, totals):
+        """Vectorized version of ``roll_checkin_bonus`` over an array of rewards."""
+        rolls = self.rng.integers(1, 101, totals.size)
+        bonus = np.zeros(totals.size, dtype=np.int64)
+        unassigned = np.ones(totals.size, dtype=bool)
+
+        for ceiling, low, high, _ in rules.CHECKIN_BONUS_TIERS:
+            hit = unassigned & (rolls <= ceiling)
+            bonus[hit] = (totals[hit] * self.rng.uniform(low, high, hit.sum())).astype(np.int64)
+            unassigned &= ~hit
+
+        return bonus
+
+    def _gamble(self, balance, active, wagered, paid):
+        """Let a share of the day's active members wager on a random game."""
+        gamblers = active[self.rng.random(active.size, dtype=np.float32) < self.gamble_rate]
+        if not gamblers.size:
+            return
+
+        bets = np.maximum((balance[gamblers] * self.bet_fraction).astype(np.int64), 1)
+        can_bet = balance[gamblers] >= bets
+        gamblers, bets = gamblers[can_bet], bets[can_bet]
+        choices = self.rng.integers(0, len(self.games), gamblers.size)
+
+        for index, game in enumerate(self.games):
+            players = choices == index
+            if not players.any():
+                continue
+
+            table = rules.GAMBLE_GAMES[game]
+            stakes = bets[players]
+            won = self.rng.random(stakes.size) < table['win_chance']
+            multipliers = self.rng.choice(np.asarray(table['multipliers'], dtype=np.float64), stakes.size)
+            winnings = np.where(won, (stakes * multipliers).astype(np.int64), 0)
+
+            # Member indices are unique within a day, so plain fancy indexing is safe
+            balance[gamblers[players]] += winnings - stakes
+            wagered[game] += int(stakes.sum())
+            paid[game] += int(winnings.sum())
+
+    def run(self):
+        """Simulate every member for every day and summarize the economy."""
+        started = time.perf_counter()
+        n = self.members
+
+        activity = self.rng.beta(self.activity_alpha, self.activity_beta, n).astype(np.float32)
+        balance = np.zeros(n, dtype=np.int64)
+        streak = np.zeros(n, dtype=np.int64)
+        checked_yesterday = np.zeros(n, dtype=bool)
+        xp = np.zeros(n, dtype=np.int64)
+        level = np.ones(n, dtype=np.int64)
+
+        supply = np.zeros(self.days, dtype=np.int64)
+        inflow = {'checkin': 0, 'milestone': 0, 'level_up': 0}
+        wagered = {game: 0 for game in self.games}
+        paid = {game: 0 for game in self.games}
+
+        for day in range(self.days):
+            checked_today = self.rng.random(n, dtype=np.float32) < activity
+            active = np.flatnonzero(checked_today)
+
+            streaks = np.where(checked_yesterday[active], streak[active] + 1, 1)
+            streak[active] = streaks
+            checked_yesterday = checked_today
+
+            totals = self.checkin_table[streaks]
+            checkin = totals + self._lucky_bonus(totals)
+            milestone = self.milestone_table[streaks]
+            balance[active] += checkin + milestone
+            inflow['checkin'] += int(checkin.sum())
+            inflow['milestone'] += int(milestone.sum())
+
+            # Same bisect lookup as daily_checkin, so multi-level jumps pay every level
+            xp[active] += rules.CHECKIN_XP
+            new_levels = np.searchsorted(self.level_thresholds, xp[active], side='right')
+            gained = new_levels > level[active]
+            levelled = active[gained]
+            level_rewards = self.level_reward_totals[new_levels[gained]] - self.level_reward_totals[level[levelled]]
+            level[levelled] = new_levels[gained]
+            balance[levelled] += level_rewards
+            inflow['level_up'] += int(level_rewards.sum())
+
+            self._gamble(balance, active, wagered, paid)
+            supply[day] = balance.sum()
+
+        return self._report(balance, supply, inflow, wagered, paid, time.perf_counter() - started)
+
+    def _report(self, balance, supply, inflow, wagered, paid, elapsed):
+        """Summarize supply growth, distribution and house edge."""
+        growth = np.diff(supply) / np.maximum(supply[:-1], 1) if self.days > 1 else np.zeros(0)
+
+        return {
+            'members': self.members,
+            'days': self.days,
+            'final_supply': int(supply[-1]),
+            'supply_per_member': float(supply[-1] / self.members),
+            'mean_daily_growth': float(growth.mean()) if growth.size else 0.0,
+            'final_daily_growth': float(growth[-1]) if growth.size else 0.0,
+            'supply_by_day': supply[::max(self.days // 30, 1)].tolist(),
+            'inflow_by_source': inflow,
+            'gini': gini(balance),
+            'top_1pct_share': top_share(balance, 0.01),
+            'house_edge': {
+                game: {
+                    'expected': rules.house_edge(game),
+                    'observed': 1 - paid[game] / wagered[game] if wagered[game] else None,
+                    'wagered': wagered[game]
+                } for game in self.games
+            },
+            'elapsed_seconds': round(elapsed, 3)
+        }
+
+def gini(values):
+    """Gini coefficient of a balance distribution."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    total = values.sum()
+    if not values.size or total == 0:
+        return 0.0
+    ranks = np.arange(1, values.size + 1)
+    return float((2 * np.sum(ranks * values)) / (values.size * total) - (values.size + 1) / values.size)
+
+def top_share(values, fraction):
+    """Share of the total held by the richest fraction of members."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    total = values.sum()
+    if not values.size or total == 0:
+        return 0.0
+    count = max(int(values.size * fraction), 1)
+    return float(values[-count:].sum() / total)
+
+def benchmark(sizes=((100_000, 365), (1_000_000, 365), (1_000_000, 30)), seed=0):
+    """Time the simulator at several scales."""
+    results = []
+    for members, days in sizes:
+        report = EconomySimulator(members=members, days=days, seed=seed).run()
+        results.append({
+            'members': members,
+            'days': days,
+            'elapsed_seconds': report['elapsed_seconds'],
+            'member_days_per_second': int(members * days / max(report['elapsed_seconds'], 1e-9))
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate RosethornBot economy payouts")
+    parser.add_argument('--members', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--activity-alpha', type=float, default=2.0)
+    parser.add_argument('--activity-beta', type=float, default=2.0)
+    parser.add_argument('--gamble-rate', type=float, default=0.1)
+    parser.add_argument('--bet-fraction', type=float, default=0.1)
+    parser.add_argument('--base-reward', type=int, default=rules.BASE_CHECKIN_REWARD)
+    parser.add_argument('--streak-multiplier', type=float, default=rules.STREAK_MULTIPLIER)
+    parser.add_argument('--max-streak-bonus', type=int, default=rules.MAX_STREAK_BONUS)
+    parser.add_argument('--benchmark', action='store_true', help="Time the simulator at several scales")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(json.dumps(benchmark(seed=args.seed), indent=2))
+        return
+
+    simulator = EconomySimulator(
+        members=args.members,
+        days=args.days,
+        seed=args.seed,
+        activity_alpha=args.activity_alpha,
+        activity_beta=args.activity_beta,
+        gamble_rate=args.gamble_rate,
+        bet_fraction=args.bet_fraction,
+        base_reward=args.base_reward,
+        streak_multiplier=args.streak_multiplier,
+        max_streak_bonus=args.max_streak_bonus
+    )
+    print(json.dumps(simulator.run(), indent=2))
+
+if __name__ == "__main__":
+    main()
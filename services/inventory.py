@@ -0,0 +1,158 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from main import db
+from models import ShopItem, Purchase, InventoryItem
+import logging
+
+logger = logging.getLogger(__name__)
+
+class InventoryService:
+    """Materialized per-member inventory kept in step with purchases, use and trades.
+
+    Quantities change only through conditional UPDATEs inside the caller's
+    transaction, so holdings move atomically with the currency or stock change
+    that caused them. Rows are removed when they reach zero, which lets each
+    ``ShopItem.holder_count`` be adjusted exactly when a member gains or loses
+    their last unit.
+    """
+
+    def _adjust_holders(self, item_id, delta):
+        db.session.execute(
+            update(ShopItem)
+            .where(ShopItem.id == item_id)
+            .values(holder_count=func.coalesce(ShopItem.holder_count, 0) + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    def grant(self, guild_id, user_id, item_id, quantity=1):
+        """Add units to a member's holdings; runs inside the caller's transaction."""
+        keys = {'guild_id': str(guild_id), 'user_id': str(user_id), 'item_id': item_id}
+        statement = (
+            update(InventoryItem)
+            .filter_by(**keys)
+            .values(quantity=InventoryItem.quantity + quantity, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.session.execute(statement).rowcount:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(InventoryItem(quantity=quantity, **keys))
+            self._adjust_holders(item_id, 1)
+        except IntegrityError:
+            # Another writer created the row first
+            db.session.execute(statement)
+
+    def consume(self, guild_id, user_id, item_id, quantity=1):
+        """Remove units if the member holds enough; returns False otherwise."""
+        keys = {'guild_id': str(guild_id), 'user_id': str(user_id), 'item_id': item_id}
+        taken = db.session.execute(
+            update(InventoryItem)
+            .filter_by(**keys)
+            .where(InventoryItem.quantity >= quantity)
+            .values(quantity=InventoryItem.quantity - quantity, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if not taken:
+            return False
+
+        emptied = db.session.execute(
+            delete(InventoryItem)
+            .filter_by(**keys)
+            .where(InventoryItem.quantity <= 0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if emptied:
+            self._adjust_holders(item_id, -1)
+        return True
+
+    def transfer(self, guild_id, from_user_id, to_user_id, item_id, quantity=1):
+        """Move units between members; returns False if the sender holds too few."""
+        if not self.consume(guild_id, from_user_id, item_id, quantity):
+            return False
+        self.grant(guild_id, to_user_id, item_id, quantity)
+        return True
+
+    def get_inventory(self, guild_id, user_id):
+        """Read a member's holdings with one indexed lookup."""
+        return (InventoryItem.query
+                .options(joinedload(InventoryItem.item))
+                .filter_by(guild_id=str(guild_id), user_id=str(user_id))
+                .filter(InventoryItem.quantity > 0)
+                .order_by(InventoryItem.acquired_at)
+                .all())
+
+    def holder_counts(self, guild_id):
+        """Map each of a guild's items to the number of members holding it."""
+        return dict(
+            db.session.query(ShopItem.id, func.coalesce(ShopItem.holder_count, 0))
+            .filter(ShopItem.guild_id == str(guild_id))
+            .all()
+        )
+
+    def backfill(self, force=False):
+        """Build the inventory table from purchase history and commit.
+
+        Skipped when inventory rows already exist unless ``force`` is set,
+        since history cannot account for items used or traded since.
+        """
+        try:
+            if not force and db.session.query(InventoryItem.id).first():
+                logger.info("🌹 Inventory already materialized, skipping backfill")
+                return 0
+
+            db.session.execute(delete(InventoryItem))
+            totals = (
+                select(
+                    Purchase.guild_id,
+                    Purchase.user_id,
+                    Purchase.item_id,
+                    func.sum(Purchase.quantity),
+                    func.min(Purchase.purchased_at),
+                    func.max(Purchase.purchased_at)
+                )
+                .group_by(Purchase.guild_id, Purchase.user_id, Purchase.item_id)
+                .having(func.sum(Purchase.quantity) > 0)
+            )
+            rows = db.session.execute(
+                insert(InventoryItem).from_select(
+                    ['guild_id', 'user_id', 'item_id', 'quantity', 'acquired_at', 'updated_at'],
+                    totals
+                )
+            ).rowcount
+
+            holders = (
+                select(func.count(InventoryItem.id))
+                .where(InventoryItem.item_id == ShopItem.id)
+                .scalar_subquery()
+            )
+            db.session.execute(
+                update(ShopItem)
+                .values(holder_count=holders)
+                .execution_options(synchronize_session=False)
+            )
+
+            db.session.commit()
+            logger.info(f"🌹 Backfilled {rows} inventory rows from purchase history")
+            return rows
+        except SQLAlchemyError as e:
+            logger.error(f"Database error backfilling inventory: {e}")
+            db.session.rollback()
+            return 0
+
+if __name__ == "__main__":
+    import argparse
+    import config
+    from main import create_db_app
+
+    parser = argparse.ArgumentParser(description="Rebuild member inventories from purchase history")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if inventory rows exist")
+    args = parser.parse_args()
+
+    with create_db_app(config.DATABASE_URL).app_context():
+        InventoryService().backfill(force=args.force)
@@ -0,0 +1,59 @@
+from bisect import bisect_right
+
+# Single source of truth for XP -> level. Keep this module free of Discord and
+# database imports so the simulator and utils can share it.
+
+XP_PER_LEVEL_STEP = 100
+MAX_LEVEL = 1000
+
+class LevelCurve:
+    """Precomputed XP thresholds with bisect lookup.
+
+    ``thresholds[i]`` is the total XP needed to reach level ``i + 1``; level 1
+    starts at 0 XP. Lookups are O(log n) and handle jumps across any number of
+    levels, so large XP grants land on the correct level in one call.
+    """
+
+    def __init__(self, step=XP_PER_LEVEL_STEP, max_level=MAX_LEVEL):
+        self.step = step
+        self.max_level = max_level
+        self.thresholds = [self.formula(level) for level in range(1, max_level + 1)]
+
+    def formula(self, level):
+        """Total XP needed to reach a level: (level - 1)^2 * step."""
+        return (level - 1) ** 2 * self.step
+
+    def xp_for_level(self, level):
+        """Total XP needed to reach a level."""
+        if level < 1:
+            return 0
+        if level <= self.max_level:
+            return self.thresholds[level - 1]
+        return self.formula(level)
+
+    def level_for_xp(self, xp):
+        """Level reached with this much total XP, capped at ``max_level``."""
+        if not xp or xp < 0:
+            return 1
+        return bisect_right(self.thresholds, xp)
+
+    def advance(self, old_xp, new_xp):
+        """Return (old_level, new_level) for an XP change."""
+        return self.level_for_xp(old_xp), self.level_for_xp(new_xp)
+
+    def progress(self, xp):
+        """Return (level, XP into the level, XP span of the level)."""
+        level = self.level_for_xp(xp)
+        floor = self.xp_for_level(level)
+        span = self.xp_for_level(level + 1) - floor
+        return level, (xp or 0) - floor, span
+
+curve = LevelCurve()
+
+def level_for_xp(xp):
+    """Level reached with this much total XP."""
+    return curve.level_for_xp(xp)
+
+def xp_for_level(level):
+    """Total XP needed to reach a level."""
+    return curve.xp_for_level(level)
@@ -0,0 +1,139 @@
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import select, update, delete, insert, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from main import db
+from models import Member, LevelThreshold
+from services.level_curve import curve as default_curve
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LevelingService:
+    """Keeps stored member levels in step with the shared level curve.
+
+    The curve's thresholds are mirrored into the ``level_threshold`` table so a
+    curve change can be applied with one set-wise UPDATE per id range, using a
+    correlated ``max(level) WHERE min_xp <= member.xp`` lookup served by the
+    ``min_xp`` index, instead of loading members into Python. Re-levelling
+    after a curve change never pays level-up rewards.
+    """
+
+    def __init__(self, curve=None, batch_size=50_000):
+        self.curve = curve or default_curve
+        self.batch_size = batch_size
+
+    def sync_thresholds(self):
+        """Mirror the curve into the threshold table; returns True if it changed."""
+        stored = dict(db.session.query(LevelThreshold.level, LevelThreshold.min_xp).all())
+        wanted = {level: min_xp for level, min_xp in enumerate(self.curve.thresholds, start=1)}
+        if stored == wanted:
+            return False
+
+        db.session.execute(delete(LevelThreshold))
+        db.session.execute(insert(LevelThreshold), [
+            {'level': level, 'min_xp': min_xp} for level, min_xp in wanted.items()
+        ])
+        db.session.commit()
+        logger.info(f"🌹 Stored level curve with {len(wanted)} thresholds")
+        return True
+
+    def relevel_members(self):
+        """Recompute every member's level set-wise; returns the rows changed."""
+        target = func.coalesce(
+            select(func.max(LevelThreshold.level))
+            .where(LevelThreshold.min_xp <= func.coalesce(Member.xp, 0))
+            .scalar_subquery(),
+            1
+        )
+
+        changed = 0
+        max_id = db.session.query(func.max(Member.id)).scalar() or 0
+        try:
+            # Walk the primary key in ranges so no single statement locks the whole table
+            for start in range(0, max_id, self.batch_size):
+                changed += db.session.execute(
+                    update(Member)
+                    .where(
+                        Member.id > start,
+                        Member.id <= start + self.batch_size,
+                        or_(Member.level.is_(None), Member.level != target)
+                    )
+                    .values(level=target)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error re-levelling members: {e}")
+            db.session.rollback()
+
+        logger.info(f"🌹 Re-levelled {changed} members")
+        return changed
+
+    def ensure_curve(self):
+        """Store the current curve and re-level members only if it changed."""
+        if self.sync_thresholds():
+            return self.relevel_members()
+        return 0
+
+def run_benchmark(app, rows=1_000_000, guilds=50, max_xp=5_000_000):
+    """Time bisect lookups and a full set-wise re-level over many members."""
+    rng = random.Random(0)
+    xp_values = [int(rng.paretovariate(1.2) * 100) % max_xp for _ in range(rows)]
+
+    started = time.perf_counter()
+    levels = [default_curve.level_for_xp(xp) for xp in xp_values]
+    lookup_seconds = time.perf_counter() - started
+
+    service = LevelingService()
+    with app.app_context():
+        chunk = 100_000
+        started = time.perf_counter()
+        for offset in range(0, rows, chunk):
+            db.session.execute(insert(Member), [{
+                'user_id': str(i),
+                'guild_id': str(i % guilds),
+                'username': f"member-{i}",
+                'xp': xp_values[i],
+                'level': 1
+            } for i in range(offset, min(offset + chunk, rows))])
+        db.session.commit()
+        load_seconds = time.perf_counter() - started
+
+        service.sync_thresholds()
+        started = time.perf_counter()
+        changed = service.relevel_members()
+        relevel_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        unchanged = service.relevel_members()
+        noop_seconds = time.perf_counter() - started
+
+        stored = [level for (level,) in db.session.query(Member.level).order_by(Member.id)]
+
+    return {
+        'rows': rows,
+        'bisect_lookups_per_second': int(rows / max(lookup_seconds, 1e-9)),
+        'load_seconds': round(load_seconds, 3),
+        'relevel_seconds': round(relevel_seconds, 3),
+        'relevel_rows_changed': changed,
+        'noop_relevel_seconds': round(noop_seconds, 3),
+        'noop_rows_changed': unchanged,
+        'matches_bisect': stored == levels,
+        'max_level': max(levels)
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark level lookups and bulk re-levelling")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    from main import create_db_app
+
+    app = create_db_app(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'leveling.db')}")
+    print(json.dumps(run_benchmark(app, rows=args.rows), indent=2))
@@ -0,0 +1,340 @@
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import discord
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from main import db
+from models import Member, ShopItem, Purchase, StockReservation
+from services.economy_aggregates import EconomyAggregates
+from services.inventory import InventoryService
+
+logger = logging.getLogger(__name__)
+
+class PurchasePipeline:
+    """Reservation-based shop purchases that never hold locks across Discord calls.
+
+    A purchase is split into three short transactions:
+
+    1. ``reserve`` debits the buyer and takes stock with conditional UPDATEs
+       (``balance >= cost`` / ``stock >= quantity``), so concurrent buyers can
+       never oversell and no row is read-modified-written in Python.
+    2. Slow work such as granting ``role_reward`` runs with no transaction open.
+    3. ``confirm`` records the purchase and inventory, or ``compensate`` refunds the buyer and
+       returns the stock if the slow step failed.
+
+    Reservations left pending by a crash are released by ``release_stale_reservations``.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.reservation_timeout = timedelta(minutes=5)
+        self.aggregates = EconomyAggregates()
+        self.inventory = InventoryService()
+
+    def _context(self):
+        """Open an app context when running outside the caller's one."""
+        if self.app is not None:
+            return self.app.app_context()
+        return contextlib.nullcontext()
+
+    async def reserve(self, guild_id, user_id, item_id, quantity=1):
+        """Debit the buyer and take stock atomically, returning a reservation."""
+        with self._context():
+            try:
+                item = db.session.get(ShopItem, item_id)
+                if not item or not item.purchasable or str(item.guild_id) != str(guild_id):
+                    return None, "Item not found or unavailable"
+
+                total_cost = item.price * quantity
+
+                # Debit first so the hot shop_item row is locked for the shortest time
+                paid = db.session.execute(
+                    update(Member)
+                    .where(
+                        Member.guild_id == str(guild_id),
+                        Member.user_id == str(user_id),
+                        Member.balance >= total_cost
+                    )
+                    .values(balance=Member.balance - total_cost)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+
+                if not paid:
+                    db.session.rollback()
+                    return None, "Insufficient funds"
+
+                if item.stock != -1:
+                    taken = db.session.execute(
+                        update(ShopItem)
+                        .where(ShopItem.id == item.id, ShopItem.stock >= quantity)
+                        .values(stock=ShopItem.stock - quantity)
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+
+                    if not taken:
+                        db.session.rollback()
+                        return None, "Insufficient stock"
+
+                reservation = StockReservation(
+                    guild_id=str(guild_id),
+                    user_id=str(user_id),
+                    item_id=item.id,
+                    quantity=quantity,
+                    total_cost=total_cost
+                )
+                db.session.add(reservation)
+                db.session.flush()
+
+                new_balance = db.session.query(Member.balance).filter_by(
+                    guild_id=str(guild_id),
+                    user_id=str(user_id)
+                ).scalar()
+                self.aggregates.record(guild_id, user_id, -total_cost, 'shop', new_balance)
+
+                result = {
+                    'reservation_id': reservation.id,
+                    'guild_id': str(guild_id),
+                    'user_id': str(user_id),
+                    'item_id': item.id,
+                    'item_name': item.name,
+                    'role_reward': item.role_reward,
+                    'quantity': quantity,
+                    'total_cost': total_cost,
+                    'new_balance': new_balance
+                }
+
+                db.session.commit()
+                return result, None
+            except SQLAlchemyError as e:
+                logger.error(f"Database error reserving item {item_id}: {e}")
+                db.session.rollback()
+                return None, "Purchase failed"
+
+    async def confirm(self, reservation):
+        """Turn a pending reservation into a purchase record."""
+        with self._context():
+            try:
+                confirmed = db.session.execute(
+                    update(StockReservation)
+                    .where(
+                        StockReservation.id == reservation['reservation_id'],
+                        StockReservation.status == 'pending'
+                    )
+                    .values(status='confirmed', resolved_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+
+                if not confirmed:
+                    # Already released by the stale reservation sweeper
+                    db.session.rollback()
+                    return False
+
+                db.session.add(Purchase(
+                    guild_id=reservation['guild_id'],
+                    user_id=reservation['user_id'],
+                    item_id=reservation['item_id'],
+                    quantity=reservation['quantity'],
+                    total_cost=reservation['total_cost']
+                ))
+                self.inventory.grant(
+                    reservation['guild_id'],
+                    reservation['user_id'],
+                    reservation['item_id'],
+                    reservation['quantity']
+                )
+                db.session.commit()
+                return True
+            except SQLAlchemyError as e:
+                logger.error(f"Database error confirming reservation {reservation['reservation_id']}: {e}")
+                db.session.rollback()
+                return False
+
+    async def compensate(self, reservation, reason="Reward grant failed"):
+        """Release a pending reservation, refunding the buyer and restocking."""
+        with self._context():
+            try:
+                released = db.session.execute(
+                    update(StockReservation)
+                    .where(
+                        StockReservation.id == reservation['reservation_id'],
+                        StockReservation.status == 'pending'
+                    )
+                    .values(status='released', resolved_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+
+                if not released:
+                    db.session.rollback()
+                    return False
+
+                db.session.execute(
+                    update(Member)
+                    .where(
+                        Member.guild_id == reservation['guild_id'],
+                        Member.user_id == reservation['user_id']
+                    )
+                    .values(balance=Member.balance + reservation['total_cost'])
+                    .execution_options(synchronize_session=False)
+                )
+                refunded_balance = db.session.query(Member.balance).filter_by(
+                    guild_id=reservation['guild_id'],
+                    user_id=reservation['user_id']
+                ).scalar()
+                self.aggregates.record(
+                    reservation['guild_id'],
+                    reservation['user_id'],
+                    reservation['total_cost'],
+                    'refund',
+                    refunded_balance
+                )
+                db.session.execute(
+                    update(ShopItem)
+                    .where(ShopItem.id == reservation['item_id'], ShopItem.stock != -1)
+                    .values(stock=ShopItem.stock + reservation['quantity'])
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+
+                logger.info(f"Released reservation {reservation['reservation_id']}: {reason}")
+                return True
+            except SQLAlchemyError as e:
+                logger.error(f"Database error releasing reservation {reservation['reservation_id']}: {e}")
+                db.session.rollback()
+                return False
+
+    async def purchase(self, guild, member, item_id, quantity=1):
+        """Reserve, grant the role reward outside the transaction, then confirm or compensate."""
+        reservation, error = await self.reserve(guild.id, member.id, item_id, quantity)
+        if error:
+            return None, error
+
+        role = None
+        if reservation['role_reward']:
+            try:
+                role = guild.get_role(int(reservation['role_reward']))
+                if not role:
+                    raise ValueError(f"Role {reservation['role_reward']} no longer exists")
+                if role not in member.roles:
+                    await member.add_roles(role, reason=f"Purchased {reservation['item_name']}")
+            except (ValueError, discord.Forbidden, discord.HTTPException) as e:
+                logger.warning(f"Role reward for reservation {reservation['reservation_id']} failed: {e}")
+                await self.compensate(reservation, reason=str(e))
+                return None, "The role reward could not be granted, so thy purchase was refunded"
+
+        if not await self.confirm(reservation):
+            if role:
+                try:
+                    await member.remove_roles(role, reason="Purchase reservation expired")
+                except (discord.Forbidden, discord.HTTPException):
+                    pass
+            return None, "Thy reservation expired before it could be confirmed"
+
+        reservation['role'] = role
+        return reservation, None
+
+    async def release_stale_reservations(self):
+        """Compensate reservations left pending longer than the timeout."""
+        cutoff = datetime.utcnow() - self.reservation_timeout
+
+        with self._context():
+            stale = StockReservation.query.filter(
+                StockReservation.status == 'pending',
+                StockReservation.created_at < cutoff
+            ).all()
+            stale = [{
+                'reservation_id': r.id,
+                'guild_id': r.guild_id,
+                'user_id': r.user_id,
+                'item_id': r.item_id,
+                'quantity': r.quantity,
+                'total_cost': r.total_cost
+            } for r in stale]
+
+        released = 0
+        for reservation in stale:
+            if await self.compensate(reservation, reason="Reservation timed out"):
+                released += 1
+
+        if released:
+            logger.info(f"🌹 Released {released} stale stock reservations")
+        return released
+
+def run_load_test(app, buyers=300, units=10, workers=32, grant_latency=0.05, grant_failure_rate=0.1):
+    """Race many buyers for a limited drop and check nothing is oversold."""
+    guild_id = "load-test"
+    price = 100
+    pipeline = PurchasePipeline(app)
+
+    with app.app_context():
+        item = ShopItem(
+            guild_id=guild_id,
+            name="Limited Drop",
+            price=price,
+            stock=units,
+            role_reward="1"
+        )
+        db.session.add(item)
+        for i in range(buyers):
+            db.session.add(Member(
+                user_id=str(i),
+                guild_id=guild_id,
+                username=f"buyer-{i}",
+                balance=price
+            ))
+        db.session.commit()
+        item_id = item.id
+
+    async def buy(user_id):
+        reservation, error = await pipeline.reserve(guild_id, user_id, item_id)
+        if error:
+            return error
+        # Stand-in for the Discord role grant, run with no transaction open
+        await asyncio.sleep(grant_latency)
+        if random.random() < grant_failure_rate:
+            await pipeline.compensate(reservation, reason="Simulated grant failure")
+            return "compensated"
+        await pipeline.confirm(reservation)
+        return "confirmed"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(lambda i: asyncio.run(buy(str(i))), range(buyers)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        remaining = db.session.get(ShopItem, item_id).stock
+        purchased = db.session.query(db.func.coalesce(db.func.sum(Purchase.quantity), 0)).filter_by(item_id=item_id).scalar()
+        spent = (buyers * price) - db.session.query(db.func.sum(Member.balance)).filter_by(guild_id=guild_id).scalar()
+        pending = StockReservation.query.filter_by(item_id=item_id, status='pending').count()
+
+    report = {
+        'buyers': buyers,
+        'units': units,
+        'confirmed': outcomes.count('confirmed'),
+        'compensated': outcomes.count('compensated'),
+        'rejected': len([o for o in outcomes if o not in ('confirmed', 'compensated')]),
+        'purchased': purchased,
+        'remaining_stock': remaining,
+        'currency_spent': spent,
+        'pending_reservations': pending,
+        'elapsed_seconds': round(elapsed, 3),
+        'oversold': purchased + remaining != units or remaining < 0,
+        'balances_consistent': spent == purchased * price
+    }
+    return report
+
+if __name__ == "__main__":
+    import json
+
+    from main import create_db_app
+
+    # A throwaway SQLite file, so the load test never touches the bot's database
+    app = create_db_app(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}")
+    print(json.dumps(run_load_test(app), indent=2))
@@ -0,0 +1,182 @@
+import argparse
+import json
+import math
+import random
+
+HOUR = 3600
+DAY = 24 * HOUR
+SLOTS = 96  # Quarter-hour buckets in the time-of-day profile
+SLOT = DAY // SLOTS
+
+class Cadence:
+    """Learned posting rhythm of one account.
+
+    Keeps an exponentially weighted mean of the gap between posts and a
+    decaying profile of the UTC quarter-hours posts land in. The poll
+    interval is a fraction of the expected gap, so an account that posts
+    hourly is checked every few minutes and one that posts monthly is checked
+    at the slowest allowed rate. The interval tightens during the account's busy
+    times of day. Silence counts as evidence too: the expected gap is never shorter
+    than the time since the last post, or since tracking began. Accounts that
+    rarely post therefore slow down without first waiting for a history.
+    Timestamps are epoch seconds.
+    """
+
+    alpha = 0.3  # Weight of the newest gap in the mean
+    profile_decay = 0.05  # Share of the profile forgotten per post
+    fraction = 0.1  # Poll this often relative to the expected gap
+    warmup_posts = 3  # Posts needed before the learned cadence is trusted
+
+    def __init__(self, tracked_since, mean_interval=None, last_post_at=None, posts=0, profile=None):
+        self.tracked_since = tracked_since
+        self.mean_interval = mean_interval
+        self.last_post_at = last_post_at
+        self.posts = posts
+        self.profile = list(profile) if profile else [0.0] * SLOTS
+
+    def observe(self, posted_at):
+        """Fold in a post; returns False for one already seen."""
+        if self.last_post_at is not None and posted_at <= self.last_post_at:
+            return False
+
+        if self.last_post_at is not None:
+            gap = posted_at - self.last_post_at
+            if self.mean_interval is None:
+                self.mean_interval = gap
+            else:
+                self.mean_interval = self.alpha * gap + (1 - self.alpha) * self.mean_interval
+
+        self.profile = [weight * (1 - self.profile_decay) for weight in self.profile]
+        self.profile[int(posted_at % DAY // SLOT)] += 1
+        self.last_post_at = posted_at
+        self.posts += 1
+        return True
+
+    def time_weight(self, at):
+        """Posting activity at the time of day of ``at`` relative to an even spread; 1 is average."""
+        total = sum(self.profile)
+        if not total:
+            return 1.0
+        # One pseudo-post spread over the day keeps a thin profile from going to zero
+        return (self.profile[int(at % DAY // SLOT)] + 1 / SLOTS) / (total + 1) * SLOTS
+
+    def usual_start(self, at, lead=SLOT):
+        """Whether ``at`` falls in, or ``lead`` seconds before, a time this account usually starts."""
+        if self.posts < self.warmup_posts:
+            return False
+        return self.time_weight(at) >= 8 or self.time_weight(at + lead) >= 8
+
+    def poll_interval(self, now, minimum, maximum, default, live=None):
+        """Seconds until the next poll, between ``minimum`` and ``maximum``.
+
+        ``live`` is the faster interval for live-stream sources, used around
+        the times the account usually goes live.
+        """
+        if live and self.usual_start(now):
+            return live
+
+        if self.posts < self.warmup_posts or not self.mean_interval:
+            # Not enough history; start at the default and back off through silence
+            expected = max(default / self.fraction, (now - self.tracked_since) / (self.posts + 1))
+            return min(max(expected * self.fraction, minimum), maximum)
+
+        expected = max(self.mean_interval, now - self.last_post_at)
+        interval = expected * self.fraction / min(max(self.time_weight(now), 0.25), 4)
+        return min(max(interval, minimum), maximum)
+
+    def to_dict(self):
+        return {
+            'tracked_since': self.tracked_since,
+            'mean_interval': self.mean_interval,
+            'last_post_at': self.last_post_at,
+            'posts': self.posts,
+            'profile': [round(weight, 4) for weight in self.profile]
+        }
+
+def simulate(accounts=200, days=30, fixed=300, minimum=300, maximum=3600, live=60, seed=None):
+    """Compare fixed-interval polling with cadence-adaptive polling.
+
+    Accounts post as Poisson processes with mean gaps from an hour to a year,
+    bunched around a preferred hour of the day. Every fifth account is a
+    streamer that goes live near the same time each day. Reports polls made
+    and the delay from post, or stream start, to the poll that first sees it.
+    """
+    rng = random.Random(seed)
+    horizon = days * DAY
+    report = {}
+
+    population = []
+    for index in range(accounts):
+        streamer = index % 5 == 0
+        mean_gap = DAY if streamer else math.exp(rng.uniform(math.log(HOUR), math.log(365 * DAY)))
+        peak = rng.randrange(24)
+        posts = []
+        t = rng.expovariate(1 / mean_gap)
+        while t < horizon:
+            if streamer:
+                day_start = t - t % DAY
+                posts.append(day_start + peak * HOUR + rng.gauss(0, 600))
+                t = day_start + DAY + rng.expovariate(1 / mean_gap) % DAY
+            else:
+                # Two thirds of posts land within two hours of the peak hour
+                if rng.random() < 2 / 3:
+                    day_start = t - t % DAY
+                    posts.append(day_start + peak * HOUR + rng.uniform(-2 * HOUR, 2 * HOUR))
+                else:
+                    posts.append(t)
+                t += rng.expovariate(1 / mean_gap)
+        population.append((streamer, sorted(p for p in posts if 0 <= p < horizon)))
+
+    def summary(delays):
+        delays.sort()
+        return {
+            'mean': round(sum(delays) / len(delays), 1) if delays else None,
+            'p50': round(delays[len(delays) // 2], 1) if delays else None,
+            'p90': round(delays[min(int(len(delays) * 0.9), len(delays) - 1)], 1) if delays else None,
+            'max': round(delays[-1], 1) if delays else None
+        }
+
+    for policy in ('fixed', 'adaptive'):
+        polls = 0
+        delays = []
+        stream_delays = []
+        for streamer, posts in population:
+            now = rng.uniform(0, fixed)
+            cadence = Cadence(now)
+            pending = 0  # Index of the first post not yet seen
+            while now < horizon:
+                polls += 1
+                while pending < len(posts) and posts[pending] <= now:
+                    (stream_delays if streamer else delays).append(now - posts[pending])
+                    cadence.observe(posts[pending])
+                    pending += 1
+                if policy == 'fixed':
+                    now += fixed
+                else:
+                    now += cadence.poll_interval(now, minimum, maximum, fixed, live=live if streamer else None)
+        report[policy] = {
+            'polls': polls,
+            'posts_seen': len(delays) + len(stream_delays),
+            'post_delay_seconds': summary(delays),
+            'stream_delay_seconds': summary(stream_delays)
+        }
+
+    report['poll_reduction'] = round(report['fixed']['polls'] / max(report['adaptive']['polls'], 1), 1)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fixed and cadence-adaptive social polling")
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--fixed', type=int, default=300, help="Fixed poll interval in seconds")
+    parser.add_argument('--min-interval', type=int, default=300)
+    parser.add_argument('--max-interval', type=int, default=3600)
+    parser.add_argument('--live-interval', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(simulate(args.accounts, args.days, args.fixed, args.min_interval,
+                              args.max_interval, args.live_interval, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+import discord
+import config
+from services.social_scheduler import TokenBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lower goes first; a stream going live is only worth announcing promptly
+PLATFORM_PRIORITY = {'twitch': 0, 'youtube': 1, 'twitter': 2}
+
+WEBHOOK_NAME = "Rosethorn Announcements"
+MAX_EMBEDS = 10  # Per Discord message
+
+class AnnouncementDelivery:
+    """Outbound queue for social announcements, sent through per-channel webhooks.
+
+    Each announcement channel gets one bot-owned webhook, found or created on
+    first use and then cached. Webhook executions are rate limited per webhook
+    rather than against the bot's channel-message buckets. A burst, such as a
+    streamer going live in hundreds of guilds, is therefore spread over many
+    independent buckets. The client side paces each webhook with its own
+    token bucket.
+
+    Posts for a channel wait ``SOCIAL_COALESCE_SECONDS`` so others that arrive
+    together are sent as one message of up to ten embeds. Ready channels are
+    served by priority: live streams, then videos, then posts. Channels where
+    the bot cannot manage webhooks fall back to ``channel.send``.
+
+    Rate limits and server errors are retried with backoff. If Discord rejects
+    a message outright, its posts are resent one at a time, so a single bad
+    embed costs only its own post. Failures are counted per post.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.bot = service.bot
+        self.workers = config.SOCIAL_DELIVERY_WORKERS
+        self.coalesce_seconds = config.SOCIAL_COALESCE_SECONDS
+        self.retries = 3  # Attempts per message on 429s and 5xx replies
+
+        self.pending = {}  # channel_id -> list of (config, post, enqueued_at)
+        self._ready = []  # (priority, seq, channel_id)
+        self._queued = set()  # Channels waiting out the coalesce window or in _ready
+        self._sending = set()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+        self.webhooks = {}  # channel_id -> discord.Webhook, or None if not permitted
+        self.buckets = {}  # channel_id -> TokenBucket
+
+        self.messages = 0
+        self.delivered = 0
+        self.fallbacks = 0
+        self.failures = 0
+        self.queue_latency = deque(maxlen=1000)  # Seconds from enqueue to send
+
+    def start(self):
+        """Start the delivery workers; safe to call more than once."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def enqueue(self, config, post):
+        """Queue a post for a subscription's channel; returns immediately."""
+        channel_id = int(config.announcement_channel)
+        self.pending.setdefault(channel_id, []).append((config, post, time.monotonic()))
+        if channel_id not in self._queued and channel_id not in self._sending:
+            self._queued.add(channel_id)
+            asyncio.get_running_loop().call_later(self.coalesce_seconds, self._mark_ready, channel_id)
+
+    def _mark_ready(self, channel_id):
+        items = self.pending.get(channel_id)
+        if not items:
+            self._queued.discard(channel_id)
+            return
+        priority = min(PLATFORM_PRIORITY.get(post.platform, 3) for _, post, _ in items)
+        heapq.heappush(self._ready, (priority, next(self._seq), channel_id))
+        self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, channel_id = heapq.heappop(self._ready)
+            self._queued.discard(channel_id)
+            self._sending.add(channel_id)
+            try:
+                batch = self.pending.pop(channel_id, [])
+                for start in range(0, len(batch), MAX_EMBEDS):
+                    chunk = batch[start:start + MAX_EMBEDS]
+                    try:
+                        await self._send(channel_id, chunk)
+                    except Exception as e:
+                        self.failures += len(chunk)
+                        logger.error(f"Error delivering announcements to {channel_id}: {e}")
+            finally:
+                self._sending.discard(channel_id)
+                if self.pending.get(channel_id):
+                    # More arrived while sending; they get their own coalesce window
+                    self._queued.add(channel_id)
+                    asyncio.get_running_loop().call_later(self.coalesce_seconds, self._mark_ready, channel_id)
+
+    async def _webhook_for(self, channel):
+        """The channel's announcement webhook, or None where the bot may not manage webhooks."""
+        if channel.id in self.webhooks:
+            return self.webhooks[channel.id]
+
+        webhook = None
+        try:
+            for existing in await channel.webhooks():
+                if existing.name == WEBHOOK_NAME and existing.token:
+                    webhook = existing
+                    break
+            if not webhook:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Social media announcements")
+        except (discord.Forbidden, AttributeError):
+            webhook = None  # No Manage Webhooks, or not a text channel
+        self.webhooks[channel.id] = webhook
+        return webhook
+
+    def _bucket(self, channel_id):
+        if channel_id not in self.buckets:
+            # Discord allows a webhook about five executions every two seconds
+            self.buckets[channel_id] = TokenBucket(2.5, 5)
+        return self.buckets[channel_id]
+
+    async def _post(self, channel, embeds):
+        """Send one message of embeds, retrying rate limits and server errors with backoff."""
+        for attempt in range(self.retries):
+            webhook = await self._webhook_for(channel)
+            await self._bucket(channel.id).acquire()
+            try:
+                if webhook:
+                    await webhook.send(
+                        embeds=embeds,
+                        username=self.bot.user.display_name,
+                        avatar_url=self.bot.user.display_avatar.url
+                    )
+                else:
+                    self.fallbacks += 1
+                    await channel.send(embeds=embeds)
+                return
+            except discord.NotFound:
+                if not webhook:
+                    raise  # The channel itself is gone
+                # The webhook was deleted; find or make another on the next attempt
+                self.webhooks.pop(channel.id, None)
+            except discord.HTTPException as e:
+                if (e.status != 429 and e.status < 500) or attempt == self.retries - 1:
+                    raise
+                await asyncio.sleep(min(2 ** attempt, 10) * random.uniform(0.5, 1.5))
+        raise discord.DiscordException(f"Gave up sending to {channel.id} after {self.retries} attempts")
+
+    async def _send(self, channel_id, batch):
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            self.failures += len(batch)
+            return
+
+        embeds = [self.service.fetchers.plugin(post.platform).embed(post) for _, post, _ in batch]
+        sent = []
+        try:
+            await self._post(channel, embeds)
+            sent = batch
+            self.messages += 1
+        except discord.HTTPException as e:
+            if len(batch) == 1 or e.status == 429 or e.status >= 500:
+                self.failures += len(batch)
+                logger.error(f"Error delivering {len(batch)} announcements to {channel_id}: {e}")
+            else:
+                # A client error such as one invalid embed; send singly so only the bad post is lost
+                for item, embed in zip(batch, embeds):
+                    try:
+                        await self._post(channel, [embed])
+                        sent.append(item)
+                        self.messages += 1
+                    except discord.HTTPException as error:
+                        self.failures += 1
+                        logger.error(f"Error delivering {item[1].platform} post {item[1].id} to {channel_id}: {error}")
+
+        if not sent:
+            return
+        now = time.monotonic()
+        for _, _, enqueued_at in sent:
+            self.queue_latency.append(now - enqueued_at)
+        self.delivered += len(sent)
+        await self.service.delivered([(config, post) for config, post, _ in sent])
+
+    def stats(self):
+        """Queue depth, coalescing and latency figures for monitoring."""
+        samples = sorted(self.queue_latency)
+        return {
+            'queued_posts': sum(len(items) for items in self.pending.values()),
+            'ready_channels': len(self._ready),
+            'messages': self.messages,
+            'posts_delivered': self.delivered,
+            'posts_coalesced': self.delivered - self.messages,
+            'fallbacks': self.fallbacks,
+            'failures': self.failures,
+            'webhooks': sum(1 for webhook in self.webhooks.values() if webhook),
+            'queue_latency_seconds': {
+                'p50': round(samples[len(samples) // 2], 2),
+                'p90': round(samples[min(int(len(samples) * 0.9), len(samples) - 1)], 2),
+                'max': round(samples[-1], 2)
+            } if samples else {}
+        }
@@ -0,0 +1,439 @@
+import os
+import asyncio
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+import aiohttp
+import discord
+import config
+from services.social_http import ConditionalHTTP
+from services.social_scheduler import TokenBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One post, stream or video, normalised across platforms; ``fields`` are extra embed fields
+Post = namedtuple('Post', 'id platform username author title text url posted_at image fields')
+
+PLATFORMS = {}  # name -> fetcher class
+
+def register(cls):
+    """Class decorator adding a platform fetcher to the registry."""
+    PLATFORMS[cls.name] = cls
+    return cls
+
+def parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class PlatformFetcher:
+    """A platform plugin: how to fetch an account's latest posts and how to show one.
+
+    ``latest`` returns posts newest first, going through ``SocialFetchers.get_json``
+    so every plugin shares the connection pool, response cache, rate limit and
+    retry policy. ``new_posts`` picks the ones a subscriber has not seen, given
+    its cursor (the id of the last post announced to it).
+    """
+
+    name = None
+    label = None
+    color = 0x711417
+    icon_url = None
+    title = None
+    footer = None
+    reset_header = None  # Epoch seconds at which a 429 lifts
+
+    def __init__(self, fetchers):
+        self.fetchers = fetchers
+
+    def enabled(self):
+        """Whether credentials for the platform are configured."""
+        return True
+
+    async def start(self):
+        pass
+
+    async def latest(self, username, cursors):
+        """Newest posts for an account as ``Post`` tuples, newest first.
+
+        ``cursors`` holds each subscription's ``last_post_id``, so a plugin can
+        ask the API only for posts after the oldest of them. Plugins override
+        this; the base has nothing to fetch.
+        """
+        return []
+
+    def new_posts(self, posts, cursor):
+        """Posts ahead of ``cursor`` in a newest-first list."""
+        new = []
+        for post in posts:
+            if post.id == cursor:
+                break
+            new.append(post)
+        return new
+
+    def retry_after(self, headers, default=60):
+        """Seconds until the platform's rate limit resets."""
+        try:
+            return max(float(headers[self.reset_header]) - time.time(), 1)
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def embed(self, post):
+        """The Discord announcement for a post."""
+        embed = discord.Embed(
+            title=self.title,
+            description=(post.title or post.text or '')[:2000],
+            color=self.color,
+            url=post.url,
+            timestamp=post.posted_at
+        )
+        embed.set_author(name=post.author or post.username, icon_url=self.icon_url)
+
+        if post.title and post.text:
+            embed.add_field(
+                name="📝 Description",
+                value=post.text[:500] + ("..." if len(post.text) > 500 else ""),
+                inline=False
+            )
+        for name, value, inline in post.fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        if post.image:
+            embed.set_image(url=post.image)
+
+        embed.set_footer(text=self.footer)
+        return embed
+
+@register
+class TwitterFetcher(PlatformFetcher):
+    name = 'twitter'
+    label = 'Twitter/X'
+    icon_url = "https://abs.twimg.com/icons/apple-touch-icon-192x192.png"
+    title = "🐦 New Tweet"
+    footer = "Posted on Twitter/X 🌹"
+    reset_header = 'x-rate-limit-reset'
+
+    def __init__(self, fetchers):
+        super().__init__(fetchers)
+        self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN', '')
+        self.user_ids = {}  # username -> user id, which never changes
+
+    def enabled(self):
+        return bool(self.bearer_token)
+
+    def _headers(self):
+        return {'Authorization': f'Bearer {self.bearer_token}', 'User-Agent': 'RosethornBot/2.0'}
+
+    async def latest(self, username, cursors):
+        user_id = self.user_ids.get(username.lower())
+        if not user_id:
+            result = await self.fetchers.get_json(
+                self.name, f'{config.TWITTER_API_BASE}/users/by/username/{username}', headers=self._headers()
+            )
+            if result.status != 200 or 'data' not in result.data:
+                return []
+            user_id = self.user_ids[username.lower()] = result.data['data']['id']
+
+        params = {
+            'max_results': 10,
+            'tweet.fields': 'created_at,public_metrics',
+            'expansions': 'author_id'
+        }
+        # One request covers every subscriber: start from the oldest cursor
+        if cursors and all(cursors):
+            params['since_id'] = min(cursors, key=int)
+
+        result = await self.fetchers.get_json(
+            self.name, f'{config.TWITTER_API_BASE}/users/{user_id}/tweets', params=params, headers=self._headers()
+        )
+        if result.status != 200:
+            return []
+
+        posts = []
+        for tweet in result.data.get('data', []):
+            metrics = tweet.get('public_metrics', {})
+            fields = []
+            if metrics:
+                fields.append((
+                    "📊 Engagement",
+                    f"❤️ {metrics.get('like_count', 0)} | "
+                    f"🔄 {metrics.get('retweet_count', 0)} | "
+                    f"💬 {metrics.get('reply_count', 0)}",
+                    False
+                ))
+            posts.append(Post(
+                id=tweet['id'],
+                platform=self.name,
+                username=username,
+                author=f"@{username}",
+                title=None,
+                text=tweet['text'],
+                url=f"https://twitter.com/{username}/status/{tweet['id']}",
+                posted_at=parse_timestamp(tweet['created_at']),
+                image=None,
+                fields=fields
+            ))
+        return posts
+
+    def new_posts(self, posts, cursor):
+        # Snowflake ids order by time, so a deleted cursor tweet does not replay the page
+        return [post for post in posts if not cursor or int(post.id) > int(cursor)]
+
+@register
+class YouTubeFetcher(PlatformFetcher):
+    name = 'youtube'
+    label = 'YouTube'
+    icon_url = "https://www.youtube.com/s/desktop/12345678/img/favicon_144x144.png"
+    title = "📺 New YouTube Video"
+    footer = "New video on YouTube 🌹"
+
+    def __init__(self, fetchers):
+        super().__init__(fetchers)
+        self.api_key = os.getenv('YOUTUBE_API_KEY', '')
+        self.channel_ids = {}  # username -> channel id
+
+    def enabled(self):
+        return bool(self.api_key)
+
+    async def resolve_channel(self, username):
+        """Look up a channel ID by legacy username, then by handle."""
+        channel_id = self.channel_ids.get(username.lower())
+        if channel_id:
+            self.fetchers.http.record_quota_saved(1)
+            return channel_id
+
+        url = f'{config.YOUTUBE_API_BASE}/channels'
+        for params in ({'forUsername': username}, {'forHandle': f"@{username}"}):
+            result = await self.fetchers.get_json(
+                self.name, url, params={'key': self.api_key, 'part': 'id', **params}, quota=1
+            )
+            channels = result.data.get('items', []) if result.data else []
+            if channels:
+                self.channel_ids[username.lower()] = channels[0]['id']
+                return channels[0]['id']
+        return None
+
+    async def latest(self, username, cursors):
+        channel_id = await self.resolve_channel(username)
+        if not channel_id:
+            return []
+
+        # The uploads playlist lists new videos for 1 quota unit; search.list costs 100
+        result = await self.fetchers.get_json(
+            self.name,
+            f'{config.YOUTUBE_API_BASE}/playlistItems',
+            params={'key': self.api_key, 'playlistId': 'UU' + channel_id[2:], 'part': 'snippet', 'maxResults': 5},
+            quota=1
+        )
+        self.fetchers.http.record_quota_saved(99)
+        if result.status != 200:
+            return []
+
+        posts = [self.post(item['snippet']) for item in result.data.get('items', [])]
+        posts.sort(key=lambda post: post.posted_at, reverse=True)
+        return posts
+
+    def post(self, snippet, username=None):
+        """A Post from a Data API snippet, or one shaped like it."""
+        video_id = snippet['resourceId']['videoId']
+        return Post(
+            id=video_id,
+            platform=self.name,
+            username=username or snippet.get('channelTitle', ''),
+            author=snippet.get('channelTitle', ''),
+            title=snippet['title'],
+            text=snippet.get('description', ''),
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            posted_at=parse_timestamp(snippet['publishedAt']),
+            image=snippet.get('thumbnails', {}).get('high', {}).get('url'),
+            fields=[]
+        )
+
+@register
+class TwitchFetcher(PlatformFetcher):
+    name = 'twitch'
+    label = 'Twitch'
+    icon_url = "https://static.twitchcdn.net/assets/favicon-32-d6025c14e900565d6177.png"
+    title = "🔴 LIVE on Twitch!"
+    footer = "Now streaming on Twitch 🌹"
+    reset_header = 'Ratelimit-Reset'
+
+    def __init__(self, fetchers):
+        super().__init__(fetchers)
+        self.client_id = os.getenv('TWITCH_CLIENT_ID', '')
+        self.client_secret = os.getenv('TWITCH_CLIENT_SECRET', '')
+        self.token = None
+        self.token_expires = None
+        self.user_ids = {}  # login -> user id
+
+    def enabled(self):
+        return bool(self.client_id and self.client_secret)
+
+    async def start(self):
+        await self.refresh_token()
+
+    async def refresh_token(self):
+        """Refresh the app access token."""
+        if not self.enabled():
+            return
+
+        try:
+            data = {
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'grant_type': 'client_credentials'
+            }
+            async with self.fetchers.session.post('https://id.twitch.tv/oauth2/token', data=data) as resp:
+                if resp.status == 200:
+                    token_data = await resp.json()
+                    self.token = token_data.get('access_token')
+                    expires_in = token_data.get('expires_in', 3600)
+                    self.token_expires = datetime.utcnow() + timedelta(seconds=expires_in - 300)
+                    logger.info("🟣 Twitch API token refreshed")
+        except Exception as e:
+            logger.error(f"Failed to refresh Twitch token: {e}")
+
+    async def latest(self, username, cursors):
+        if not self.token or (self.token_expires and datetime.utcnow() >= self.token_expires):
+            await self.refresh_token()
+        if not self.token:
+            return []
+        headers = {'Client-ID': self.client_id, 'Authorization': f'Bearer {self.token}'}
+
+        user_id = self.user_ids.get(username.lower())
+        if not user_id:
+            result = await self.fetchers.get_json(
+                self.name, f'{config.TWITCH_API_BASE}/users', params={'login': username}, headers=headers
+            )
+            users = result.data.get('data', []) if result.data else []
+            if not users:
+                return []
+            user_id = self.user_ids[username.lower()] = users[0]['id']
+
+        result = await self.fetchers.get_json(
+            self.name, f'{config.TWITCH_API_BASE}/streams', params={'user_id': user_id}, headers=headers
+        )
+        if result.status != 200:
+            return []
+
+        posts = []
+        for stream in result.data.get('data', []):
+            fields = []
+            if stream.get('game_name'):
+                fields.append(("🎮 Playing", stream['game_name'], True))
+            fields.append(("👀 Viewers", f"{stream['viewer_count']:,}", True))
+            posts.append(Post(
+                id=stream['id'],
+                platform=self.name,
+                username=username,
+                author=stream['user_name'],
+                title=None,
+                text=stream['title'],
+                url=f"https://www.twitch.tv/{username}",
+                posted_at=parse_timestamp(stream['started_at']),
+                image=stream['thumbnail_url'].replace('{width}', '640').replace('{height}', '360'),
+                fields=fields
+            ))
+        return posts
+
+class SocialFetchers:
+    """The platform plugins plus what they share.
+
+    There is one aiohttp session for every platform. Its connector keeps
+    connections alive between polls and caches DNS lookups, so steady polling
+    reuses warm TLS connections instead of reconnecting per request. Every
+    request goes through ``get_json``. That call takes the platform's rate
+    limit token and revalidates against the response cache. A 429 pauses the
+    platform's bucket. Connection errors and 5xx replies are retried with
+    jittered exponential backoff.
+    """
+
+    retries = 3
+    backoff_base = 1.0  # Seconds before the first retry; doubles each attempt
+    backoff_max = 30.0
+
+    def __init__(self):
+        self.session = None
+        self.http = ConditionalHTTP()
+        self.rate_limits = {
+            platform: TokenBucket.per_window(units, seconds)
+            for platform, (units, seconds) in config.SOCIAL_RATE_LIMITS.items()
+        }
+        self.plugins = {name: cls(self) for name, cls in PLATFORMS.items()}
+        self.retried = 0
+        self.failures = 0
+
+    async def start(self):
+        """Open the shared connection pool and let plugins authenticate."""
+        if not self.session:
+            connector = aiohttp.TCPConnector(
+                limit=config.SOCIAL_POLL_CONCURRENCY * 2,
+                limit_per_host=config.SOCIAL_POLL_CONCURRENCY,
+                ttl_dns_cache=300,
+                keepalive_timeout=75
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+        for plugin in self.plugins.values():
+            await plugin.start()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def plugin(self, platform):
+        return self.plugins.get(platform)
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def get_json(self, platform, url, params=None, headers=None, cost=1, quota=0):
+        """A rate-limited, cached, retried GET; the last reply is returned if retries run out."""
+        bucket = self.rate_limits.get(platform)
+        plugin = self.plugins[platform]
+        result = None
+
+        for attempt in range(self.retries + 1):
+            if bucket:
+                await bucket.acquire(cost)
+            try:
+                result = await self.http.get_json(self.session, url, params=params, headers=headers, quota=quota)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    self.failures += 1
+                    raise
+                logger.warning(f"{plugin.label} request failed ({e}); retrying")
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if result.status == 429:
+                # The bucket holds every caller until the reset; the source retries on its next poll
+                logger.warning(f"{plugin.label} API rate limit exceeded")
+                if bucket:
+                    bucket.pause(plugin.retry_after(result.headers))
+                return result
+            if result.status < 500:
+                return result
+            if attempt < self.retries:
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+
+        self.failures += 1
+        logger.warning(f"{plugin.label} API error: {result.status}")
+        return result
+
+    async def fetch(self, platform, username, cursors=()):
+        """The latest posts of one account, newest first; empty if the platform is unavailable."""
+        plugin = self.plugins.get(platform)
+        if not plugin or not plugin.enabled():
+            return []
+        return await plugin.latest(username, list(cursors))
+
+    def stats(self):
+        return {
+            **self.http.stats(),
+            'retried': self.retried,
+            'failures': self.failures,
+            'platforms': {name: plugin.enabled() for name, plugin in self.plugins.items()}
+        }
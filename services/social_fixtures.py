@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import hashlib
+import json
+from email.utils import formatdate
+import aiohttp
+from aiohttp import web
+from services.social_http import ConditionalHTTP
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Recorded API responses keyed by path; each path is served from a local root
+# that stands in for TWITTER_API_BASE, YOUTUBE_API_BASE or TWITCH_API_BASE.
+RECORDED = {
+    '/twitter/users/by/username/rosethorn': {
+        'data': {'id': '1500000000000000000', 'username': 'rosethorn'}
+    },
+    '/twitter/users/1500000000000000000/tweets': {
+        'data': [
+            {'id': '1700000000000000002', 'text': 'Midnight garden tour tonight', 'created_at': '2024-05-02T21:00:00.000Z'},
+            {'id': '1700000000000000001', 'text': 'New thorns, new roses', 'created_at': '2024-05-01T18:30:00.000Z'}
+        ]
+    },
+    '/youtube/search': {
+        'items': [{'id': {'channelId': 'UCrosethorn0000000000000'}}]
+    },
+    '/youtube/channels': {
+        'items': [{'id': 'UCrosethorn0000000000000'}]
+    },
+    '/youtube/playlistItems': {
+        'items': [
+            {'snippet': {
+                'title': 'Pruning by candlelight',
+                'description': 'A slow evening in the rose garden.',
+                'publishedAt': '2024-05-03T20:00:00Z',
+                'resourceId': {'videoId': 'vid00000002'},
+                'thumbnails': {'medium': {'url': 'https://i.ytimg.com/vi/vid00000002/mqdefault.jpg'},
+                               'high': {'url': 'https://i.ytimg.com/vi/vid00000002/hqdefault.jpg'}}
+            }},
+            {'snippet': {
+                'title': 'Planting the gothic border',
+                'description': 'Black roses and iron trellis.',
+                'publishedAt': '2024-04-28T20:00:00Z',
+                'resourceId': {'videoId': 'vid00000001'},
+                'thumbnails': {'medium': {'url': 'https://i.ytimg.com/vi/vid00000001/mqdefault.jpg'},
+                               'high': {'url': 'https://i.ytimg.com/vi/vid00000001/hqdefault.jpg'}}
+            }}
+        ]
+    },
+    '/twitch/users': {
+        'data': [{'id': '44322889', 'login': 'rosethorn'}]
+    },
+    '/twitch/streams': {
+        'data': []
+    }
+}
+
+class FixtureServer:
+    """Local HTTP stand-in that replays recorded social API responses.
+
+    Every body gets a stable ETag and Last-Modified, and requests carrying a
+    matching If-None-Match get a bodiless 304, the way the real APIs answer
+    revalidation. Point the fetchers at it by setting the ``*_API_BASE``
+    environment variables to ``http://host:port/twitter`` and so on.
+    """
+
+    def __init__(self, recorded=None):
+        self.recorded = recorded or RECORDED
+        self.hits = {}  # path -> (200s, 304s)
+        self.app = web.Application()
+        self.app.router.add_get('/{path:.*}', self.handle)
+
+    async def handle(self, request):
+        body = self.recorded.get(request.path)
+        if body is None:
+            return web.json_response({'error': 'not recorded'}, status=404)
+
+        payload = json.dumps(body).encode()
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        full, revalidated = self.hits.get(request.path, (0, 0))
+        headers = {'ETag': etag, 'Last-Modified': formatdate(0, usegmt=True)}
+
+        if request.headers.get('If-None-Match') == etag:
+            self.hits[request.path] = (full, revalidated + 1)
+            return web.Response(status=304, headers=headers)
+
+        self.hits[request.path] = (full + 1, revalidated)
+        return web.Response(body=payload, content_type='application/json', headers=headers)
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+async def check(rounds=3, port=8765):
+    """Fetch every recorded path ``rounds`` times and report what revalidation saved."""
+    server = FixtureServer()
+    base = await server.start(port=port)
+    http = ConditionalHTTP()
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(rounds):
+                for path in server.recorded:
+                    result = await http.get_json(session, base + path)
+                    assert result.data == server.recorded[path], path
+    finally:
+        await server.stop()
+    return {'http': http.stats(), 'server_hits': server.hits}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded social API responses locally")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--check', action='store_true', help="Fetch each fixture repeatedly and print savings")
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(json.dumps(asyncio.run(check(args.rounds, args.port)), indent=2))
+        return
+
+    server = FixtureServer()
+    print(f"🌹 Serving {len(server.recorded)} recorded responses on http://127.0.0.1:{args.port}")
+    web.run_app(server.app, host='127.0.0.1', port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import json
+from collections import OrderedDict, namedtuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+FetchResult = namedtuple('FetchResult', 'status data not_modified headers')
+
+class ConditionalHTTP:
+    """JSON GETs that revalidate with ETag/Last-Modified instead of re-downloading.
+
+    Validators and the last body are remembered per request URL and params.
+    The next request for the same resource sends If-None-Match and
+    If-Modified-Since. A 304 reply comes back flagged ``not_modified``, with
+    the cached body, so fetchers can stop early. Bytes received, bytes saved
+    by 304s and API quota spent or saved are counted for ``stats``.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # request key -> {'etag', 'last_modified', 'data', 'size'}
+        self.counters = {
+            'requests': 0,
+            'not_modified': 0,
+            'bytes_received': 0,
+            'bytes_saved': 0,
+            'quota_spent': 0,
+            'quota_saved': 0
+        }
+
+    def _key(self, url, params):
+        return url + '?' + '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+
+    async def get_json(self, session, url, params=None, headers=None, quota=0):
+        """GET a JSON resource conditionally; ``quota`` is the call's API cost."""
+        key = self._key(url, params)
+        cached = self._cache.get(key)
+        headers = dict(headers or {})
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        self.counters['requests'] += 1
+        self.counters['quota_spent'] += quota
+        async with session.get(url, params=params, headers=headers) as resp:
+            if resp.status == 304 and cached:
+                self.counters['not_modified'] += 1
+                self.counters['bytes_saved'] += cached['size']
+                self._cache.move_to_end(key)
+                return FetchResult(304, cached['data'], True, resp.headers)
+
+            body = await resp.read()
+            self.counters['bytes_received'] += len(body)
+            if resp.status != 200:
+                return FetchResult(resp.status, None, False, resp.headers)
+
+            data = json.loads(body) if body else None
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+            if etag or last_modified:
+                self._cache[key] = {'etag': etag, 'last_modified': last_modified, 'data': data, 'size': len(body)}
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            return FetchResult(200, data, False, resp.headers)
+
+    def record_quota_saved(self, units):
+        """Count quota avoided by a cheaper call or a cached lookup."""
+        self.counters['quota_saved'] += units
+
+    def stats(self):
+        return {**self.counters, 'cached_resources': len(self._cache)}
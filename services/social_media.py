@@ -1,12 +1,14 @@
-import os
 import asyncio
-import aiohttp
-import discord
-from datetime import datetime, timedelta
+import json
+import time
+from datetime import datetime, timezone
 from main import db
-from models import SocialMediaConfig, BotLog, Guild
+from models import SocialMediaConfig, BotLog
+from services.social_scheduler import SocialPollScheduler, source_key
+from services.social_fetchers import SocialFetchers
+from services.social_delivery import AnnouncementDelivery
+from services.websub import WebSubSubscriber
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -16,428 +18,168 @@ class SocialMediaService:
     def __init__(self, bot):
         self.bot = bot
         
-        # API credentials from environment
-        self.twitter_bearer_token = os.getenv('TWITTER_BEARER_TOKEN', '')
-        self.youtube_api_key = os.getenv('YOUTUBE_API_KEY', '')
-        self.twitch_client_id = os.getenv('TWITCH_CLIENT_ID', '')
-        self.twitch_client_secret = os.getenv('TWITCH_CLIENT_SECRET', '')
+        # Platform plugins sharing one connection pool, response cache and retry policy
+        self.fetchers = SocialFetchers()
+        self.rate_limits = self.fetchers.rate_limits
         
-        # Session for HTTP requests
-        self.session = None
+        # The per-account poll schedule and YouTube push subscriptions
+        self.scheduler = SocialPollScheduler(self)
+        self.websub = WebSubSubscriber(self)
         
-        # Cache for API tokens
-        self.twitch_token = None
-        self.twitch_token_expires = None
+        # Outbound announcements, batched per channel and sent through webhooks
+        self.delivery = AnnouncementDelivery(self)
+    
+    @property
+    def session(self):
+        return self.fetchers.session
+    
+    @property
+    def youtube_channel_ids(self):
+        return self.fetchers.plugin('youtube').channel_ids
     
     async def initialize(self):
         """Initialize the social media service."""
-        self.session = aiohttp.ClientSession()
-        await self.refresh_twitch_token()
+        await self.fetchers.start()
         logger.info("🌹 Social Media Service initialized")
     
     async def close(self):
         """Close the service and cleanup resources."""
-        if self.session:
-            await self.session.close()
-    
-    async def refresh_twitch_token(self):
-        """Refresh Twitch API token."""
-        if not self.twitch_client_id or not self.twitch_client_secret:
-            return
-        
-        try:
-            data = {
-                'client_id': self.twitch_client_id,
-                'client_secret': self.twitch_client_secret,
-                'grant_type': 'client_credentials'
-            }
-            
-            async with self.session.post('https://id.twitch.tv/oauth2/token', data=data) as resp:
-                if resp.status == 200:
-                    token_data = await resp.json()
-                    self.twitch_token = token_data.get('access_token')
-                    expires_in = token_data.get('expires_in', 3600)
-                    self.twitch_token_expires = datetime.utcnow() + timedelta(seconds=expires_in - 300)
-                    logger.info("🟣 Twitch API token refreshed")
-        except Exception as e:
-            logger.error(f"Failed to refresh Twitch token: {e}")
+        await self.fetchers.close()
     
-    async def check_twitter_updates(self, config):
-        """Check for new Twitter/X posts."""
-        if not self.twitter_bearer_token:
-            return
-        
+    async def check_updates(self, platform, subscriptions):
+        """Fetch one source once and announce new posts to every subscribed config."""
+        username = subscriptions[0].username
         try:
-            headers = {
-                'Authorization': f'Bearer {self.twitter_bearer_token}',
-                'User-Agent': 'RosethornBot/1.0'
-            }
-            
-            # Get user timeline
-            url = f'https://api.twitter.com/2/users/by/username/{config.username}/tweets'
-            params = {
-                'max_results': 5,
-                'tweet.fields': 'created_at,public_metrics,context_annotations',
-                'expansions': 'author_id'
-            }
-            
-            if config.last_post_id:
-                params['since_id'] = config.last_post_id
-            
-            async with self.session.get(url, headers=headers, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    tweets = data.get('data', [])
-                    
-                    if tweets:
-                        # Process new tweets
-                        for tweet in reversed(tweets):  # Process oldest first
-                            await self.announce_twitter_post(config, tweet)
-                        
-                        # Update last post ID
-                        with self.bot.app_context:
-                            config.last_post_id = tweets[0]['id']
-                            db.session.commit()
-                
-                elif resp.status == 429:
-                    logger.warning("Twitter API rate limit exceeded")
-                else:
-                    logger.warning(f"Twitter API error: {resp.status}")
-        
+            posts = await self.fetchers.fetch(platform, username, [config.last_post_id for config in subscriptions])
+            return await self.deliver(platform, subscriptions, posts)
         except Exception as e:
-            logger.error(f"Error checking Twitter updates for {config.username}: {e}")
+            logger.error(f"Error checking {platform} updates for {username}: {e}")
+            return 0
     
-    async def announce_twitter_post(self, config, tweet):
-        """Announce a new Twitter post in Discord."""
-        try:
-            guild = self.bot.get_guild(int(config.guild_id))
-            if not guild:
-                return
-            
-            channel = guild.get_channel(int(config.announcement_channel))
-            if not channel:
-                return
-            
-            # Create embed
-            embed = discord.Embed(
-                title="🐦 New Tweet",
-                description=tweet['text'][:2000],  # Discord limit
-                color=0x711417,
-                url=f"https://twitter.com/{config.username}/status/{tweet['id']}",
-                timestamp=datetime.fromisoformat(tweet['created_at'].replace('Z', '+00:00'))
-            )
-            
-            embed.set_author(
-                name=f"@{config.username}",
-                icon_url="https://abs.twimg.com/icons/apple-touch-icon-192x192.png"
-            )
-            
-            # Add metrics if available
-            metrics = tweet.get('public_metrics', {})
-            if metrics:
-                embed.add_field(
-                    name="📊 Engagement",
-                    value=f"❤️ {metrics.get('like_count', 0)} | "
-                          f"🔄 {metrics.get('retweet_count', 0)} | "
-                          f"💬 {metrics.get('reply_count', 0)}",
-                    inline=False
-                )
-            
-            embed.set_footer(text="Posted on Twitter/X 🌹")
-            
-            await channel.send(embed=embed)
-            
-            # Log the announcement
-            await self.log_social_media_event(
-                guild_id=config.guild_id,
-                platform="twitter",
-                username=config.username,
-                action="announced_post",
-                post_id=tweet['id']
-            )
+    async def deliver(self, platform, subscriptions, posts):
+        """Announce each subscription's unseen posts, oldest first; returns how many went out."""
+        if not posts:
+            return 0
         
-        except Exception as e:
-            logger.error(f"Error announcing Twitter post: {e}")
+        plugin = self.fetchers.plugin(platform)
+        announced = 0
+        updated = []
+        for config in subscriptions:
+            new = plugin.new_posts(posts, config.last_post_id)
+            for post in reversed(new):
+                if await self.announce(config, post):
+                    announced += 1
+            if new:
+                updated.append((config, posts[0].id))
+        self._save_cursors(updated)
+        return announced
     
-    async def check_youtube_updates(self, config):
-        """Check for new YouTube videos."""
-        if not self.youtube_api_key:
+    def _save_cursors(self, cursors):
+        """Persist each subscription's last announced post in one commit."""
+        if not cursors:
             return
-        
-        try:
-            # Get channel ID first
-            url = 'https://www.googleapis.com/youtube/v3/channels'
-            params = {
-                'key': self.youtube_api_key,
-                'forUsername': config.username,
-                'part': 'id'
-            }
-            
-            async with self.session.get(url, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    channels = data.get('items', [])
-                    
-                    if not channels:
-                        # Try by channel handle
-                        params['forHandle'] = f"@{config.username}"
-                        del params['forUsername']
-                        
-                        async with self.session.get(url, params=params) as resp2:
-                            if resp2.status == 200:
-                                data = await resp2.json()
-                                channels = data.get('items', [])
-                    
-                    if channels:
-                        channel_id = channels[0]['id']
-                        await self.check_youtube_channel_videos(config, channel_id)
-        
-        except Exception as e:
-            logger.error(f"Error checking YouTube updates for {config.username}: {e}")
+        with self.bot.app_context:
+            for config, post_id in cursors:
+                config.last_post_id = post_id
+            db.session.commit()
     
-    async def check_youtube_channel_videos(self, config, channel_id):
-        """Check for new videos from a YouTube channel."""
-        try:
-            url = 'https://www.googleapis.com/youtube/v3/search'
-            params = {
-                'key': self.youtube_api_key,
-                'channelId': channel_id,
-                'part': 'snippet',
-                'order': 'date',
-                'maxResults': 5,
-                'type': 'video'
-            }
-            
-            async with self.session.get(url, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    videos = data.get('items', [])
-                    
-                    for video in reversed(videos):  # Process oldest first
-                        video_id = video['id']['videoId']
-                        
-                        # Check if this is a new video
-                        if config.last_post_id and video_id <= config.last_post_id:
-                            continue
-                        
-                        await self.announce_youtube_video(config, video)
-                    
-                    if videos:
-                        # Update last post ID
-                        with self.bot.app_context:
-                            config.last_post_id = videos[0]['id']['videoId']
-                            db.session.commit()
+    async def announce(self, config, post):
+        """Queue one announcement for a subscription's channel; the single path every platform uses."""
+        if not self.bot.get_channel(int(config.announcement_channel)):
+            return False
         
-        except Exception as e:
-            logger.error(f"Error checking YouTube channel videos: {e}")
+        self.delivery.enqueue(config, post)
+        return True
     
-    async def announce_youtube_video(self, config, video):
-        """Announce a new YouTube video in Discord."""
-        try:
-            guild = self.bot.get_guild(int(config.guild_id))
-            if not guild:
-                return
-            
-            channel = guild.get_channel(int(config.announcement_channel))
-            if not channel:
-                return
-            
-            video_id = video['id']['videoId']
-            snippet = video['snippet']
-            
-            # Create embed
-            embed = discord.Embed(
-                title="📺 New YouTube Video",
-                description=snippet['title'],
-                color=0x711417,
-                url=f"https://www.youtube.com/watch?v={video_id}",
-                timestamp=datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
-            )
-            
-            embed.set_author(
-                name=snippet['channelTitle'],
-                icon_url="https://www.youtube.com/s/desktop/12345678/img/favicon_144x144.png"
-            )
-            
-            # Add thumbnail
-            thumbnail = snippet.get('thumbnails', {}).get('high', {}).get('url')
-            if thumbnail:
-                embed.set_image(url=thumbnail)
-            
-            # Add description if available
-            description = snippet.get('description', '')
-            if description:
-                embed.add_field(
-                    name="📝 Description",
-                    value=description[:500] + ("..." if len(description) > 500 else ""),
-                    inline=False
-                )
-            
-            embed.set_footer(text="New video on YouTube 🌹")
-            
-            await channel.send(embed=embed)
-            
-            # Log the announcement
-            await self.log_social_media_event(
-                guild_id=config.guild_id,
-                platform="youtube",
-                username=config.username,
-                action="announced_video",
-                post_id=video_id
-            )
+    async def delivered(self, announcements):
+        """Record freshness and log a batch of sent announcements in one commit."""
+        for config, post in announcements:
+            self.scheduler.record_post(config, post.posted_at)
         
-        except Exception as e:
-            logger.error(f"Error announcing YouTube video: {e}")
+        with self.bot.app_context:
+            try:
+                for config, post in announcements:
+                    db.session.add(BotLog(
+                        guild_id=config.guild_id,
+                        level="INFO",
+                        module="social_media",
+                        message=f"Social media event: announced_post for {post.platform}/{config.username}",
+                        extra_data=json.dumps({
+                            "platform": post.platform,
+                            "username": config.username,
+                            "action": "announced_post",
+                            "post_id": post.id
+                        })
+                    ))
+                db.session.commit()
+            except Exception as e:
+                logger.error(f"Error logging social announcements: {e}")
+                db.session.rollback()
     
-    async def check_twitch_updates(self, config):
-        """Check for Twitch stream updates."""
-        if not self.twitch_token or not self.twitch_client_id:
-            return
+    async def announce_youtube_push(self, source, subscriptions, notification):
+        """Announce an upload pushed through WebSub; returns how many subscriptions got it."""
+        published = notification['published_at'] or datetime.utcnow()
         
-        # Refresh token if needed
-        if self.twitch_token_expires and datetime.utcnow() >= self.twitch_token_expires:
-            await self.refresh_twitch_token()
+        # A push can trail the fallback poll, or be an edit of an older upload
+        cadence = self.scheduler.cadence.get(source)
+        if cadence and cadence.last_post_at and published.replace(tzinfo=timezone.utc).timestamp() <= cadence.last_post_at:
+            return 0
         
-        try:
-            headers = {
-                'Client-ID': self.twitch_client_id,
-                'Authorization': f'Bearer {self.twitch_token}'
-            }
-            
-            # Get user info first
-            url = 'https://api.twitch.tv/helix/users'
-            params = {'login': config.username}
-            
-            async with self.session.get(url, headers=headers, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    users = data.get('data', [])
-                    
-                    if users:
-                        user_id = users[0]['id']
-                        await self.check_twitch_stream(config, user_id, headers)
+        post = self.fetchers.plugin('youtube').post({
+            'resourceId': {'videoId': notification['video_id']},
+            'title': notification['title'],
+            'channelTitle': notification['author'],
+            'publishedAt': published.isoformat() + 'Z',
+            'thumbnails': {'high': {'url': f"https://i.ytimg.com/vi/{notification['video_id']}/hqdefault.jpg"}}
+        }, username=source[1])
         
-        except Exception as e:
-            logger.error(f"Error checking Twitch updates for {config.username}: {e}")
+        # Pushes arrive one upload at a time, so only an exact cursor match means seen
+        fresh = [config for config in subscriptions if config.last_post_id != post.id]
+        return await self.deliver('youtube', fresh, [post])
     
-    async def check_twitch_stream(self, config, user_id, headers):
-        """Check if a Twitch user is streaming."""
-        try:
-            url = 'https://api.twitch.tv/helix/streams'
-            params = {'user_id': user_id}
-            
-            async with self.session.get(url, headers=headers, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    streams = data.get('data', [])
-                    
-                    if streams:
-                        stream = streams[0]
-                        stream_id = stream['id']
-                        
-                        # Check if this is a new stream
-                        if config.last_post_id == stream_id:
-                            return
-                        
-                        await self.announce_twitch_stream(config, stream)
-                        
-                        # Update last post ID
-                        with self.bot.app_context:
-                            config.last_post_id = stream_id
-                            db.session.commit()
+    async def check_now(self, guild_id=None):
+        """Poll every enabled source (of one guild, if given) immediately; returns new posts per platform."""
+        # Announcements are queued, so make sure someone is sending them
+        self.delivery.start()
         
-        except Exception as e:
-            logger.error(f"Error checking Twitch stream: {e}")
-    
-    async def announce_twitch_stream(self, config, stream):
-        """Announce a Twitch stream going live."""
-        try:
-            guild = self.bot.get_guild(int(config.guild_id))
-            if not guild:
-                return
-            
-            channel = guild.get_channel(int(config.announcement_channel))
-            if not channel:
-                return
-            
-            # Create embed
-            embed = discord.Embed(
-                title="🔴 LIVE on Twitch!",
-                description=stream['title'],
-                color=0x711417,
-                url=f"https://www.twitch.tv/{config.username}",
-                timestamp=datetime.fromisoformat(stream['started_at'].replace('Z', '+00:00'))
-            )
-            
-            embed.set_author(
-                name=stream['user_name'],
-                icon_url="https://static.twitchcdn.net/assets/favicon-32-d6025c14e900565d6177.png"
-            )
-            
-            # Add game/category
-            if stream.get('game_name'):
-                embed.add_field(
-                    name="🎮 Playing",
-                    value=stream['game_name'],
-                    inline=True
-                )
-            
-            # Add viewer count
-            embed.add_field(
-                name="👀 Viewers",
-                value=f"{stream['viewer_count']:,}",
-                inline=True
-            )
-            
-            # Add thumbnail
-            thumbnail_url = stream['thumbnail_url'].replace('{width}', '640').replace('{height}', '360')
-            embed.set_image(url=thumbnail_url)
-            
-            embed.set_footer(text="Now streaming on Twitch 🌹")
-            
-            await channel.send(embed=embed)
-            
-            # Log the announcement
-            await self.log_social_media_event(
-                guild_id=config.guild_id,
-                platform="twitch",
-                username=config.username,
-                action="announced_stream",
-                post_id=stream['id']
-            )
+        with self.bot.app_context:
+            query = SocialMediaConfig.query.filter_by(enabled=True)
+            if guild_id:
+                query = query.filter_by(guild_id=str(guild_id))
+            configs = query.all()
         
-        except Exception as e:
-            logger.error(f"Error announcing Twitch stream: {e}")
+        sources = {}
+        for config in configs:
+            sources.setdefault(source_key(config), []).append(config)
+        
+        results = {}
+        for (platform, _), subscriptions in sources.items():
+            announced = await self.check_updates(platform, subscriptions)
+            if announced:
+                results[platform] = results.get(platform, 0) + announced
+        return results
     
     async def monitor_social_media(self):
-        """Main monitoring loop for all configured social media."""
+        """Main monitoring loop; each account is polled on its own schedule."""
+        self.delivery.start()
+        if self.websub.enabled:
+            asyncio.create_task(self.websub.run())
         while True:
             try:
-                with self.bot.app_context:
-                    configs = SocialMediaConfig.query.filter_by(enabled=True).all()
-                
-                for config in configs:
-                    try:
-                        if config.platform == 'twitter':
-                            await self.check_twitter_updates(config)
-                        elif config.platform == 'youtube':
-                            await self.check_youtube_updates(config)
-                        elif config.platform == 'twitch':
-                            await self.check_twitch_updates(config)
-                        
-                        # Small delay between checks
-                        await asyncio.sleep(1)
-                    
-                    except Exception as e:
-                        logger.error(f"Error monitoring {config.platform}/{config.username}: {e}")
-                
-                # Wait before next monitoring cycle (5 minutes)
-                await asyncio.sleep(300)
-            
+                await self.scheduler.run()
             except Exception as e:
                 logger.error(f"Error in social media monitoring loop: {e}")
                 await asyncio.sleep(60)  # Wait 1 minute before retrying
     
+    def get_freshness(self):
+        """Announcement lag, polling state and HTTP savings for monitoring."""
+        return {
+            **self.scheduler.freshness(),
+            'http': self.fetchers.stats(),
+            'websub': self.websub.stats(),
+            'delivery': self.delivery.stats()
+        }
+    
     async def add_social_media_config(self, guild_id, platform, username, channel_id):
         """Add a new social media monitoring configuration."""
         with self.bot.app_context:
@@ -450,6 +192,7 @@ class SocialMediaService:
             db.session.add(config)
             db.session.commit()
             
+            self.scheduler.add(config, due=time.monotonic())
             logger.info(f"Added social media config: {platform}/{username} for guild {guild_id}")
             return config
     
@@ -463,6 +206,7 @@ class SocialMediaService:
             ).first()
             
             if config:
+                self.scheduler.remove(config.id)
                 db.session.delete(config)
                 db.session.commit()
                 logger.info(f"Removed social media config: {platform}/{username} for guild {guild_id}")
@@ -470,6 +214,26 @@ class SocialMediaService:
             
             return False
     
+    async def toggle_social_media_config(self, guild_id, platform, username):
+        """Flip a configuration's enabled flag; returns the new state, or None if missing."""
+        with self.bot.app_context:
+            config = SocialMediaConfig.query.filter_by(
+                guild_id=str(guild_id),
+                platform=platform.lower(),
+                username=username
+            ).first()
+            
+            if not config:
+                return None
+            
+            config.enabled = not config.enabled
+            db.session.commit()
+            if config.enabled:
+                self.scheduler.add(config, due=time.monotonic())
+            else:
+                self.scheduler.remove(config.id)
+            return config.enabled
+    
     async def log_social_media_event(self, guild_id, platform, username, action, post_id=None):
         """Log social media events."""
         with self.bot.app_context:
@@ -478,12 +242,12 @@ class SocialMediaService:
                 level="INFO",
                 module="social_media",
                 message=f"Social media event: {action} for {platform}/{username}",
-                extra_data={
+                extra_data=json.dumps({
                     "platform": platform,
                     "username": username,
                     "action": action,
                     "post_id": post_id
-                }
+                })
             )
             db.session.add(log_entry)
             db.session.commit()
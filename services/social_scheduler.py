@@ -0,0 +1,318 @@
+import asyncio
+import heapq
+import json
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+import config
+from main import db
+from models import SocialMediaConfig, SocialSourceCadence
+from services.social_cadence import Cadence
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # Tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0.0  # Total seconds callers spent waiting
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def per_window(cls, units, seconds):
+        """A bucket allowing ``units`` per ``seconds``, bursting up to a tenth of the window."""
+        return cls(units / seconds, max(units / 10, 1))
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost=1):
+        """Wait until ``cost`` tokens are available and take them."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    break
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+        self.waited += time.monotonic() - started
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while, e.g. after a 429."""
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def source_key(account):
+    """The unique upstream account behind a monitoring config."""
+    return (account.platform, account.username.lower())
+
+class SocialPollScheduler:
+    """Polls each monitored account on its own next-due time.
+
+    Configs are grouped into sources, one per unique (platform, account). Each
+    source is fetched once per interval and its posts are fanned out to every
+    subscribed config, so API calls grow with unique accounts rather than with
+    subscriptions. Sources sit in a min-heap keyed by when they are next due,
+    and a single loop sleeps until the earliest one. Due polls run as tasks,
+    with at most ``concurrency`` in flight at a time. API calls are paced by
+    the service's per-platform token buckets. A slow source therefore delays
+    only itself, and a large account list is spread across the interval rather
+    than being walked in one serial cycle. Freshness lag (post time to announce
+    time) is recorded per platform.
+
+    Each source's interval is learned from its posting cadence rather than
+    being fixed. It stays between the configured bounds, and Twitch sources
+    poll at the live interval around their usual start times. Sources with a
+    live WebSub push subscription drop to a slow fallback interval. The learned
+    cadences are saved on every resync and reloaded at startup.
+    """
+
+    resync_seconds = 600  # Pick up configs added or disabled outside the bot
+
+    def __init__(self, service, interval=None, concurrency=None):
+        self.service = service
+        self.bot = service.bot
+        self.interval = interval or config.SOCIAL_POLL_INTERVAL
+        self.concurrency = concurrency or config.SOCIAL_POLL_CONCURRENCY
+        self.min_interval = config.SOCIAL_POLL_MIN_INTERVAL
+        self.max_interval = config.SOCIAL_POLL_MAX_INTERVAL
+        self.live_interval = config.SOCIAL_LIVE_POLL_INTERVAL
+
+        self.configs = {}  # config_id -> SocialMediaConfig
+        self.sources = {}  # (platform, account) -> set of config ids
+        self._heap = []  # (due, source)
+        self._scheduled = {}  # source -> due time of its live heap entry
+        self._running = set()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._wakeup = asyncio.Event()
+        self.cadence = {}  # source -> Cadence
+        self.pushed = set()  # Sources delivered by WebSub; polled only as a fallback
+        self._dirty = set()  # Sources whose cadence changed since the last save
+
+        self.polls = 0
+        self.fixed_polls = 0.0  # Polls a fixed interval would have made over the same time
+        self.lag = {}  # platform -> deque of seconds from post to announcement
+
+    def _schedule(self, source, due):
+        self._scheduled[source] = due
+        heapq.heappush(self._heap, (due, source))
+        if self._heap[0][1] == source:
+            self._wakeup.set()
+
+    def add(self, account, due=None):
+        """Subscribe a config to its source; new sources are spread across the interval."""
+        previous = self.configs.get(account.id)
+        if previous and source_key(previous) != source_key(account):
+            self.remove(account.id)
+
+        self.configs[account.id] = account
+        source = source_key(account)
+        self.sources.setdefault(source, set()).add(account.id)
+        if source in self._running:
+            return  # Rescheduled when the poll in flight finishes
+        if due is not None and self._scheduled.get(source, float('inf')) > due:
+            self._schedule(source, due)
+        elif source not in self._scheduled:
+            spread = min(self.interval, self.next_interval(source))
+            self._schedule(source, time.monotonic() + random.uniform(0, spread))
+
+    def remove(self, config_id):
+        """Unsubscribe a config; a source with no subscribers stops being polled."""
+        account = self.configs.pop(config_id, None)
+        if not account:
+            return
+        source = source_key(account)
+        subscribers = self.sources.get(source, set())
+        subscribers.discard(config_id)
+        if not subscribers:
+            # Its heap entry is dropped when it surfaces
+            self.sources.pop(source, None)
+            self._scheduled.pop(source, None)
+
+    def resync(self):
+        """Match the schedule to the enabled configs in the database."""
+        with self.bot.app_context:
+            enabled = {account.id: account for account in SocialMediaConfig.query.filter_by(enabled=True)}
+
+        for config_id in set(self.configs) - set(enabled):
+            self.remove(config_id)
+        for account in enabled.values():
+            self.add(account)
+        return len(enabled)
+
+    def load_cadence(self):
+        """Restore learned posting cadences from the database."""
+        with self.bot.app_context:
+            rows = SocialSourceCadence.query.all()
+        for row in rows:
+            self.cadence[(row.platform, row.username)] = Cadence(
+                tracked_since=row.tracked_since.replace(tzinfo=timezone.utc).timestamp(),
+                mean_interval=row.mean_interval,
+                last_post_at=row.last_post_at.replace(tzinfo=timezone.utc).timestamp() if row.last_post_at else None,
+                posts=row.posts or 0,
+                profile=json.loads(row.profile) if row.profile else None
+            )
+        return len(rows)
+
+    def save_cadence(self):
+        """Write cadences that changed since the last save."""
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        with self.bot.app_context:
+            try:
+                rows = {
+                    (row.platform, row.username): row
+                    for row in SocialSourceCadence.query.filter(
+                        SocialSourceCadence.platform.in_({platform for platform, _ in dirty}),
+                        SocialSourceCadence.username.in_({username for _, username in dirty})
+                    )
+                }
+                for source in dirty:
+                    cadence = self.cadence[source]
+                    row = rows.get(source)
+                    if not row:
+                        row = SocialSourceCadence(platform=source[0], username=source[1])
+                        db.session.add(row)
+                    row.tracked_since = datetime.utcfromtimestamp(cadence.tracked_since)
+                    row.mean_interval = cadence.mean_interval
+                    row.last_post_at = datetime.utcfromtimestamp(cadence.last_post_at) if cadence.last_post_at else None
+                    row.posts = cadence.posts
+                    row.profile = json.dumps(cadence.to_dict()['profile'])
+                    row.updated_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._dirty |= dirty  # Retry on the next save
+                logger.error(f"Error saving social cadences: {e}")
+
+    def _cadence_for(self, source):
+        if source not in self.cadence:
+            self.cadence[source] = Cadence(tracked_since=time.time())
+            self._dirty.add(source)
+        return self.cadence[source]
+
+    def next_interval(self, source):
+        """Seconds until a source should be polled again, from its learned cadence."""
+        if source in self.pushed:
+            return config.WEBSUB_FALLBACK_INTERVAL
+        return self._cadence_for(source).poll_interval(
+            time.time(),
+            self.min_interval,
+            self.max_interval,
+            self.interval,
+            live=self.live_interval if source[0] == 'twitch' else None
+        )
+
+    async def run(self):
+        """Poll accounts as they fall due, forever."""
+        try:
+            self.load_cadence()
+        except Exception as e:
+            logger.error(f"Error loading social cadences: {e}")
+        logger.info(f"🌹 Social polling {self.resync()} accounts")
+        next_resync = time.monotonic() + self.resync_seconds
+
+        while True:
+            now = time.monotonic()
+            if now >= next_resync:
+                try:
+                    self.resync()
+                except Exception as e:
+                    logger.error(f"Error resyncing social monitors: {e}")
+                self.save_cadence()
+                next_resync = now + self.resync_seconds
+
+            while self._heap and self._heap[0][0] <= now:
+                due, source = heapq.heappop(self._heap)
+                if self._scheduled.get(source) != due:
+                    continue  # Removed or rescheduled
+                del self._scheduled[source]
+
+                await self._slots.acquire()
+                self._running.add(source)
+                asyncio.create_task(self._poll(source))
+
+            self._wakeup.clear()
+            wait = min(self._heap[0][0] if self._heap else next_resync, next_resync) - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(wait, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, source):
+        try:
+            subscriptions = [self.configs[config_id] for config_id in self.sources.get(source, ())]
+            if subscriptions:
+                await self.service.check_updates(source[0], subscriptions)
+                self.polls += 1
+        except Exception as e:
+            logger.error(f"Error polling {source[0]}/{source[1]}: {e}")
+        finally:
+            self._running.discard(source)
+            self._slots.release()
+            if source in self.sources and source not in self._scheduled:
+                interval = self.next_interval(source)
+                self.fixed_polls += interval / self.interval
+                self._schedule(source, time.monotonic() + interval)
+
+    def record_post(self, account, posted_at):
+        """Note an announced post: its freshness lag and its source's cadence."""
+        if posted_at.tzinfo is None:
+            posted_at = posted_at.replace(tzinfo=timezone.utc)
+        lag = (datetime.now(timezone.utc) - posted_at).total_seconds()
+        self.lag.setdefault(account.platform, deque(maxlen=1000)).append(max(lag, 0))
+
+        # Every subscriber announces the same post; the cadence counts it once
+        source = source_key(account)
+        if self._cadence_for(source).observe(posted_at.timestamp()):
+            self._dirty.add(source)
+
+    def _interval_summary(self):
+        intervals = sorted(self.next_interval(source) for source in self.sources)
+        if not intervals:
+            return {}
+        return {
+            'min': round(intervals[0]),
+            'p50': round(intervals[len(intervals) // 2]),
+            'max': round(intervals[-1])
+        }
+
+    def freshness(self):
+        """Announcement lag percentiles per platform, in seconds, plus queue state."""
+        report = {}
+        for platform, samples in self.lag.items():
+            ordered = sorted(samples)
+            report[platform] = {
+                'samples': len(ordered),
+                'p50': round(ordered[len(ordered) // 2], 1),
+                'p90': round(ordered[min(int(len(ordered) * 0.9), len(ordered) - 1)], 1),
+                'max': round(ordered[-1], 1)
+            }
+        return {
+            'lag_seconds': report,
+            'subscriptions': len(self.configs),
+            'sources': len(self.sources),
+            'in_flight': len(self._running),
+            'polls': self.polls,
+            'fixed_interval_polls': round(self.fixed_polls),
+            'interval_seconds': self._interval_summary(),
+            'rate_limit_wait_seconds': {
+                platform: round(bucket.waited, 1) for platform, bucket in self.service.rate_limits.items()
+            }
+        }
@@ -0,0 +1,247 @@
+import time
+from datetime import date, timedelta
+from sqlalchemy import text, update, delete, insert, bindparam
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from main import db
+from models import Ticket, TicketDailyStat
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nearest-rank median and p90 in one pass: each row is ranked within the
+# non-null values of its duration column across the whole guild, and only the
+# row at the target rank contributes to its group's percentile column.
+STATS_SQL = text("""
+WITH ranked AS (
+    SELECT status, priority,
+        resolution_seconds AS res, first_response_seconds AS resp,
+        ROW_NUMBER() OVER (PARTITION BY resolution_seconds IS NULL ORDER BY resolution_seconds) AS res_rank,
+        COUNT(resolution_seconds) OVER () AS res_count,
+        ROW_NUMBER() OVER (PARTITION BY first_response_seconds IS NULL ORDER BY first_response_seconds) AS resp_rank,
+        COUNT(first_response_seconds) OVER () AS resp_count
+    FROM ticket
+    WHERE guild_id = :guild_id
+)
+SELECT status, priority, COUNT(*) AS tickets,
+    SUM(res) AS res_total, COUNT(res) AS res_count,
+    SUM(resp) AS resp_total, COUNT(resp) AS resp_count,
+    MAX(CASE WHEN res IS NOT NULL AND res_rank = (res_count - 1) * 50 / 100 + 1 THEN res END) AS res_median,
+    MAX(CASE WHEN res IS NOT NULL AND res_rank = (res_count - 1) * 90 / 100 + 1 THEN res END) AS res_p90,
+    MAX(CASE WHEN resp IS NOT NULL AND resp_rank = (resp_count - 1) * 50 / 100 + 1 THEN resp END) AS resp_median,
+    MAX(CASE WHEN resp IS NOT NULL AND resp_rank = (resp_count - 1) * 90 / 100 + 1 THEN resp END) AS resp_p90
+FROM ranked
+GROUP BY status, priority
+""")
+
+def _hours(seconds):
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+def _minutes(seconds):
+    return round(seconds / 60, 1) if seconds is not None else None
+
+class TicketAnalytics:
+    """Ticket SLA metrics from one grouped aggregate plus daily rollups.
+
+    Resolution and first-response durations are stored on the ticket row when
+    they happen, so ``get_stats`` is a single statement over the guild's tickets
+    that returns counts by status and priority together with average, median
+    and p90 durations. Per-day opened/closed/response totals are bumped in the
+    same transactions for trend charts, and results are cached briefly so
+    dashboard refreshes do not re-run the aggregate.
+    """
+
+    def __init__(self, cache_ttl=30):
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+
+    def invalidate(self, guild_id):
+        self._cache.pop(str(guild_id), None)
+
+    def _bump_daily(self, guild_id, day, **increments):
+        """Add to a guild's rollup row for a day, creating it if needed."""
+        keys = {'guild_id': str(guild_id), 'date': day}
+        statement = (
+            update(TicketDailyStat)
+            .filter_by(**keys)
+            .values(**{column: getattr(TicketDailyStat, column) + amount for column, amount in increments.items()})
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.session.execute(statement).rowcount:
+            return
+
+        defaults = {'opened': 0, 'closed': 0, 'resolution_seconds': 0, 'responded': 0, 'first_response_seconds': 0}
+        try:
+            with db.session.begin_nested():
+                db.session.add(TicketDailyStat(**keys, **{**defaults, **increments}))
+        except IntegrityError:
+            # Another writer created the row first
+            db.session.execute(statement)
+
+    def record_opened(self, guild_id, day=None):
+        """Count a new ticket; runs inside the caller's transaction."""
+        self._bump_daily(guild_id, day or date.today(), opened=1)
+        self.invalidate(guild_id)
+
+    def record_closed(self, ticket):
+        """Store a closed ticket's resolution time; runs inside the caller's transaction."""
+        if not ticket.closed_at or not ticket.created_at:
+            return
+
+        ticket.resolution_seconds = max(int((ticket.closed_at - ticket.created_at).total_seconds()), 0)
+        self._bump_daily(
+            ticket.guild_id,
+            ticket.closed_at.date(),
+            closed=1,
+            resolution_seconds=ticket.resolution_seconds
+        )
+        self.invalidate(ticket.guild_id)
+
+    def record_first_response(self, ticket_id, responded_at):
+        """Record a ticket's first staff response once; returns True if it was the first."""
+        row = db.session.query(Ticket.guild_id, Ticket.created_at).filter(Ticket.id == ticket_id).first()
+        if not row:
+            return False
+
+        seconds = max(int((responded_at - row.created_at).total_seconds()), 0)
+        recorded = db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id, Ticket.first_response_at.is_(None))
+            .values(first_response_at=responded_at, first_response_seconds=seconds)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if recorded:
+            self._bump_daily(row.guild_id, responded_at.date(), responded=1, first_response_seconds=seconds)
+            self.invalidate(row.guild_id)
+        return bool(recorded)
+
+    def get_stats(self, guild_id):
+        """Counts and SLA figures for a guild, cached for ``cache_ttl`` seconds."""
+        guild_id = str(guild_id)
+        cached = self._cache.get(guild_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rows = db.session.execute(STATS_SQL, {'guild_id': guild_id}).all()
+
+        by_status = {}
+        by_priority = {}
+        res_total = res_count = resp_total = resp_count = 0
+        res_median = res_p90 = resp_median = resp_p90 = None
+        for row in rows:
+            by_status[row.status] = by_status.get(row.status, 0) + row.tickets
+            by_priority[row.priority] = by_priority.get(row.priority, 0) + row.tickets
+            res_total += row.res_total or 0
+            res_count += row.res_count
+            resp_total += row.resp_total or 0
+            resp_count += row.resp_count
+            # Each percentile row falls in exactly one group
+            res_median = row.res_median if row.res_median is not None else res_median
+            res_p90 = row.res_p90 if row.res_p90 is not None else res_p90
+            resp_median = row.resp_median if row.resp_median is not None else resp_median
+            resp_p90 = row.resp_p90 if row.resp_p90 is not None else resp_p90
+
+        stats = {
+            'total_tickets': sum(by_status.values()),
+            'open_tickets': by_status.get('open', 0),
+            'closed_tickets': by_status.get('closed', 0),
+            'by_status': by_status,
+            'by_priority': by_priority,
+            'avg_resolution_hours': _hours(res_total / res_count) if res_count else None,
+            'median_resolution_hours': _hours(res_median),
+            'p90_resolution_hours': _hours(res_p90),
+            'avg_first_response_minutes': _minutes(resp_total / resp_count) if resp_count else None,
+            'median_first_response_minutes': _minutes(resp_median),
+            'p90_first_response_minutes': _minutes(resp_p90),
+            'responded_tickets': resp_count
+        }
+
+        self._cache[guild_id] = (time.monotonic() + self.cache_ttl, stats)
+        return stats
+
+    def trend(self, guild_id, days=30):
+        """Daily opened/closed counts and average durations, oldest first, gaps filled."""
+        since = date.today() - timedelta(days=days - 1)
+        rows = {
+            row.date: row for row in TicketDailyStat.query.filter(
+                TicketDailyStat.guild_id == str(guild_id),
+                TicketDailyStat.date >= since
+            )
+        }
+
+        trend = []
+        for offset in range(days):
+            day = since + timedelta(days=offset)
+            row = rows.get(day)
+            trend.append({
+                'date': day.isoformat(),
+                'opened': row.opened if row else 0,
+                'closed': row.closed if row else 0,
+                'avg_resolution_hours': _hours(row.resolution_seconds / row.closed) if row and row.closed else None,
+                'avg_first_response_minutes': _minutes(row.first_response_seconds / row.responded) if row and row.responded else None
+            })
+        return trend
+
+    def backfill(self, batch_size=10_000):
+        """Fill resolution times and rebuild the daily rollups from ticket history, then commit."""
+        try:
+            closed = (db.session.query(Ticket.id, Ticket.created_at, Ticket.closed_at)
+                      .filter(Ticket.closed_at.isnot(None), Ticket.resolution_seconds.is_(None))
+                      .all())
+            statement = (
+                update(Ticket.__table__)
+                .where(Ticket.__table__.c.id == bindparam('ticket_id'))
+                .values(resolution_seconds=bindparam('seconds'))
+            )
+            for start in range(0, len(closed), batch_size):
+                db.session.execute(statement, [
+                    {'ticket_id': ticket_id, 'seconds': max(int((closed_at - created_at).total_seconds()), 0)}
+                    for ticket_id, created_at, closed_at in closed[start:start + batch_size]
+                    if created_at
+                ])
+
+            days = {}
+            rows = (db.session.query(Ticket.guild_id, Ticket.created_at, Ticket.closed_at, Ticket.resolution_seconds,
+                                     Ticket.first_response_at, Ticket.first_response_seconds)
+                    .execution_options(yield_per=batch_size))
+            for guild_id, created_at, closed_at, resolution, responded_at, response in rows:
+                events = [(created_at, 'opened', None)]
+                if closed_at and resolution is not None:
+                    events.append((closed_at, 'closed', ('resolution_seconds', resolution)))
+                if responded_at and response is not None:
+                    events.append((responded_at, 'responded', ('first_response_seconds', response)))
+
+                for at, counter, total in events:
+                    if not at:
+                        continue
+                    day = days.setdefault((guild_id, at.date()), {
+                        'opened': 0, 'closed': 0, 'resolution_seconds': 0, 'responded': 0, 'first_response_seconds': 0
+                    })
+                    day[counter] += 1
+                    if total:
+                        day[total[0]] += total[1]
+
+            db.session.execute(delete(TicketDailyStat))
+            items = list(days.items())
+            for start in range(0, len(items), batch_size):
+                db.session.execute(insert(TicketDailyStat), [
+                    {'guild_id': guild_id, 'date': day, **counts}
+                    for (guild_id, day), counts in items[start:start + batch_size]
+                ])
+
+            db.session.commit()
+            self._cache.clear()
+            logger.info(f"🌹 Backfilled {len(closed)} resolution times and {len(items)} daily ticket rollups")
+            return len(items)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error backfilling ticket analytics: {e}")
+            db.session.rollback()
+            return 0
+
+if __name__ == "__main__":
+    import config
+    from main import create_db_app
+
+    with create_db_app(config.DATABASE_URL).app_context():
+        TicketAnalytics().backfill()
@@ -0,0 +1,85 @@
+from models import Ticket
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TicketChannelCache:
+    """In-memory map between open ticket channels and their ticket records.
+
+    Holds a small snapshot of each open ticket keyed by channel id, with a
+    reverse index from ticket id to channel id. It is loaded from the database
+    once, on first use, and kept current by the create, claim and close paths.
+    After that, answering "is this a ticket channel" costs a dict lookup, so
+    message handlers and in-ticket commands never query ``Ticket`` by channel.
+    Closed tickets are dropped from the map.
+    """
+
+    fields = ('id', 'guild_id', 'channel_id', 'user_id', 'status', 'assigned_staff',
+              'embed_message_id', 'first_response_at')
+
+    def __init__(self):
+        self._by_channel = {}  # channel_id -> snapshot dict
+        self._by_ticket = {}  # ticket_id -> channel_id
+        self._loaded = False
+
+    def _snapshot(self, ticket):
+        return {field: getattr(ticket, field, None) for field in self.fields}
+
+    def load(self):
+        """Read every open ticket; needs an app context."""
+        rows = Ticket.query.with_entities(*(getattr(Ticket, field) for field in self.fields)).filter(
+            Ticket.status != 'closed'
+        ).all()
+
+        self._by_channel = {row.channel_id: dict(row._mapping) for row in rows}
+        self._by_ticket = {row.id: row.channel_id for row in rows}
+        self._loaded = True
+        logger.info(f"🌹 Cached {len(rows)} open ticket channels")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def add(self, ticket):
+        """Start tracking a newly written ticket."""
+        self._ensure_loaded()
+        entry = self._snapshot(ticket)
+        entry['channel_id'] = str(entry['channel_id'])
+        self._by_channel[entry['channel_id']] = entry
+        self._by_ticket[entry['id']] = entry['channel_id']
+        return entry
+
+    def get(self, channel_id):
+        """The open ticket for a channel, or None."""
+        self._ensure_loaded()
+        return self._by_channel.get(str(channel_id))
+
+    def is_ticket_channel(self, channel_id):
+        return self.get(channel_id) is not None
+
+    def channel_for(self, ticket_id):
+        """The channel id of an open ticket, or None."""
+        self._ensure_loaded()
+        return self._by_ticket.get(ticket_id)
+
+    def update(self, channel_id, **changes):
+        """Mirror a committed change to an open ticket."""
+        entry = self.get(channel_id)
+        if entry:
+            entry.update(changes)
+        return entry
+
+    def remove(self, channel_id=None, ticket_id=None):
+        """Forget a ticket by channel or ticket id once it is closed."""
+        if channel_id is None:
+            channel_id = self._by_ticket.get(ticket_id)
+        entry = self._by_channel.pop(str(channel_id), None) if channel_id is not None else None
+        if entry:
+            self._by_ticket.pop(entry['id'], None)
+        return entry
+
+    def __len__(self):
+        return len(self._by_channel)
+
+# Shared by every ticket service in the process
+channels = TicketChannelCache()
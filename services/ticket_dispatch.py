@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+import discord
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+import config
+from main import db
+from models import Ticket
+from services.ticket_queue import TicketQueue, pick_staff
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TicketDispatcher:
+    """Auto-assigns open tickets to the least-loaded online staff member.
+
+    Each guild has a priority queue of unassigned tickets and a live count of
+    the open tickets each staff member holds. Queue and load state live in
+    memory. Assignments are written to ``Ticket.assigned_staff`` as they
+    happen, so ``start`` can rebuild the state after a restart. Staff are the
+    non-bot members of the guild's mod role whose status is not offline. No
+    one is given more than ``capacity`` tickets; the rest wait in the queue.
+    """
+
+    def __init__(self, service, capacity=None):
+        self.service = service
+        self.bot = service.bot
+        self.capacity = capacity or config.TICKET_STAFF_CAPACITY
+
+        self.queues = {}  # guild_id -> TicketQueue
+        self.load = {}  # guild_id -> {staff_id: open assigned tickets}
+        self.assignments = {}  # ticket_id -> (guild_id, staff_id)
+        self._last_assigned = {}  # staff_id -> monotonic time of last assignment
+        self._queued_at = {}  # ticket_id -> datetime the ticket joined the queue
+        self.wait_times = deque(maxlen=500)  # Seconds from creation to assignment
+
+    def _queue(self, guild_id):
+        return self.queues.setdefault(guild_id, TicketQueue())
+
+    def start(self):
+        """Rebuild queues and loads from open tickets; needs an app context."""
+        rows = db.session.query(
+            Ticket.id, Ticket.guild_id, Ticket.priority, Ticket.created_at, Ticket.assigned_staff
+        ).filter(Ticket.status != 'closed').all()
+
+        for row in rows:
+            if row.assigned_staff:
+                self._add_load(row.guild_id, row.id, row.assigned_staff)
+            else:
+                created_at = row.created_at or datetime.utcnow()
+                self._queue(row.guild_id).push(row.id, row.priority, created_at)
+                self._queued_at[row.id] = created_at
+
+        queued = sum(len(queue) for queue in self.queues.values())
+        logger.info(f"🌹 Ticket dispatch loaded {queued} queued and {len(self.assignments)} assigned tickets")
+
+    def _add_load(self, guild_id, ticket_id, staff_id):
+        load = self.load.setdefault(guild_id, {})
+        load[staff_id] = load.get(staff_id, 0) + 1
+        self.assignments[ticket_id] = (guild_id, staff_id)
+
+    def _drop_load(self, ticket_id):
+        guild_id, staff_id = self.assignments.pop(ticket_id, (None, None))
+        if staff_id is None:
+            return
+        load = self.load.get(guild_id, {})
+        load[staff_id] = max(load.get(staff_id, 0) - 1, 0)
+        if not load[staff_id]:
+            del load[staff_id]
+
+    def available_staff(self, guild):
+        """Online, non-bot members of the guild's mod role."""
+        _, mod_role = self.service._ticket_settings(guild)
+        if not mod_role:
+            return []
+        return [
+            str(member.id) for member in mod_role.members
+            if not member.bot and member.status != discord.Status.offline
+        ]
+
+    def enqueue(self, guild, ticket_id, priority='normal', created_at=None):
+        """Queue a new ticket and try to assign it straight away."""
+        guild_id = str(guild.id)
+        created_at = created_at or datetime.utcnow()
+        self._queue(guild_id).push(ticket_id, priority, created_at)
+        self._queued_at[ticket_id] = created_at
+        return self.dispatch(guild)
+
+    def reprioritize(self, guild_id, ticket_id, priority):
+        """Re-queue a waiting ticket under its new priority; assigned tickets are left alone."""
+        queue = self.queues.get(str(guild_id))
+        return bool(queue) and queue.reprioritize(ticket_id, priority)
+
+    def dispatch(self, guild):
+        """Assign queued tickets while staff have capacity; returns the number assigned."""
+        guild_id = str(guild.id)
+        queue = self.queues.get(guild_id)
+        if not queue:
+            return 0
+
+        staff = self.available_staff(guild)
+        load = self.load.setdefault(guild_id, {})
+        assigned = []
+
+        with self.bot.app_context:
+            try:
+                while queue:
+                    staff_id = pick_staff(load, staff, self.capacity, self._last_assigned)
+                    if staff_id is None:
+                        break
+
+                    key = queue.pop_key()
+                    ticket_id = key[2]
+                    # Skip tickets claimed by hand or closed since they were queued
+                    taken = db.session.execute(
+                        update(Ticket)
+                        .where(Ticket.id == ticket_id, Ticket.assigned_staff.is_(None), Ticket.status != 'closed')
+                        .values(assigned_staff=staff_id, assigned_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                    if not taken:
+                        self._queued_at.pop(ticket_id, None)
+                        continue
+
+                    self._add_load(guild_id, ticket_id, staff_id)
+                    self._last_assigned[staff_id] = time.monotonic()
+                    assigned.append((key, staff_id))
+
+                if assigned:
+                    db.session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error dispatching tickets in guild {guild_id}: {e}")
+                db.session.rollback()
+                # Nothing from this round was written; queue it again in its old place
+                for key, staff_id in assigned:
+                    self._drop_load(key[2])
+                    queue.restore(key)
+                return 0
+
+        now = datetime.utcnow()
+        for key, staff_id in assigned:
+            queued_at = self._queued_at.pop(key[2], None)
+            if queued_at:
+                self.wait_times.append((now - queued_at).total_seconds())
+            channel_id = self.service.channels.channel_for(key[2])
+            self.service.channels.update(channel_id, assigned_staff=staff_id)
+            asyncio.create_task(self._announce(channel_id, staff_id))
+        return len(assigned)
+
+    def dispatch_all(self):
+        """Run a dispatch pass for every guild with queued tickets."""
+        for guild_id, queue in self.queues.items():
+            guild = self.bot.get_guild(int(guild_id)) if queue else None
+            if guild:
+                self.dispatch(guild)
+
+    def claimed(self, guild_id, ticket_id, staff_id):
+        """A staff member took a ticket by hand."""
+        self._queue(str(guild_id)).remove(ticket_id)
+        self._queued_at.pop(ticket_id, None)
+        self._drop_load(ticket_id)
+        self._add_load(str(guild_id), ticket_id, str(staff_id))
+
+    def release(self, guild, ticket_id):
+        """A ticket closed; free its staff member and hand out the next ticket."""
+        self._queue(str(guild.id)).remove(ticket_id)
+        self._queued_at.pop(ticket_id, None)
+        self._drop_load(ticket_id)
+        return self.dispatch(guild)
+
+    async def _announce(self, channel_id, staff_id):
+        """Tell the ticket channel who has been assigned."""
+        channel = self.bot.get_channel(int(channel_id)) if channel_id else None
+        if not channel:
+            return
+
+        embed = discord.Embed(
+            title="🎯 Ticket Assigned",
+            description=f"<@{staff_id}> has been assigned to this ticket and will assist you.",
+            color=0x711417
+        )
+        embed.set_footer(text="Our team is here to help 🌹")
+
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
+
+    def stats(self, guild_id):
+        """Queue depth, per-staff load and recent wait times."""
+        guild_id = str(guild_id)
+        waits = sorted(self.wait_times)
+        return {
+            'queued': len(self.queues.get(guild_id, ())),
+            'load': dict(self.load.get(guild_id, {})),
+            'wait_p50_seconds': round(waits[len(waits) // 2], 1) if waits else None,
+            'wait_p90_seconds': round(waits[min(int(len(waits) * 0.9), len(waits) - 1)], 1) if waits else None
+        }
@@ -0,0 +1,138 @@
+import argparse
+import heapq
+import json
+import random
+from services.ticket_queue import TicketQueue, pick_staff
+
+DEFAULT_PRIORITY_MIX = {'urgent': 0.05, 'high': 0.15, 'normal': 0.6, 'low': 0.2}
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not samples:
+        return None
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+class TicketDispatchSimulator:
+    """Discrete-event model of ticket dispatch under load.
+
+    Tickets arrive as a Poisson process with priorities drawn from a mix, and
+    each staff member works on up to ``capacity`` tickets at once. Assignment
+    uses the same ``TicketQueue`` ordering and ``pick_staff`` rule as the bot,
+    so queue wait times reflect the live dispatcher. With ``policy='fifo'``
+    every ticket is queued at the same priority as a baseline.
+    """
+
+    def __init__(self, staff=5, capacity=3, arrivals_per_hour=30.0, handle_minutes=30.0,
+                 hours=24.0, priority_mix=None, policy='priority', seed=None):
+        self.staff = [f"staff{i}" for i in range(staff)]
+        self.capacity = capacity
+        self.arrival_rate = arrivals_per_hour / 60.0  # Per minute
+        self.handle_minutes = handle_minutes
+        self.minutes = hours * 60.0
+        self.priority_mix = priority_mix or DEFAULT_PRIORITY_MIX
+        self.policy = policy
+        self.rng = random.Random(seed)
+
+    def run(self):
+        """Simulate and return wait-time percentiles by priority, in minutes."""
+        priorities, weights = zip(*self.priority_mix.items())
+        queue = TicketQueue()
+        load = {}
+        last_assigned = {}
+        arrived = {}  # ticket_id -> (priority, arrival minute)
+        waits = {priority: [] for priority in priorities}
+        events = []  # (minute, order, kind, payload)
+        order = 0
+
+        def dispatch(now):
+            nonlocal order
+            while queue:
+                staff_id = pick_staff(load, self.staff, self.capacity, last_assigned)
+                if staff_id is None:
+                    return
+                ticket_id = queue.pop()
+                priority, arrived_at = arrived.pop(ticket_id)
+                waits[priority].append(now - arrived_at)
+                load[staff_id] = load.get(staff_id, 0) + 1
+                last_assigned[staff_id] = now
+                order += 1
+                heapq.heappush(events, (now + self.rng.expovariate(1 / self.handle_minutes), order, 'done', staff_id))
+
+        heapq.heappush(events, (self.rng.expovariate(self.arrival_rate), 0, 'arrive', None))
+        ticket_id = 0
+        busy_minutes = 0.0
+        last_time = 0.0
+        backlog_peak = 0
+
+        while events:
+            now, _, kind, payload = heapq.heappop(events)
+            busy_minutes += sum(load.values()) * (min(now, self.minutes) - min(last_time, self.minutes))
+            last_time = now
+
+            if kind == 'arrive':
+                if now > self.minutes:
+                    continue  # Stop arrivals; let the backlog drain
+                ticket_id += 1
+                priority = self.rng.choices(priorities, weights)[0]
+                arrived[ticket_id] = (priority, now)
+                queue.push(ticket_id, priority if self.policy == 'priority' else 'normal', now)
+                backlog_peak = max(backlog_peak, len(queue))
+                order += 1
+                heapq.heappush(events, (now + self.rng.expovariate(self.arrival_rate), order, 'arrive', None))
+            else:
+                load[payload] -= 1
+
+            dispatch(now)
+
+        all_waits = sorted(w for samples in waits.values() for w in samples)
+        report = {
+            'policy': self.policy,
+            'tickets': ticket_id,
+            'staff': len(self.staff),
+            'capacity': self.capacity,
+            'utilization': round(busy_minutes / (self.minutes * len(self.staff) * self.capacity), 3),
+            'peak_queue': backlog_peak,
+            'wait_minutes': self._summary(all_waits),
+            'wait_minutes_by_priority': {
+                priority: self._summary(sorted(samples)) for priority, samples in waits.items()
+            }
+        }
+        return report
+
+    def _summary(self, samples):
+        return {
+            'count': len(samples),
+            'mean': round(sum(samples) / len(samples), 2) if samples else None,
+            'p50': round(percentile(samples, 0.5), 2) if samples else None,
+            'p90': round(percentile(samples, 0.9), 2) if samples else None,
+            'max': round(samples[-1], 2) if samples else None
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate ticket dispatch queue wait times")
+    parser.add_argument('--staff', type=int, default=5)
+    parser.add_argument('--capacity', type=int, default=3)
+    parser.add_argument('--arrivals-per-hour', type=float, default=30.0)
+    parser.add_argument('--handle-minutes', type=float, default=30.0)
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--compare', action='store_true', help="Also run a first-come-first-served baseline")
+    args = parser.parse_args(argv)
+
+    policies = ['priority', 'fifo'] if args.compare else ['priority']
+    reports = [
+        TicketDispatchSimulator(
+            staff=args.staff,
+            capacity=args.capacity,
+            arrivals_per_hour=args.arrivals_per_hour,
+            handle_minutes=args.handle_minutes,
+            hours=args.hours,
+            policy=policy,
+            seed=args.seed
+        ).run()
+        for policy in policies
+    ]
+    print(json.dumps(reports if args.compare else reports[0], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+import discord
+from sqlalchemy import update, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+import config
+from main import db
+from models import Ticket
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TicketIdleScheduler:
+    """Warns about and closes idle tickets at their exact deadlines.
+
+    Last-message times live in memory and are written back in batches by
+    ``flush``. Each tracked ticket has at most one entry in a min-heap of
+    deadlines, and a single task sleeps until the earliest one. Messages only
+    update the in-memory timestamp. When an entry fires early because the
+    ticket saw activity since, it is pushed back to the new deadline. Open
+    tickets are loaded once at startup; the ``Ticket`` table is never polled.
+    """
+
+    def __init__(self, service, warn_after=None, close_after=None):
+        self.service = service
+        self.bot = service.bot
+        self.warn_after = timedelta(hours=warn_after or config.TICKET_IDLE_WARN_HOURS)
+        self.close_after = timedelta(hours=close_after or config.TICKET_IDLE_CLOSE_HOURS)
+        self.retry_after = timedelta(minutes=10)  # Before retrying a close that failed to commit
+
+        self._tickets = {}  # channel_id -> {'ticket_id', 'guild_id', 'last_activity', 'warned'}
+        self._heap = []  # (deadline, channel_id)
+        self._scheduled = {}  # channel_id -> deadline of its live heap entry
+        self._dirty = {}  # channel_id -> last activity not yet persisted
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def _due(self, state):
+        return state['last_activity'] + (self.close_after if state['warned'] else self.warn_after)
+
+    def _schedule(self, channel_id, deadline):
+        self._scheduled[channel_id] = deadline
+        heapq.heappush(self._heap, (deadline, channel_id))
+        if self._heap[0][1] == channel_id:
+            # New earliest deadline; let the runner re-arm its sleep
+            self._wakeup.set()
+
+    def start(self):
+        """Load open tickets and start the deadline runner; needs an app context."""
+        rows = db.session.query(
+            Ticket.id, Ticket.guild_id, Ticket.channel_id, Ticket.created_at,
+            Ticket.last_activity_at, Ticket.idle_warned_at
+        ).filter(Ticket.status != 'closed').all()
+
+        for row in rows:
+            last_activity = row.last_activity_at or row.created_at or datetime.utcnow()
+            self.track(
+                row.channel_id, row.id, row.guild_id, last_activity,
+                warned=bool(row.idle_warned_at and row.idle_warned_at >= last_activity)
+            )
+
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+        logger.info(f"🌹 Watching {len(rows)} open tickets for inactivity")
+
+    def track(self, channel_id, ticket_id, guild_id, last_activity=None, warned=False):
+        """Start watching a ticket channel."""
+        channel_id = str(channel_id)
+        state = {
+            'ticket_id': ticket_id,
+            'guild_id': str(guild_id),
+            'last_activity': last_activity or datetime.utcnow(),
+            'warned': warned
+        }
+        self._tickets[channel_id] = state
+        self._schedule(channel_id, self._due(state))
+
+    def forget(self, channel_id):
+        """Stop watching a ticket channel; its heap entry is dropped when it surfaces."""
+        channel_id = str(channel_id)
+        self._tickets.pop(channel_id, None)
+        self._scheduled.pop(channel_id, None)
+
+    def retry_close(self, channel_id, ticket_id, guild_id):
+        """Watch a ticket again after its auto-close failed; it is retried after ``retry_after``."""
+        channel_id = str(channel_id)
+        if channel_id in self._tickets:
+            return  # Tracked again in the meantime
+        self._tickets[channel_id] = {
+            'ticket_id': ticket_id,
+            'guild_id': str(guild_id),
+            'last_activity': datetime.utcnow() - self.close_after,
+            'warned': True
+        }
+        self._schedule(channel_id, datetime.utcnow() + self.retry_after)
+
+    def touch(self, channel_id, at=None):
+        """Record activity in a ticket channel; O(1) unless the deadline moves earlier."""
+        channel_id = str(channel_id)
+        state = self._tickets.get(channel_id)
+        if not state:
+            return
+
+        state['last_activity'] = at or datetime.utcnow()
+        state['warned'] = False
+        self._dirty[channel_id] = state['last_activity']
+
+        deadline = self._due(state)
+        if deadline < self._scheduled.get(channel_id, datetime.max):
+            self._schedule(channel_id, deadline)
+
+    def flush(self):
+        """Persist buffered last-activity times in one batch."""
+        if not self._dirty:
+            return 0
+
+        dirty, self._dirty = self._dirty, {}
+        table = Ticket.__table__
+        with self.bot.app_context:
+            try:
+                db.session.execute(
+                    update(table)
+                    .where(table.c.channel_id == bindparam('channel'))
+                    .values(last_activity_at=bindparam('at')),
+                    [{'channel': channel_id, 'at': at} for channel_id, at in dirty.items()]
+                )
+                db.session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error persisting ticket activity: {e}")
+                db.session.rollback()
+                # Keep newer timestamps recorded while the write failed
+                self._dirty = {**dirty, **self._dirty}
+                return 0
+        return len(dirty)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - datetime.utcnow()).total_seconds(), 0)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self._fire_due()
+            except Exception as e:
+                logger.error(f"Error processing idle tickets: {e}")
+
+    async def _fire_due(self):
+        now = datetime.utcnow()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, channel_id = heapq.heappop(self._heap)
+            if self._scheduled.get(channel_id) != deadline:
+                continue  # Superseded or forgotten
+
+            state = self._tickets[channel_id]
+            due = self._due(state)
+            if due > now:
+                # Activity since this entry was pushed; sleep until the new deadline
+                self._schedule(channel_id, due)
+                continue
+
+            del self._scheduled[channel_id]
+            if state['warned']:
+                self.forget(channel_id)
+                asyncio.create_task(self.service.close_idle_ticket(channel_id, state['ticket_id'], self.close_after))
+            else:
+                state['warned'] = True
+                self._schedule(channel_id, self._due(state))
+                await self._warn(channel_id, state)
+
+    async def _warn(self, channel_id, state):
+        """Post the inactivity warning and remember it across restarts."""
+        with self.bot.app_context:
+            try:
+                db.session.execute(
+                    update(Ticket)
+                    .where(Ticket.id == state['ticket_id'])
+                    .values(idle_warned_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error marking ticket #{state['ticket_id']} idle: {e}")
+                db.session.rollback()
+
+        channel = self.bot.get_channel(int(channel_id))
+        if not channel:
+            return
+
+        remaining = self.close_after - self.warn_after
+        embed = discord.Embed(
+            title="🕯️ Ticket Inactive",
+            description=(
+                f"This ticket has been quiet for {self.warn_after.total_seconds() / 3600:g} hours. "
+                f"It will close in {remaining.total_seconds() / 3600:g} hours unless someone replies."
+            ),
+            color=0x711417
+        )
+        embed.set_footer(text="Reply here to keep it open 🌹")
+
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
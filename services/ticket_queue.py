@@ -0,0 +1,70 @@
+import heapq
+
+# Lower ranks are served first; unknown priorities queue as normal
+PRIORITY_RANKS = {'urgent': 0, 'high': 1, 'medium': 2, 'normal': 2, 'low': 3}
+
+def priority_rank(priority):
+    return PRIORITY_RANKS.get((priority or 'normal').lower(), PRIORITY_RANKS['normal'])
+
+def pick_staff(load, available, capacity, last_assigned=None):
+    """Least-loaded available staff member with room for another ticket, or None.
+
+    Ties go to whoever was assigned least recently so equal loads rotate.
+    """
+    last_assigned = last_assigned or {}
+    candidates = [staff for staff in available if load.get(staff, 0) < capacity]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda staff: (load.get(staff, 0), last_assigned.get(staff, float('-inf'))))
+
+class TicketQueue:
+    """Pending tickets ordered by priority, then by age.
+
+    Removal and re-prioritization are lazy: the live key for each ticket is
+    kept in a dict and stale heap entries are skipped when they surface.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}  # ticket_id -> live heap key
+
+    def push(self, ticket_id, priority, created_at):
+        key = (priority_rank(priority), created_at, ticket_id)
+        self._entries[ticket_id] = key
+        heapq.heappush(self._heap, key)
+
+    def reprioritize(self, ticket_id, priority):
+        """Move a queued ticket to a new priority, keeping its age; False if it is not queued."""
+        key = self._entries.get(ticket_id)
+        if not key:
+            return False
+        self.push(ticket_id, priority, key[1])
+        return True
+
+    def remove(self, ticket_id):
+        return self._entries.pop(ticket_id, None) is not None
+
+    def pop_key(self):
+        """Remove and return the next ``(rank, created_at, ticket_id)`` key, or None if empty."""
+        while self._heap:
+            key = heapq.heappop(self._heap)
+            if self._entries.get(key[2]) == key:
+                del self._entries[key[2]]
+                return key
+        return None
+
+    def pop(self):
+        """Remove and return the next ticket id, or None if empty."""
+        key = self.pop_key()
+        return key[2] if key else None
+
+    def restore(self, key):
+        """Put back a key returned by ``pop_key``."""
+        self._entries[key[2]] = key
+        heapq.heappush(self._heap, key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, ticket_id):
+        return ticket_id in self._entries
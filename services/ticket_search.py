@@ -0,0 +1,194 @@
+import gzip
+import json
+import os
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from main import db
+from models import Ticket, TicketNote
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TicketSearchIndex:
+    """Ranked full-text search over ticket subjects, descriptions, notes and transcripts.
+
+    SQLite databases use an FTS5 virtual table keyed by ticket id; Postgres
+    uses a weighted tsvector column with a GIN index. Both sit behind
+    ``index_ticket`` and ``search`` so callers never see the dialect. Tickets
+    are re-indexed one row at a time whenever their searchable text changes.
+    """
+
+    max_transcript_chars = 1_000_000  # Bound the text indexed per transcript
+
+    def __init__(self):
+        self._schema_ready = False
+
+    @property
+    def dialect(self):
+        return db.engine.dialect.name
+
+    def ensure_schema(self):
+        """Create the search table for the current database if missing."""
+        if self._schema_ready:
+            return
+
+        if self.dialect == 'postgresql':
+            statements = [
+                "CREATE TABLE IF NOT EXISTS ticket_search ("
+                "ticket_id INTEGER PRIMARY KEY, guild_id VARCHAR(20) NOT NULL, "
+                "subject TEXT, document TSVECTOR NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS ix_ticket_search_document ON ticket_search USING GIN (document)",
+                "CREATE INDEX IF NOT EXISTS ix_ticket_search_guild ON ticket_search (guild_id)"
+            ]
+        else:
+            statements = [
+                "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5("
+                "guild_id UNINDEXED, subject, description, notes, transcript, "
+                "tokenize='porter unicode61')"
+            ]
+
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+        self._schema_ready = True
+
+    def _transcript_text(self, ticket):
+        """Read message content back out of a ticket's transcript archive."""
+        if not ticket.transcript_path or not os.path.exists(ticket.transcript_path):
+            return ""
+
+        parts = []
+        size = 0
+        with gzip.open(ticket.transcript_path, 'rt', encoding='utf-8') as transcript:
+            for line in transcript:
+                record = json.loads(line)
+                if record.get('type') != 'message' or not record.get('content'):
+                    continue
+                parts.append(record['content'])
+                size += len(record['content'])
+                if size >= self.max_transcript_chars:
+                    break
+        return "\n".join(parts)
+
+    def _document(self, ticket):
+        notes = "\n".join(
+            content for (content,) in db.session.query(TicketNote.content)
+            .filter_by(ticket_id=ticket.id)
+            .order_by(TicketNote.created_at)
+        )
+        return {
+            'ticket_id': ticket.id,
+            'guild_id': ticket.guild_id,
+            'subject': ticket.subject or "",
+            'description': ticket.description or "",
+            'notes': notes,
+            'transcript': self._transcript_text(ticket)
+        }
+
+    def index_ticket(self, ticket_id):
+        """Replace one ticket's search document and commit."""
+        try:
+            self.ensure_schema()
+            ticket = db.session.get(Ticket, ticket_id)
+            if not ticket:
+                return False
+
+            document = self._document(ticket)
+            if self.dialect == 'postgresql':
+                db.session.execute(text(
+                    "INSERT INTO ticket_search (ticket_id, guild_id, subject, document) VALUES ("
+                    ":ticket_id, :guild_id, :subject, "
+                    "setweight(to_tsvector('english', :subject), 'A') || "
+                    "setweight(to_tsvector('english', :description), 'B') || "
+                    "setweight(to_tsvector('english', :notes), 'B') || "
+                    "setweight(to_tsvector('english', :transcript), 'C')) "
+                    "ON CONFLICT (ticket_id) DO UPDATE SET guild_id = EXCLUDED.guild_id, "
+                    "subject = EXCLUDED.subject, document = EXCLUDED.document"
+                ), document)
+            else:
+                db.session.execute(text("DELETE FROM ticket_search WHERE rowid = :ticket_id"), document)
+                db.session.execute(text(
+                    "INSERT INTO ticket_search (rowid, guild_id, subject, description, notes, transcript) "
+                    "VALUES (:ticket_id, :guild_id, :subject, :description, :notes, :transcript)"
+                ), document)
+
+            db.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Database error indexing ticket #{ticket_id}: {e}")
+            db.session.rollback()
+            return False
+
+    def _fts5_query(self, query):
+        """Quote each term so user input can never be parsed as FTS5 syntax."""
+        terms = [term.replace('"', '""') for term in query.split()]
+        if not terms:
+            return None
+        # Prefix-match the last term so partial words still find results
+        return " ".join(f'"{term}"' for term in terms[:-1]) + (" " if len(terms) > 1 else "") + f'"{terms[-1]}"*'
+
+    def search(self, guild_id, query, page=1, per_page=10):
+        """Return ranked results for one page plus timing."""
+        started = time.perf_counter()
+        self.ensure_schema()
+        params = {
+            'guild_id': str(guild_id),
+            'limit': per_page + 1,  # One extra row tells us whether another page exists
+            'offset': (max(page, 1) - 1) * per_page
+        }
+
+        try:
+            if self.dialect == 'postgresql':
+                params['query'] = query
+                rows = db.session.execute(text(
+                    "SELECT ticket_id, ts_rank(document, q) AS rank, "
+                    "ts_headline('english', subject, q) AS snippet "
+                    "FROM ticket_search, websearch_to_tsquery('english', :query) q "
+                    "WHERE guild_id = :guild_id AND document @@ q "
+                    "ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+                ), params).all()
+            else:
+                params['query'] = self._fts5_query(query)
+                if not params['query']:
+                    return {'results': [], 'page': page, 'has_more': False, 'elapsed_ms': 0.0}
+                # bm25 weights: subject, description, notes, transcript (guild_id is unindexed)
+                rows = db.session.execute(text(
+                    "SELECT rowid, bm25(ticket_search, 0.0, 10.0, 5.0, 5.0, 1.0) AS rank, "
+                    "snippet(ticket_search, -1, '**', '**', '…', 16) AS snippet "
+                    "FROM ticket_search WHERE ticket_search MATCH :query AND guild_id = :guild_id "
+                    "ORDER BY rank LIMIT :limit OFFSET :offset"
+                ), params).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error searching tickets: {e}")
+            db.session.rollback()
+            rows = []
+
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        tickets = {t.id: t for t in Ticket.query.filter(Ticket.id.in_([row[0] for row in rows]))} if rows else {}
+
+        return {
+            'results': [
+                {'ticket': tickets[row[0]], 'rank': row[1], 'snippet': row[2]}
+                for row in rows if row[0] in tickets
+            ],
+            'page': page,
+            'has_more': has_more,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def rebuild(self):
+        """Re-index every ticket; returns the number indexed."""
+        self.ensure_schema()
+        ticket_ids = [ticket_id for (ticket_id,) in db.session.query(Ticket.id)]
+        indexed = sum(1 for ticket_id in ticket_ids if self.index_ticket(ticket_id))
+        logger.info(f"🌹 Indexed {indexed} tickets for search")
+        return indexed
+
+if __name__ == "__main__":
+    import config
+    from main import create_db_app
+
+    with create_db_app(config.DATABASE_URL).app_context():
+        TicketSearchIndex().rebuild()
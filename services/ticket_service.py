@@ -1,7 +1,11 @@
 import asyncio
 from datetime import datetime, timedelta
-from models import Ticket, User
+from sqlalchemy import func
+from models import Ticket, User, TicketNote
 from main import db
+from services.ticket_search import TicketSearchIndex
+from services.ticket_analytics import TicketAnalytics
+from services.ticket_channels import channels
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,8 +13,11 @@ logger = logging.getLogger(__name__)
 class TicketService:
     """Ticket management service"""
     
-    def __init__(self, db_service):
+    def __init__(self, db_service, dispatcher=None):
         self.db_service = db_service
+        self.dispatcher = dispatcher
+        self.search_index = TicketSearchIndex()
+        self.analytics = TicketAnalytics()
     
     async def get_user_tickets(self, user_id, guild_id, status='open'):
         """Get tickets for a user"""
@@ -26,13 +33,18 @@ class TicketService:
             return []
     
     async def get_ticket_by_channel(self, channel_id):
-        """Get ticket by channel ID"""
+        """Get the open ticket for a channel"""
         try:
-            return Ticket.query.filter_by(channel_id=str(channel_id)).first()
+            cached = channels.get(channel_id)
+            return db.session.get(Ticket, cached['id']) if cached else None
         except Exception as e:
             logger.error(f"Error getting ticket by channel: {e}")
             return None
     
+    def is_ticket_channel(self, channel_id):
+        """Whether a channel belongs to an open ticket, without touching the database"""
+        return channels.is_ticket_channel(channel_id)
+    
     async def get_tickets_by_status(self, guild_id, status):
         """Get tickets by status"""
         try:
@@ -51,6 +63,7 @@ class TicketService:
             if ticket:
                 ticket.assigned_staff = str(staff_id)
                 db.session.commit()
+                channels.update(channels.channel_for(ticket_id), assigned_staff=str(staff_id))
                 return ticket
         except Exception as e:
             logger.error(f"Error assigning staff to ticket: {e}")
@@ -68,6 +81,8 @@ class TicketService:
             if ticket:
                 ticket.priority = priority.lower()
                 db.session.commit()
+                if self.dispatcher:
+                    self.dispatcher.reprioritize(ticket.guild_id, ticket.id, ticket.priority)
                 return ticket
         except Exception as e:
             logger.error(f"Error updating ticket priority: {e}")
@@ -77,74 +92,69 @@ class TicketService:
     async def add_ticket_note(self, ticket_id, staff_id, note):
         """Add internal note to ticket"""
         try:
-            # In a full implementation, this would add to a ticket_notes table
-            # For now, we'll log it as an action
-            await self.db_service.log_action(
-                'ticket_system', 
-                str(staff_id), 
-                'ticket_note', 
-                {
-                    'ticket_id': ticket_id,
-                    'note': note,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-            )
+            db.session.add(TicketNote(
+                ticket_id=ticket_id,
+                author_id=str(staff_id),
+                content=note
+            ))
+            db.session.commit()
+            
+            self.search_index.index_ticket(ticket_id)
             return True
         except Exception as e:
             logger.error(f"Error adding ticket note: {e}")
+            db.session.rollback()
             return False
     
+    async def search_tickets(self, guild_id, query, page=1, per_page=10):
+        """Full-text search over tickets, notes and transcripts"""
+        try:
+            return self.search_index.search(guild_id, query, page, per_page)
+        except Exception as e:
+            logger.error(f"Error searching tickets: {e}")
+            return {'results': [], 'page': page, 'has_more': False, 'elapsed_ms': 0.0}
+    
     async def get_ticket_stats(self, guild_id):
         """Get ticket statistics"""
         try:
-            total_tickets = Ticket.query.filter_by(guild_id=str(guild_id)).count()
-            open_tickets = Ticket.query.filter_by(guild_id=str(guild_id), status='open').count()
-            closed_tickets = Ticket.query.filter_by(guild_id=str(guild_id), status='closed').count()
-            
-            # Average resolution time for closed tickets
-            closed_with_times = Ticket.query.filter_by(
-                guild_id=str(guild_id), 
-                status='closed'
-            ).filter(Ticket.closed_at.isnot(None)).all()
-            
-            avg_resolution_time = None
-            if closed_with_times:
-                total_time = sum(
-                    (ticket.closed_at - ticket.created_at).total_seconds() 
-                    for ticket in closed_with_times
-                )
-                avg_resolution_time = total_time / len(closed_with_times) / 3600  # Hours
-            
-            return {
-                'total_tickets': total_tickets,
-                'open_tickets': open_tickets,
-                'closed_tickets': closed_tickets,
-                'avg_resolution_hours': round(avg_resolution_time, 2) if avg_resolution_time else None
-            }
+            return self.analytics.get_stats(guild_id)
         except Exception as e:
             logger.error(f"Error getting ticket stats: {e}")
+            db.session.rollback()
             return {}
     
+    async def get_ticket_trend(self, guild_id, days=30):
+        """Get daily ticket flow for trend charts"""
+        try:
+            return self.analytics.trend(guild_id, days)
+        except Exception as e:
+            logger.error(f"Error getting ticket trend: {e}")
+            return []
+    
     async def auto_close_inactive_tickets(self, guild_id, days=7):
-        """Auto-close tickets that have been inactive"""
+        """Close open tickets with no messages for the given number of days"""
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            # In a real implementation, you'd track last activity
-            # For now, we'll just close very old open tickets
-            old_tickets = Ticket.query.filter_by(
-                guild_id=str(guild_id),
-                status='open'
-            ).filter(Ticket.created_at < cutoff_date).all()
+            # The bot closes idle tickets at their deadlines; this is a manual sweep for one guild
+            last_activity = func.coalesce(Ticket.last_activity_at, Ticket.created_at)
+            old_tickets = Ticket.query.filter(
+                Ticket.guild_id == str(guild_id),
+                Ticket.status == 'open',
+                last_activity < cutoff_date
+            ).all()
             
             closed_count = 0
             for ticket in old_tickets:
                 ticket.status = 'closed'
                 ticket.closed_at = datetime.utcnow()
+                self.analytics.record_closed(ticket)
                 closed_count += 1
             
             if closed_count > 0:
                 db.session.commit()
+                for ticket in old_tickets:
+                    channels.remove(ticket.channel_id)
                 
                 await self.db_service.log_action(
                     str(guild_id),
@@ -0,0 +1,131 @@
+import gzip
+import html
+import json
+import os
+from datetime import datetime
+import config
+from main import db
+from models import Ticket
+from services.ticket_search import TicketSearchIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TranscriptService:
+    """Streams ticket channel history to disk before the channel is deleted.
+
+    History is paged from Discord by an async iterator and written one message
+    at a time to a gzip JSONL archive and a plain HTML transcript, so memory
+    stays bounded by one page regardless of ticket length. Attachment metadata
+    is written once per distinct file and referenced by key afterwards. The HTML
+    file is left uncompressed so the dashboard can serve it with range requests.
+    """
+
+    def __init__(self, bot, directory=None):
+        self.bot = bot
+        self.directory = directory or config.TRANSCRIPT_DIR
+        self.page_size = 100
+        self.search_index = TicketSearchIndex()
+
+    async def iter_messages(self, channel):
+        """Yield a channel's messages oldest first, one history page at a time."""
+        after = None
+        while True:
+            page = [message async for message in channel.history(limit=self.page_size, after=after, oldest_first=True)]
+            for message in page:
+                yield message
+            if len(page) < self.page_size:
+                return
+            after = page[-1]
+
+    def _attachment_key(self, attachment):
+        """Identify re-posts of the same file across messages."""
+        return f"{attachment.filename}:{attachment.size}:{attachment.content_type or ''}"
+
+    def _html_header(self, ticket_id, channel):
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>Ticket #{ticket_id} transcript</title>"
+            "<style>body{background:#1a0a0b;color:#e8dcdc;font-family:Georgia,serif}"
+            ".msg{padding:6px 12px;border-bottom:1px solid #3a1a1c}.author{color:#c9464b;font-weight:bold}"
+            ".time{color:#888;font-size:.8em;margin-left:8px}.content{white-space:pre-wrap}</style>"
+            f"</head><body><h1>🎫 Ticket #{ticket_id} — #{html.escape(channel.name)}</h1>\n"
+        )
+
+    def _html_message(self, record, attachments):
+        links = "".join(
+            f"<div class=\"attachment\">📎 <a href=\"{html.escape(attachments[key]['url'])}\">"
+            f"{html.escape(attachments[key]['filename'])}</a></div>"
+            for key in record['attachments']
+        )
+        return (
+            f"<div class=\"msg\" id=\"m{record['id']}\"><span class=\"author\">{html.escape(record['author'])}</span>"
+            f"<span class=\"time\">{record['timestamp']}</span>"
+            f"<div class=\"content\">{html.escape(record['content'])}</div>{links}</div>\n"
+        )
+
+    async def archive(self, ticket_id, channel):
+        """Write a ticket's transcript files and point the ticket row at them."""
+        os.makedirs(self.directory, exist_ok=True)
+        jsonl_path = os.path.join(self.directory, f"ticket-{ticket_id}.jsonl.gz")
+        html_path = os.path.join(self.directory, f"ticket-{ticket_id}.html")
+
+        attachments = {}
+        count = 0
+        try:
+            # Write to temporary names so a failed archive never replaces a good one
+            with gzip.open(f"{jsonl_path}.tmp", 'wt', encoding='utf-8') as jsonl, \
+                    open(f"{html_path}.tmp", 'w', encoding='utf-8') as page:
+                jsonl.write(json.dumps({'type': 'ticket', 'ticket_id': ticket_id, 'channel_id': str(channel.id)}) + "\n")
+                page.write(self._html_header(ticket_id, channel))
+
+                async for message in self.iter_messages(channel):
+                    keys = []
+                    for attachment in message.attachments:
+                        key = self._attachment_key(attachment)
+                        if key not in attachments:
+                            attachments[key] = {
+                                'filename': attachment.filename,
+                                'size': attachment.size,
+                                'content_type': attachment.content_type,
+                                'url': attachment.url
+                            }
+                            jsonl.write(json.dumps({'type': 'attachment', 'key': key, **attachments[key]}) + "\n")
+                        keys.append(key)
+
+                    record = {
+                        'type': 'message',
+                        'id': str(message.id),
+                        'author_id': str(message.author.id),
+                        'author': str(message.author),
+                        'timestamp': message.created_at.isoformat(),
+                        'content': message.content,
+                        'embeds': len(message.embeds),
+                        'attachments': keys
+                    }
+                    jsonl.write(json.dumps(record) + "\n")
+                    page.write(self._html_message(record, attachments))
+                    count += 1
+
+                page.write(f"<p>{count} messages archived {datetime.utcnow():%Y-%m-%d %H:%M} UTC 🌹</p></body></html>\n")
+
+            os.replace(f"{jsonl_path}.tmp", jsonl_path)
+            os.replace(f"{html_path}.tmp", html_path)
+        except Exception as e:
+            logger.error(f"Error archiving transcript for ticket #{ticket_id}: {e}")
+            for path in (f"{jsonl_path}.tmp", f"{html_path}.tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+
+        with self.bot.app_context:
+            ticket = db.session.get(Ticket, ticket_id)
+            if ticket:
+                ticket.transcript_path = jsonl_path
+                ticket.transcript_html_path = html_path
+                ticket.transcript_messages = count
+                db.session.commit()
+                self.search_index.index_ticket(ticket_id)
+
+        logger.info(f"🌹 Archived {count} messages for ticket #{ticket_id}")
+        return html_path
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, request, abort
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+import config
+from main import db
+from models import WebSubSubscription, WebSubNotification
+import logging
+
+logger = logging.getLogger(__name__)
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+YT = '{http://www.youtube.com/xml/schemas/2015}'
+
+# How long a subscribe or unsubscribe request waits for the hub before it is sent again
+RETRY_AFTER = timedelta(hours=1)
+
+def youtube_topic(channel_id):
+    """The hub topic for a channel's uploads feed."""
+    return f"https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+
+def sign(secret, body):
+    """The X-Hub-Signature a hub sends for ``body``."""
+    return 'sha1=' + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+
+def verify_signature(secret, body, header):
+    if not header:
+        return False
+    return hmac.compare_digest(sign(secret, body), header)
+
+def parse_time(value):
+    """Naive UTC datetime from an Atom timestamp."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def parse_atom(body):
+    """Video entries in a pushed Atom feed; deleted-entry tombstones are skipped."""
+    feed = ET.fromstring(body)
+    entries = []
+    for entry in feed.iter(f'{ATOM}entry'):
+        video_id = entry.findtext(f'{YT}videoId')
+        if not video_id:
+            continue
+        entries.append({
+            'video_id': video_id,
+            'channel_id': entry.findtext(f'{YT}channelId'),
+            'title': entry.findtext(f'{ATOM}title') or '',
+            'author': entry.findtext(f'{ATOM}author/{ATOM}name') or '',
+            'published': parse_time(entry.findtext(f'{ATOM}published')),
+            'updated': parse_time(entry.findtext(f'{ATOM}updated'))
+        })
+    return entries
+
+class WebSubReceiver:
+    """Dashboard side of WebSub: answers hub verification and queues pushed uploads.
+
+    Hubs call back on ``/websub/youtube/<channel_id>``. A GET confirms a
+    subscribe or unsubscribe request the bot made by echoing the challenge.
+    The topic is public, so a verification is only accepted while the bot is
+    waiting on that mode: a new subscription, or a renewal requested within
+    ``RETRY_AFTER`` and not yet confirmed, for subscribe, and an unsubscribed
+    row for unsubscribe.
+    Leases are capped at ``WEBSUB_LEASE_SECONDS``. A POST carries an Atom feed signed with the subscription's secret. Entries
+    are written to ``WebSubNotification``, one row per video, for the bot to
+    announce. YouTube also pushes edits to old videos, so entries published
+    more than ``WEBSUB_MAX_AGE_HOURS`` ago are dropped.
+    """
+
+    max_body = 1024 * 1024
+
+    def verify(self, channel_id, args):
+        """The challenge to echo for a hub verification request, or None to refuse it."""
+        try:
+            subscription = WebSubSubscription.query.filter_by(channel_id=channel_id).first()
+            if not subscription or args.get('hub.topic') != subscription.topic:
+                return None
+
+            mode = args.get('hub.mode')
+            now = datetime.utcnow()
+            # A renewal is open until the hub confirms it or RETRY_AFTER passes
+            renewing = (
+                subscription.status in ('verified', 'denied')
+                and subscription.requested_at
+                and now - subscription.requested_at < RETRY_AFTER
+                and not (subscription.verified_at and subscription.verified_at >= subscription.requested_at)
+            )
+            if mode in ('subscribe', 'denied') and subscription.status != 'pending' and not renewing:
+                logger.warning(f"Refused unrequested WebSub {mode} for {channel_id}")
+                return None
+            if mode == 'unsubscribe' and subscription.status != 'unsubscribed':
+                logger.warning(f"Refused unrequested WebSub unsubscribe for {channel_id}")
+                return None
+
+            if mode == 'subscribe':
+                lease = int(args.get('hub.lease_seconds') or config.WEBSUB_LEASE_SECONDS)
+                lease = min(lease, config.WEBSUB_LEASE_SECONDS)
+                subscription.status = 'verified'
+                subscription.lease_seconds = lease
+                subscription.verified_at = now
+                subscription.expires_at = now + timedelta(seconds=lease)
+            elif mode == 'unsubscribe':
+                subscription.status = 'unsubscribed'
+                subscription.expires_at = now
+            elif mode == 'denied':
+                subscription.status = 'denied'
+                logger.warning(f"WebSub hub denied {channel_id}: {args.get('hub.reason')}")
+            else:
+                return None
+
+            db.session.commit()
+            logger.info(f"🌹 WebSub {mode} confirmed for {channel_id}")
+            return args.get('hub.challenge', '')
+        except Exception as e:
+            logger.error(f"Error verifying WebSub subscription: {e}")
+            db.session.rollback()
+            return None
+
+    def ingest(self, channel_id, body, signature):
+        """Queue the uploads in a pushed feed; returns how many were queued, or None if unknown."""
+        try:
+            subscription = WebSubSubscription.query.filter_by(channel_id=channel_id).first()
+            if not subscription:
+                return None
+            if not verify_signature(subscription.secret, body, signature):
+                # The hub still gets a 2xx; unsigned or forged bodies are ignored
+                logger.warning(f"WebSub notification for {channel_id} failed signature check")
+                return 0
+
+            cutoff = datetime.utcnow() - timedelta(hours=config.WEBSUB_MAX_AGE_HOURS)
+            queued = 0
+            for entry in parse_atom(body):
+                if entry['channel_id'] != channel_id:
+                    continue
+                if entry['published'] and entry['published'] < cutoff:
+                    continue
+
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(WebSubNotification(
+                            channel_id=channel_id,
+                            video_id=entry['video_id'],
+                            title=entry['title'][:300],
+                            author=entry['author'][:100],
+                            published_at=entry['published']
+                        ))
+                    queued += 1
+                except IntegrityError:
+                    pass  # Already queued by an earlier push
+
+            subscription.last_notified_at = datetime.utcnow()
+            db.session.commit()
+            return queued
+        except ET.ParseError as e:
+            logger.warning(f"Unreadable WebSub notification for {channel_id}: {e}")
+            db.session.rollback()
+            return 0
+        except Exception as e:
+            logger.error(f"Error ingesting WebSub notification: {e}")
+            db.session.rollback()
+            return None
+
+websub_bp = Blueprint('websub', __name__)
+websub_receiver = WebSubReceiver()
+
+@websub_bp.route('/websub/youtube/<channel_id>', methods=['GET', 'POST'])
+def websub_youtube(channel_id):
+    """WebSub callback: hub verification on GET, pushed uploads on POST."""
+    if request.method == 'GET':
+        challenge = websub_receiver.verify(channel_id, request.args)
+        if challenge is None:
+            abort(404)
+        return challenge, 200, {'Content-Type': 'text/plain'}
+
+    if (request.content_length or 0) > websub_receiver.max_body:
+        abort(413)
+    queued = websub_receiver.ingest(channel_id, request.get_data(), request.headers.get('X-Hub-Signature'))
+    if queued is None:
+        abort(404)
+    return '', 204
+
+class WebSubSubscriber:
+    """Bot side of WebSub: keeps hub leases current and announces queued pushes.
+
+    Every YouTube source with a resolved channel id gets a subscription at the
+    hub. Subscriptions are renewed a day before their lease runs out and
+    dropped when no config watches the channel any more. While a channel's
+    lease is verified, the poll scheduler checks it only every
+    ``WEBSUB_FALLBACK_INTERVAL`` seconds, as a safety net for missed pushes.
+    Queued notifications are drained every few seconds through the service's
+    normal announcement path.
+    """
+
+    drain_seconds = 5
+    sync_seconds = 600
+    renew_margin = timedelta(days=1)
+    retry_after = RETRY_AFTER  # Before re-requesting a pending or denied subscription
+
+    def __init__(self, service):
+        self.service = service
+        self.bot = service.bot
+        self.hub_url = config.WEBSUB_HUB_URL
+        self.callback_url = config.WEBSUB_CALLBACK_URL.rstrip('/')
+        self.enabled = bool(self.callback_url)
+        self.active = set()  # Channel ids with a verified, unexpired lease
+        self.requests = 0
+        self.announced = 0
+
+    def _channels(self):
+        """Channel id -> YouTube sources currently being polled."""
+        channels = {}
+        for source in self.service.scheduler.sources:
+            platform, username = source
+            channel_id = self.service.youtube_channel_ids.get(username) if platform == 'youtube' else None
+            if channel_id:
+                channels.setdefault(channel_id, []).append(source)
+        return channels
+
+    async def _request(self, subscription, mode):
+        """Ask the hub to subscribe or unsubscribe; the hub confirms through the dashboard."""
+        data = {
+            'hub.callback': f"{self.callback_url}/{subscription.channel_id}",
+            'hub.mode': mode,
+            'hub.topic': subscription.topic,
+            'hub.verify': 'async',
+            'hub.secret': subscription.secret,
+            'hub.lease_seconds': str(config.WEBSUB_LEASE_SECONDS)
+        }
+        self.requests += 1
+        async with self.service.session.post(self.hub_url, data=data) as resp:
+            if resp.status not in (202, 204):
+                logger.warning(f"WebSub hub refused {mode} for {subscription.channel_id}: {resp.status}")
+                return False
+        return True
+
+    async def sync(self):
+        """Subscribe new channels, renew expiring leases and drop unwatched ones."""
+        if not self.enabled or not self.service.session:
+            return
+        channels = self._channels()
+        now = datetime.utcnow()
+
+        with self.bot.app_context:
+            subscriptions = {row.channel_id: row for row in WebSubSubscription.query.all()}
+
+            for channel_id in channels:
+                subscription = subscriptions.get(channel_id)
+                if not subscription:
+                    subscription = WebSubSubscription(
+                        channel_id=channel_id,
+                        topic=youtube_topic(channel_id),
+                        secret=secrets.token_hex(32)
+                    )
+                    db.session.add(subscription)
+                elif subscription.status == 'verified' and subscription.expires_at - now > self.renew_margin:
+                    continue
+                elif subscription.status != 'verified' and now - subscription.requested_at < self.retry_after:
+                    continue  # Waiting for the hub to verify
+
+                subscription.requested_at = now
+                db.session.commit()
+                await self._request(subscription, 'subscribe')
+
+            for channel_id, subscription in subscriptions.items():
+                if channel_id in channels:
+                    continue
+                if subscription.status == 'verified':
+                    # Kept until the hub confirms, so the verification can be answered
+                    subscription.status = 'unsubscribed'
+                    subscription.requested_at = now
+                    await self._request(subscription, 'unsubscribe')
+                elif subscription.status != 'unsubscribed' or now - subscription.requested_at >= self.retry_after:
+                    db.session.delete(subscription)
+            db.session.commit()
+
+            self.active = {
+                row.channel_id for row in WebSubSubscription.query.filter(
+                    WebSubSubscription.status == 'verified',
+                    WebSubSubscription.expires_at > now
+                )
+            }
+
+        # Pushed channels drop to the slow fallback poll
+        self.service.scheduler.pushed = {
+            source for channel_id in self.active for source in channels.get(channel_id, ())
+        }
+
+    async def drain(self):
+        """Announce queued pushes to every subscription on the channel."""
+        with self.bot.app_context:
+            pending = WebSubNotification.query.filter(
+                WebSubNotification.processed_at.is_(None)
+            ).order_by(WebSubNotification.published_at).limit(100).all()
+            pending = [
+                {'id': row.id, 'channel_id': row.channel_id, 'video_id': row.video_id, 'title': row.title,
+                 'author': row.author, 'published_at': row.published_at}
+                for row in pending
+            ]
+        if not pending:
+            return
+
+        channels = self._channels()
+        scheduler = self.service.scheduler
+        for notification in pending:
+            for source in channels.get(notification['channel_id'], ()):
+                subscriptions = [scheduler.configs[config_id] for config_id in scheduler.sources.get(source, ())]
+                if subscriptions:
+                    self.announced += await self.service.announce_youtube_push(source, subscriptions, notification)
+
+        with self.bot.app_context:
+            db.session.execute(
+                update(WebSubNotification)
+                .where(WebSubNotification.id.in_([notification['id'] for notification in pending]))
+                .values(processed_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+    async def run(self):
+        """Drain pushes every few seconds and resync subscriptions every few minutes."""
+        if not self.enabled:
+            return
+        next_sync = 0
+        while True:
+            try:
+                if time.monotonic() >= next_sync:
+                    await self.sync()
+                    next_sync = time.monotonic() + self.sync_seconds
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Error in WebSub loop: {e}")
+            await asyncio.sleep(self.drain_seconds)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'pushed_channels': len(self.active),
+            'hub_requests': self.requests,
+            'announced': self.announced
+        }
@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+import aiohttp
+from aiohttp import web
+from services.websub import youtube_topic, sign
+import logging
+
+logger = logging.getLogger(__name__)
+
+def build_atom(channel_id, video_id, title, author='Rosethorn', published=None):
+    """A YouTube-style Atom push for one upload."""
+    published = (published or datetime.now(timezone.utc)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    return f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{escape(youtube_topic(channel_id))}"/>
+  <title>YouTube video feed</title>
+  <updated>{published}</updated>
+  <entry>
+    <id>yt:video:{escape(video_id)}</id>
+    <yt:videoId>{escape(video_id)}</yt:videoId>
+    <yt:channelId>{escape(channel_id)}</yt:channelId>
+    <title>{escape(title)}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={escape(video_id)}"/>
+    <author>
+      <name>{escape(author)}</name>
+      <uri>https://www.youtube.com/channel/{escape(channel_id)}</uri>
+    </author>
+    <published>{published}</published>
+    <updated>{published}</updated>
+  </entry>
+</feed>
+""".encode()
+
+class LocalHub:
+    """In-process WebSub hub standing in for pubsubhubbub.appspot.com.
+
+    ``POST /subscribe`` takes the same form fields as the real hub. It answers
+    202, then verifies the callback with a challenge, as ``hub.verify=async``
+    requires. ``POST /publish`` with ``channel_id``, ``video_id`` and ``title``
+    pushes a signed Atom entry to every verified subscriber of that channel.
+    ``GET /subscriptions`` lists the current leases. Point the bot at it with
+    ``WEBSUB_HUB_URL=http://127.0.0.1:8766/subscribe``.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}  # (topic, callback) -> {'secret', 'expires'}
+        self.deliveries = []  # (callback, status)
+        self.app = web.Application()
+        self.app.router.add_post('/subscribe', self.subscribe)
+        self.app.router.add_post('/publish', self.publish)
+        self.app.router.add_get('/subscriptions', self.list_subscriptions)
+        self.session = None
+
+    async def _session(self):
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def subscribe(self, request):
+        form = await request.post()
+        if form.get('hub.mode') not in ('subscribe', 'unsubscribe') or not form.get('hub.callback'):
+            return web.Response(status=400, text="hub.mode and hub.callback are required")
+        asyncio.create_task(self._verify(dict(form)))
+        return web.Response(status=202)
+
+    async def _verify(self, form):
+        challenge = secrets.token_hex(16)
+        lease = int(form.get('hub.lease_seconds') or 432000)
+        params = {
+            'hub.mode': form['hub.mode'],
+            'hub.topic': form['hub.topic'],
+            'hub.challenge': challenge,
+            'hub.lease_seconds': str(lease)
+        }
+        session = await self._session()
+        async with session.get(form['hub.callback'], params=params) as resp:
+            confirmed = resp.status == 200 and (await resp.text()) == challenge
+
+        key = (form['hub.topic'], form['hub.callback'])
+        if not confirmed:
+            logger.warning(f"Callback {form['hub.callback']} did not confirm {form['hub.mode']}")
+        elif form['hub.mode'] == 'subscribe':
+            self.subscriptions[key] = {'secret': form.get('hub.secret', ''), 'expires': time.time() + lease}
+        else:
+            self.subscriptions.pop(key, None)
+
+    async def publish(self, request):
+        form = await request.post()
+        channel_id = form.get('channel_id')
+        if not channel_id or not form.get('video_id'):
+            return web.Response(status=400, text="channel_id and video_id are required")
+        delivered = await self.push(channel_id, form['video_id'], form.get('title', 'New video'))
+        return web.json_response({'delivered': delivered})
+
+    async def push(self, channel_id, video_id, title):
+        """Send one upload to the channel's live subscribers; returns how many accepted it."""
+        body = build_atom(channel_id, video_id, title)
+        topic = youtube_topic(channel_id)
+        session = await self._session()
+        delivered = 0
+        for (subscribed_topic, callback), lease in list(self.subscriptions.items()):
+            if subscribed_topic != topic or lease['expires'] < time.time():
+                continue
+            headers = {'Content-Type': 'application/atom+xml'}
+            if lease['secret']:
+                headers['X-Hub-Signature'] = sign(lease['secret'], body)
+            async with session.post(callback, data=body, headers=headers) as resp:
+                self.deliveries.append((callback, resp.status))
+                if 200 <= resp.status < 300:
+                    delivered += 1
+        return delivered
+
+    async def list_subscriptions(self, request):
+        return web.json_response([
+            {'topic': topic, 'callback': callback, 'expires_in': round(lease['expires'] - time.time())}
+            for (topic, callback), lease in self.subscriptions.items()
+        ])
+
+    async def start(self, host='127.0.0.1', port=8766):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.session:
+            await self.session.close()
+        await self.runner.cleanup()
+
+async def check(port=8766):
+    """Run the hub against the real callback route and receiver on a throwaway database.
+
+    The hub subscribes with an oversized lease, then a forged verification and
+    a forged unsubscribe are sent straight to the callback, and finally one
+    signed upload is pushed.
+    """
+    from werkzeug.serving import make_server
+    from main import create_db_app, db
+    from models import WebSubSubscription, WebSubNotification
+    from services.websub import websub_bp
+
+    app = create_db_app(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'websub.db')}")
+    app.register_blueprint(websub_bp)
+    server = make_server('127.0.0.1', port + 1, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    channel_id = 'UCrosethorn0000000000000'
+    topic = youtube_topic(channel_id)
+    callback = f"http://127.0.0.1:{port + 1}/websub/youtube/{channel_id}"
+    with app.app_context():
+        # The row WebSubSubscriber.sync writes before asking the hub
+        subscription = WebSubSubscription(channel_id=channel_id, topic=topic, secret=secrets.token_hex(32))
+        db.session.add(subscription)
+        db.session.commit()
+        secret = subscription.secret
+
+    hub = LocalHub()
+    hub_url = await hub.start(port=port)
+    forged = {}
+    try:
+        async with aiohttp.ClientSession() as session:
+            await session.post(hub_url + '/subscribe', data={
+                'hub.callback': callback,
+                'hub.mode': 'subscribe',
+                'hub.topic': topic,
+                'hub.verify': 'async',
+                'hub.secret': secret,
+                'hub.lease_seconds': '100000000'
+            })
+            await asyncio.sleep(0.5)  # Let the async verification land
+
+            for mode in ('subscribe', 'unsubscribe'):
+                params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': 'forged',
+                          'hub.lease_seconds': '100000000'}
+                async with session.get(callback, params=params) as resp:
+                    forged[mode] = resp.status
+
+            delivered = await hub.push(channel_id, 'vid00000003', 'Roses at dusk')
+    finally:
+        await hub.stop()
+        server.shutdown()
+
+    with app.app_context():
+        subscription = WebSubSubscription.query.filter_by(channel_id=channel_id).one()
+        return {
+            'status': subscription.status,
+            'lease_seconds': subscription.lease_seconds,
+            'forged_subscribe_status': forged['subscribe'],
+            'forged_unsubscribe_status': forged['unsubscribe'],
+            'delivered': delivered,
+            'queued': [row.video_id for row in WebSubNotification.query.all()]
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local WebSub hub for testing YouTube push")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--check', action='store_true', help="Run a subscribe and publish round trip through the real callback")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(json.dumps(asyncio.run(check(args.port)), indent=2))
+        return
+
+    hub = LocalHub()
+    print(f"🌹 WebSub hub on http://127.0.0.1:{args.port}/subscribe")
+    web.run_app(hub.app, host='127.0.0.1', port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
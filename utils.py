@@ -3,6 +3,7 @@ import aiohttp
 import json
 from datetime import datetime
 import config
+from services import level_curve
 
 def get_discord_user_info(discord_id):
     """Get Discord user information"""
@@ -77,13 +78,11 @@ def format_datetime(dt):
 
 def get_user_level(xp):
     """Calculate user level from XP"""
-    # Simple level calculation: level = sqrt(xp / 100)
-    import math
-    return int(math.sqrt(xp / 100)) + 1
+    return level_curve.level_for_xp(xp)
 
 def xp_for_level(level):
     """Calculate XP required for level"""
-    return (level - 1) ** 2 * 100
+    return level_curve.xp_for_level(level)
 
 def validate_embed_data(data):
     """Validate embed data structure"""